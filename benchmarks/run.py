@@ -0,0 +1,143 @@
+"""Run the collector and brain load benchmarks and store the results for comparison.
+
+Each benchmark (collector/bench_ingest.py, brain/bench_consume.py and brain's
+restart-to-ready brain/bench_startup.py) runs in its own process from its
+service directory, since the services share module names. The combined
+report is written to benchmarks/results/<UTC time>-<commit>.json. With
+--baseline, throughput, p99 latency per stage and peak memory are compared
+against an earlier report and the run exits with status 1 if any of them
+regressed by more than --tolerance.
+
+    python benchmarks/run.py --duration 10
+    python benchmarks/run.py --max-speed --baseline benchmarks/results/20250417T120000Z-1a2b3c4.json
+"""
+import argparse
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+BENCHMARKS = {
+    'collector': ('collector', 'bench_ingest.py'),
+    'brain': ('brain', 'bench_consume.py'),
+    'startup': ('brain', 'bench_startup.py'),
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmark(name: str, args: list) -> dict:
+    directory, script = BENCHMARKS[name]
+    with tempfile.NamedTemporaryFile(suffix='.json') as output:
+        subprocess.run([sys.executable, script, *args, '--output', output.name],
+                       cwd=os.path.join(ROOT, directory), check=True)
+        return json.load(output)
+
+
+def compare(result: dict, baseline: dict, tolerance: float, min_latency_ms=1.0) -> list:
+    """Rows of (metric, baseline, current, change, regressed) for every comparable metric.
+
+    Latencies only count as regressed when they also grew by `min_latency_ms`,
+    so sub-millisecond jitter is not reported.
+    """
+    rows = []
+
+    def add(metric, old, new, higher_is_better, min_delta=0.0):
+        if not old or new is None:
+            return
+        change = new / old - 1
+        if higher_is_better:
+            regressed = change < -tolerance
+        else:
+            regressed = change > tolerance and new - old > min_delta
+        rows.append((metric, old, new, change, regressed))
+
+    for name in BENCHMARKS:
+        current, previous = result.get(name), baseline.get(name)
+        if not current or not previous:
+            continue
+        add(f'{name}.events_per_s', previous.get('events_per_s'), current.get('events_per_s'), True)
+        for stage, stats in current.get('latency_ms', {}).items():
+            old = previous.get('latency_ms', {}).get(stage, {}).get('p99')
+            add(f'{name}.{stage}.p99_ms', old, stats.get('p99'), False, min_latency_ms)
+        add(f'{name}.peak_rss_mb', previous.get('memory', {}).get('peak_rss_mb'),
+            current.get('memory', {}).get('peak_rss_mb'), False)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--only', choices=sorted(BENCHMARKS), action='append', help='Run only this benchmark')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--pumpfun-rate', type=float, default=1000)
+    parser.add_argument('--raydium-rate', type=float, default=100)
+    parser.add_argument('--max-speed', action='store_true')
+    parser.add_argument('--collector-args', default='', help='Extra bench_ingest.py arguments')
+    parser.add_argument('--brain-args', default='', help='Extra bench_consume.py arguments')
+    parser.add_argument('--startup-args', default='', help='Extra bench_startup.py arguments')
+    parser.add_argument('--startup-runs', type=int, default=3)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--baseline', help='Earlier result file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression (default 0.2)')
+    parser.add_argument('--min-latency-ms', type=float, default=1.0,
+                        help='Smallest p99 increase reported as a regression (default 1.0)')
+    args = parser.parse_args()
+
+    common = ['--duration', str(args.duration), '--pumpfun-rate', str(args.pumpfun_rate),
+              '--raydium-rate', str(args.raydium_rate)] + (['--max-speed'] if args.max_speed else [])
+    arguments = {
+        'collector': common + shlex.split(args.collector_args),
+        'brain': common + shlex.split(args.brain_args),
+        'startup': ['--runs', str(args.startup_runs)] + shlex.split(args.startup_args),
+    }
+    started = datetime.now(timezone.utc)
+    commit = git_commit()
+    result = {'meta': {'started_at': started.isoformat(), 'commit': commit, 'python': platform.python_version(),
+                       'platform': platform.platform(), 'cpus': os.cpu_count(), 'argv': sys.argv[1:]}}
+    for name in args.only or BENCHMARKS:
+        if name == 'startup' and not args.startup_runs:
+            continue
+        print(f"Running {name} benchmark...", file=sys.stderr)
+        result[name] = run_benchmark(name, arguments[name])
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{started:%Y%m%dT%H%M%SZ}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+    for name in BENCHMARKS:
+        if name in result:
+            stages = ', '.join(f"{stage} {stats['p50']:.1f}/{stats['p99']:.1f}"
+                               for stage, stats in result[name]['latency_ms'].items() if stats.get('count'))
+            if 'events_per_s' in result[name]:
+                print(f"{name}: {result[name]['events_per_s']:.0f} events/s, "
+                      f"peak RSS {result[name]['memory']['peak_rss_mb']:.0f} MB; p50/p99 ms: {stages}")
+            else:
+                print(f"{name}: p50/p99 ms: {stages}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(result, baseline, args.tolerance, args.min_latency_ms)
+        print(f"\nCompared with {args.baseline} (commit {baseline.get('meta', {}).get('commit')}):")
+        for metric, old, new, change, regressed in rows:
+            print(f"  {metric:<40} {old:>12.2f} -> {new:>12.2f} {change:>+8.1%}{'  REGRESSED' if regressed else ''}")
+        if any(row[-1] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
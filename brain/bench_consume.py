@@ -0,0 +1,297 @@
+"""Load-test brain's consume_signals with synthetic Pump.fun and Raydium signals.
+
+Signals shaped like the collector's are generated at --pumpfun-rate and
+--raydium-rate and delivered through an in-process stand-in for the
+signals.raw queue into the real consume_signals: windowing, feature store,
+prefilter, decision pool and prompt building all run as in production. The
+model is replay's StubModel, Postgres and the signals.decoded exchange are
+in-process stand-ins. Reports throughput, p50/p99 per stage and memory as JSON.
+
+    python bench_consume.py --pumpfun-rate 2000 --raydium-rate 200 --duration 10
+    python bench_consume.py --max-speed --duration 5 --model-latency-ms 500 --output consume.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import resource
+import statistics
+import time
+import uuid
+
+import brain
+from codec import JSON, decode
+from replay import StubModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MINT_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+def percentiles(values, scale=1000):
+    """Count and mean/p50/p99/max of `values` (seconds) in milliseconds."""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale
+    return {'count': len(ordered), 'mean': statistics.fmean(ordered) * scale, 'p50': pick(0.5), 'p99': pick(0.99),
+            'max': ordered[-1] * scale}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def encode(signal) -> bytes:
+    return orjson.dumps(signal) if orjson is not None else json.dumps(signal).encode()
+
+
+async def paced(rate, duration):
+    """Yield event numbers at `rate` per second (None: as fast as consumed) for `duration` seconds."""
+    started = time.perf_counter()
+    sent = 0
+    while True:
+        elapsed = time.perf_counter() - started
+        if elapsed >= duration:
+            return
+        due = int(elapsed * rate) + 1 if rate else sent + 100
+        while sent < due:
+            yield sent
+            sent += 1
+        await asyncio.sleep(0.001 if rate else 0)
+
+
+class SignalGenerator:
+    """Collector-shaped signals for a fixed set of `mints`, so features and windows see repeat mints."""
+
+    def __init__(self, mints=2000, seed=42):
+        self.rng = random.Random(seed)
+        self.mints = [''.join(self.rng.choice(MINT_ALPHABET) for _ in range(44)) for _ in range(mints)]
+
+    def pumpfun(self, n: int) -> dict:
+        mint = self.rng.choice(self.mints)
+        return {
+            'mint': mint,
+            'name': f'Token {n}',
+            'symbol': f'TK{n % 1000}',
+            'uri': f'https://ipfs.io/ipfs/{mint}',
+            'traderPublicKey': mint[::-1],
+            'initialBuy': self.rng.uniform(1e6, 1e8),
+            'solAmount': self.rng.uniform(0.01, 5),
+            'vSolInBondingCurve': self.rng.uniform(30, 80),
+            'marketCapSol': self.rng.uniform(25, 200),
+        }
+
+    def raydium(self, n: int) -> dict:
+        return {
+            'id': f'pool{n}',
+            'baseMint': self.rng.choice(self.mints),
+            'quoteMint': 'So11111111111111111111111111111111111111112',
+            'lpAmount': self.rng.uniform(1, 500),
+            'volume24h': self.rng.uniform(0, 1e5),
+            'price': self.rng.uniform(1e-9, 1e-3),
+        }
+
+    def signal(self, kind: str, n: int) -> bytes:
+        now = time.time()
+        data = self.pumpfun(n) if kind == 'pumpfun' else self.raydium(n)
+        trace = {'id': uuid.uuid4().hex, 'stages': {'ingest': now, 'published': now}}
+        return encode({'type': kind, 'data': data, 'ts': now, 'trace': trace})
+
+
+class InProcessMessage:
+    """Stand-in for an aio_pika IncomingMessage; records how long it waited plus how long it took to process."""
+
+    def __init__(self, body, consume_seconds):
+        self.body = body
+        self.content_type = JSON
+        self.queued_at = time.perf_counter()
+        self.consume_seconds = consume_seconds
+
+    def process(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.consume_seconds.append(time.perf_counter() - self.queued_at)
+
+
+class InProcessQueue:
+    """Stand-in for the replica's signals.raw queue."""
+
+    def __init__(self):
+        self.messages = asyncio.Queue()
+        self.consume_seconds = []
+
+    def put(self, body):
+        self.messages.put_nowait(InProcessMessage(body, self.consume_seconds))
+
+    async def bind(self, exchange, routing_key=None):
+        pass
+
+    def iterator(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.messages.get()
+
+
+class DecodedExchange:
+    """Stand-in for the default exchange; keeps the decisions published to signals.decoded."""
+
+    def __init__(self):
+        self.decisions = []
+
+    async def publish(self, message, routing_key):
+        decision = decode(message.body)
+        # The body is encoded before publishing, so the broker's receipt stands in for `published`
+        decision['trace']['stages']['published'] = time.time()
+        self.decisions.append(decision)
+
+
+class InProcessChannel:
+    def __init__(self, queue):
+        self.queue = queue
+        self.default_exchange = DecodedExchange()
+
+    async def set_qos(self, prefetch_count):
+        pass
+
+    async def declare_exchange(self, name, *args, **kwargs):
+        return name
+
+    async def declare_queue(self, name, **kwargs):
+        return self.queue
+
+
+class InProcessDatabase:
+    """Stand-in for db.Database that only counts the rows it is given."""
+
+    def __init__(self):
+        self.counters = {'signals_raw': 0, 'signals_decoded': 0}
+
+    def save_signal(self, signal: dict):
+        self.counters['signals_raw'] += 1
+
+    def save_decision(self, decision: dict):
+        self.counters['signals_decoded'] += 1
+
+    def stats(self) -> dict:
+        return dict(self.counters)
+
+
+async def bench(args) -> dict:
+    queue = InProcessQueue()
+    brain.rabbit_channel = InProcessChannel(queue)
+    brain.database = InProcessDatabase()
+    brain.call_model = model = StubModel(latency=args.model_latency_ms / 1000)
+    brain.WINDOW_SECONDS = args.window_seconds
+    brain.WINDOW_TICK_SECONDS = min(brain.WINDOW_TICK_SECONDS, args.window_seconds / 4)
+    brain.DECISION_WORKERS = args.workers
+    brain.features.path = None
+    generator = SignalGenerator(args.mints)
+
+    async def feed(kind, rate):
+        if not rate:
+            return 0
+        count = 0
+        async for n in paced(None if args.max_speed else rate, args.duration):
+            queue.put(generator.signal(kind, n))
+            count += 1
+            if args.max_speed and queue.messages.qsize() > args.max_backlog:
+                # At max speed, let the consumer catch up instead of queueing without bound
+                await asyncio.sleep(0.001)
+        return count
+
+    # Loaded in the background at startup in production; keep the import out of the measurement
+    await brain.load_clients()
+    rss_before = peak_rss_mb()
+    cpu = time.process_time()
+    started = time.perf_counter()
+    consumer = asyncio.create_task(brain.consume_signals())
+    sent = sum(await asyncio.gather(feed('pumpfun', args.pumpfun_rate), feed('raydium', args.raydium_rate)))
+    while len(queue.consume_seconds) < sent:
+        await asyncio.sleep(0.01)
+    ingest_seconds = time.perf_counter() - started
+    # Let the last windows close and be decided
+    await asyncio.sleep(args.window_seconds + brain.WINDOW_ALLOWED_LATENESS + brain.WINDOW_TICK_SECONDS)
+    await brain.decision_pool.queue.join()
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu
+    pool_stats = brain.decision_pool.stats()
+    consumer.cancel()
+    await asyncio.gather(consumer, return_exceptions=True)
+
+    decisions = brain.rabbit_channel.default_exchange.decisions
+    stages = {'consume': queue.consume_seconds, 'window_wait': [], 'decide': [], 'publish': [], 'end_to_end': []}
+    for decision in decisions:
+        s = decision['trace']['stages']
+        stages['window_wait'].append(s['decide_started'] - s['window_closed'])
+        stages['decide'].append(s['decided'] - s['decide_started'])
+        stages['publish'].append(s['published'] - s['publish_started'])
+        if 'first_ingest' in s:
+            stages['end_to_end'].append(s['published'] - s['first_ingest'])
+    actions = {}
+    for decision in decisions:
+        actions[decision['action']] = actions.get(decision['action'], 0) + 1
+    return {
+        'events': sent,
+        'elapsed_s': elapsed,
+        'events_per_s': sent / ingest_seconds if ingest_seconds else 0.0,
+        'cpu_s': cpu,
+        'windows': len(decisions),
+        'model_calls': model.calls,
+        'actions': actions,
+        'latency_ms': {stage: percentiles(values) for stage, values in stages.items()},
+        'memory': {'peak_rss_mb': peak_rss_mb(), 'peak_rss_growth_mb': peak_rss_mb() - rss_before},
+        'decision_pool': pool_stats,
+        'decision_cache': brain.decision_cache.stats(),
+        'features': brain.features.stats(),
+        'prefilter': brain.prefilter.stats(),
+        'database': brain.database.stats(),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pumpfun-rate', type=float, default=1000, help='Pump.fun signals/s; 0 disables')
+    parser.add_argument('--raydium-rate', type=float, default=100, help='Raydium signals/s; 0 disables')
+    parser.add_argument('--max-speed', action='store_true', help='Run the enabled generators as fast as possible')
+    parser.add_argument('--max-backlog', type=int, default=10000, help='Queued signals allowed at max speed')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load')
+    parser.add_argument('--mints', type=int, default=2000, help='Distinct synthetic mints')
+    parser.add_argument('--window-seconds', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, default=brain.DECISION_WORKERS)
+    parser.add_argument('--model-latency-ms', type=float, default=0.0,
+                        help='Milliseconds the stub model takes per call')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    report = {'args': vars(args), **await bench(args)}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+    else:
+        print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
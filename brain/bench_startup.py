@@ -0,0 +1,127 @@
+"""Measure brain's restart-to-ready time.
+
+Starts `uvicorn brain:app` --runs times and records, from process spawn, how
+long until /healthz answers (live) and until /readyz returns 200 (RabbitMQ and
+Postgres connected, using DATABASE_URL and RABBITMQ_URL from the environment),
+then how long a graceful shutdown takes. Also times a bare `import brain`.
+With --snapshot-mints, each run restores a feature snapshot of that size, as
+after a crash. Reports p50/p99 per stage as JSON.
+
+    python bench_startup.py --runs 5
+    DATABASE_URL=... RABBITMQ_URL=... python bench_startup.py --snapshot-mints 50000 --output startup.json
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from bench_consume import SignalGenerator, percentiles
+from codec import decode
+from features import FeatureStore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def status(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def wait_for(url: str, started: float, timeout: float):
+    """Seconds from `started` until `url` answers 200, or None on timeout."""
+    while time.perf_counter() - started < timeout:
+        if status(url) == 200:
+            return time.perf_counter() - started
+        time.sleep(0.01)
+    return None
+
+
+def time_import() -> float:
+    code = 'import time; t = time.perf_counter(); import brain; print(time.perf_counter() - t)'
+    out = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def write_snapshot(path: str, mints: int):
+    store = FeatureStore(capacity=mints, path=path)
+    generator = SignalGenerator(mints)
+    for n in range(mints):
+        signal = decode(generator.signal('pumpfun', n))
+        signal['data']['mint'] = generator.mints[n]
+        store.update(signal)
+    store.save()
+
+
+def start_once(port: int, env: dict, ready_timeout: float) -> dict:
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'brain:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        live = wait_for(f'{base}/healthz', started, ready_timeout)
+        ready = wait_for(f'{base}/readyz', started, ready_timeout) if live is not None else None
+    finally:
+        stopping = time.perf_counter()
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return {'live': live, 'ready': ready, 'shutdown': time.perf_counter() - stopping}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--ready-timeout', type=float, default=30, help='Seconds to wait for /healthz and /readyz')
+    parser.add_argument('--snapshot-mints', type=int, default=0, help='Mints in the feature snapshot restored on start')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, FEATURE_SNAPSHOT_PATH=os.path.join(tmp, 'features.bin'))
+        stages = {'import': [], 'live': [], 'ready': [], 'shutdown': []}
+        for _ in range(args.runs):
+            stages['import'].append(time_import())
+            if args.snapshot_mints:
+                write_snapshot(env['FEATURE_SNAPSHOT_PATH'], args.snapshot_mints)
+            run = start_once(free_port(), env, args.ready_timeout)
+            for stage, seconds in run.items():
+                if seconds is not None:
+                    stages[stage].append(seconds)
+    report = {
+        'args': vars(args),
+        'runs': args.runs,
+        'not_ready': args.runs - len(stages['ready']),
+        'latency_ms': {stage: percentiles(values) for stage, values in stages.items()},
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
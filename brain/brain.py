@@ -2,17 +2,31 @@ import os
 import json
 import logging
 import asyncio
-from datetime import datetime
+import importlib
+import random
+import socket
+import time
 
-from fastapi import FastAPI, WebSocket, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from pydantic import BaseModel
 import base58
-from mnemonic import Mnemonic
-from bip_utils import Bip39SeedGenerator, Bip44, Bip44Coins, Bip44Changes
 from typing import Optional, List
 
+from broadcast import StatusHub
+from cluster import Cluster
+from codec import decode
+from db import Database
+import metrics
+from tracing import mark, stage_time, window_trace
+from windowing import WindowEngine
+from decision_pool import DecisionPool
+from prompt import build_prompt, dumps
+from decision_cache import DecisionCache, prompt_key
+from features import FeatureStore
+from prefilter import Prefilter
+
 # In-memory active wallet storage
 saved_wallet = None
 
@@ -22,14 +36,20 @@ class ConfigModel(BaseModel):
     min_liquidity_sol: float = None
     max_trade_amount_sol: float = None
     slippage_bps: int = None
-import aio_pika
-import psycopg2
-import openai
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+# Slow-to-import clients, loaded off the event loop by load_clients() once the
+# API is already serving; wallet code imports bip_utils/mnemonic on first use
+aio_pika = None
+openai = None
+# Startup is timed from here; see report_ready and bench_startup.py for spawn-to-ready
+IMPORTED_AT = time.monotonic()
 
 # FastAPI application
 app = FastAPI()
 # Serve UI static files (React/Bootstrap dashboard)
-app.mount("/ui", StaticFiles(directory="ui", html=True), name="ui")
+UI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui")
+app.mount("/ui", StaticFiles(directory=UI_DIR, html=True), name="ui")
 
 @app.get("/", include_in_schema=False)
 async def root():
@@ -46,84 +66,261 @@ config = {
 # Configure startup and shutdown events to manage the consumer
 @app.on_event("startup")
 async def startup_event():
+    global features_task
     logging.basicConfig(level=logging.INFO)
     logging.info("Brain starting up: initializing connections")
-    # Initialize DB and RabbitMQ connections only; do NOT start consumer until /start
-    await init()
+    # Connect to DB and RabbitMQ in the background; do NOT start consumer until /start
+    init()
+    status_hub.start()
+    features.load()
+    features_task = asyncio.create_task(snapshot_features())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logging.info("Brain shutting down: stopping consumer and closing connections")
-    global consumer_task, rabbit_conn, db_conn
     if consumer_task:
         consumer_task.cancel()
+    for task in (rabbit_task, ready_task, queue_keeper_task):
+        if task:
+            task.cancel()
+    await status_hub.stop()
+    await cluster.close()
+    if features_task:
+        features_task.cancel()
+    try:
+        features.save()
+    except OSError as e:
+        logging.error(f"Failed to save feature snapshot: {e}")
     try:
         if rabbit_conn:
             await rabbit_conn.close()
     except Exception:
         pass
     try:
-        if db_conn:
-            db_conn.close()
+        if database:
+            await database.close()
     except Exception:
         pass
 
 # Global state and connections
 running = False
 consumer_task = None
+decision_pool = None
 status = {"positions": [], "pnl": 0, "config": {}}
-db_conn = None
+database = None
 rabbit_conn = None
 rabbit_channel = None
+rabbit_task = None
+ready_task = None
+queue_keeper_task = None
+features_task = None
+ready_after = None
+
+def init():
+    """Start connecting to Postgres and RabbitMQ in the background.
 
-async def init():
-    """Initialize database and RabbitMQ connections."""
-    global db_conn, rabbit_conn, rabbit_channel
+    Nothing here waits on either service, so the API (and /healthz) is up
+    right away; /readyz reports when both connections are established.
+    """
+    global database, rabbit_task, ready_task
     database_url = os.getenv('DATABASE_URL')
-    rabbit_url = os.getenv('RABBITMQ_URL')
-    # Connect to Postgres
-    db_conn = psycopg2.connect(database_url)
-    # Connect to RabbitMQ
-    rabbit_conn = await aio_pika.connect_robust(rabbit_url)
-    rabbit_channel = await rabbit_conn.channel()
-    # Declare queues
-    await rabbit_channel.declare_queue('signals.raw', durable=True)
-    await rabbit_channel.declare_queue('signals.decoded', durable=True)
+    # Connect to Postgres in the background; writes are buffered until it is up
+    database = Database(
+        database_url,
+        max_size=int(os.getenv('DB_POOL_SIZE', '5')),
+        batch_size=int(os.getenv('DB_WRITE_BATCH_SIZE', '200')),
+        flush_interval=float(os.getenv('DB_WRITE_FLUSH_INTERVAL', '0.5')),
+        max_pending=int(os.getenv('DB_WRITE_MAX_PENDING', '10000')),
+    )
+    database.start()
+    # Join the other replicas: shared config/running state and leader election
+    cluster.start()
+    rabbit_task = asyncio.create_task(connect_rabbit(os.getenv('RABBITMQ_URL')))
+    ready_task = asyncio.create_task(report_ready())
+
+async def load_clients():
+    """Import aio_pika and openai in a worker thread, so the event loop keeps serving meanwhile."""
+    global aio_pika, openai
+    if aio_pika is None:
+        aio_pika = await asyncio.to_thread(importlib.import_module, 'aio_pika')
+    if openai is None:
+        client = await asyncio.to_thread(importlib.import_module, 'openai')
+        client.api_key = os.getenv('OPENAI_API_KEY')
+        openai = client
+
+async def connect_rabbit(rabbit_url, min_backoff=0.5, max_backoff=30.0):
+    """Connect to RabbitMQ, retrying with jittered backoff until it is reachable."""
+    global rabbit_conn, rabbit_channel, queue_keeper_task
+    await load_clients()
+    delay = min_backoff
+    while True:
+        try:
+            rabbit_conn = await aio_pika.connect_robust(rabbit_url)
+            channel = await rabbit_conn.channel()
+            # Declare queues; this replica's signals queue buffers its share of mints from startup on,
+            # before /start and while stopped
+            await channel.declare_queue('signals.decoded', durable=True)
+            await declare_signals_queue(channel)
+            rabbit_channel = channel
+            break
+        except Exception as e:
+            logging.error(f"RabbitMQ unavailable, retrying in {delay:.1f}s: {e!r}")
+            if rabbit_conn is not None:
+                await asyncio.gather(rabbit_conn.close(), return_exceptions=True)
+                rabbit_conn = None
+            await asyncio.sleep(delay * (0.5 + random.random()))
+            delay = min(delay * 2, max_backoff)
+    logging.info("Connected to RabbitMQ")
+    queue_keeper_task = asyncio.create_task(keep_signals_queue())
+    status_hub.notify()
+
+async def report_ready():
+    """Log and export how long this process took to become ready."""
+    global ready_after
+    await asyncio.shield(rabbit_task)
+    await database.wait_connected()
+    ready_after = time.monotonic() - IMPORTED_AT
+    metrics.STARTUP_SECONDS.set(ready_after)
+    logging.info(f"Brain ready {ready_after:.2f}s after start")
+
+def readiness() -> dict:
+    """Connection checks behind /readyz."""
+    return {
+        'rabbitmq': rabbit_channel is not None and not rabbit_channel.is_closed,
+        'postgres': database is not None and database.pool is not None,
+    }
+
+def set_running(flag: bool) -> bool:
+    """Start or stop this replica's consumer; returns False if it already was in that state."""
+    global running, consumer_task
+    if flag == running:
+        return False
+    if flag:
+        logging.info("Launching consumer task")
+        consumer_task = asyncio.create_task(consume_signals())
+    else:
+        logging.info("Cancelling consumer task")
+        if consumer_task:
+            consumer_task.cancel()
+    running = flag
+    status_hub.notify()
+    return True
 
 @app.post("/start")
 async def start_agent():
-    """Start the AI agent consumer."""
-    global running, consumer_task
-    if running:
-        return {"status": "already running"}
-    logging.info("Received start command: launching consumer task")
-    consumer_task = asyncio.create_task(consume_signals())
-    running = True
-    return {"status": "started"}
+    """Start the AI agent consumer on every replica."""
+    started = set_running(True)
+    await cluster.put('running', True)
+    return {"status": "started" if started else "already running"}
 
 @app.post("/stop")
 async def stop_agent():
-    """Stop the signal consumer."""
-    global running, consumer_task
-    if running and consumer_task:
-        logging.info("Received stop command: cancelling consumer task")
-        consumer_task.cancel()
-        running = False
+    """Stop the signal consumer on every replica."""
+    set_running(False)
+    await cluster.put('running', False)
     return {"status": "stopped"}
 
+def current_status() -> dict:
+    """Agent status and running state, as served by /status and /stream."""
+    result = {"running": running, **status}
+    if decision_pool:
+        result["decision_pool"] = decision_pool.stats()
+    if database:
+        result["database"] = database.stats()
+    result["decision_cache"] = decision_cache.stats()
+    result["features"] = features.stats()
+    result["prefilter"] = prefilter.stats()
+    result["cluster"] = cluster.stats()
+    return result
+
+def apply_shared(key, value):
+    """Apply shared state changed by another replica (see cluster.Cluster)."""
+    if key == 'config':
+        config.update({k: v for k, v in value.items() if k in config})
+        prefilter.compile(config)
+        status_hub.notify()
+    elif key == 'running':
+        set_running(bool(value))
+
+# Replicas share config and the running flag through Postgres and elect a leader
+REPLICA_ID = os.getenv('BRAIN_REPLICA_ID') or socket.gethostname()
+cluster = Cluster(
+    os.getenv('DATABASE_URL'),
+    REPLICA_ID,
+    apply_shared,
+    status=current_status,
+    interval=float(os.getenv('CLUSTER_HEARTBEAT_SECONDS', '5')),
+)
+
+# Pushes status changes to /stream clients; see broadcast.StatusHub
+status_hub = StatusHub(
+    current_status,
+    interval=float(os.getenv('STATUS_STREAM_INTERVAL', '1.0')),
+    max_queue=int(os.getenv('STATUS_STREAM_QUEUE', '64')),
+)
+
 @app.get("/status")
 async def get_status():
     """Return current agent status and running state."""
-    return {"running": running, **status}
+    return {**current_status(), "stream": status_hub.stats()}
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process is up and its event loop is responsive."""
+    return {"status": "ok", "uptime_s": time.monotonic() - IMPORTED_AT}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: 200 once RabbitMQ and Postgres are connected, 503 until then."""
+    checks = readiness()
+    ready = all(checks.values())
+    return JSONResponse({"ready": ready, **checks, "ready_after_s": ready_after}, status_code=200 if ready else 503)
+
+@app.get("/features/{mint}")
+async def get_features(mint: str):
+    """Features tracked for a token mint."""
+    found = features.get(mint)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Mint not tracked")
+    return found
 
 @app.websocket("/stream")
 async def stream(ws: WebSocket):
-    """WebSocket endpoint for streaming real-time status."""
+    """WebSocket stream of status: a full snapshot on connect, then patches of changed fields."""
     await ws.accept()
-    while True:
-        await asyncio.sleep(1)
-        await ws.send_json({"status": status})
-    
+    queue = status_hub.subscribe()
+    disconnected = False
+
+    async def watch_disconnect():
+        nonlocal disconnected
+        try:
+            while True:
+                await ws.receive_text()
+        except WebSocketDisconnect:
+            disconnected = True
+            status_hub.unsubscribe(queue)
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        while True:
+            message = await queue.get()
+            if message is None:
+                break
+            await ws.send_text(message)
+        if not disconnected:
+            # Dropped as a slow consumer: ask the client to reconnect later
+            await ws.close(code=1013)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        watcher.cancel()
+        status_hub.unsubscribe(queue)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/config")
 async def get_config():
     """Get current AI agent configuration."""
@@ -139,18 +336,29 @@ async def update_config(cfg: ConfigModel):
             updated = True
     if not updated:
         raise HTTPException(status_code=400, detail="No valid config fields provided")
+    # Hot-reload the pre-model rules, here and on the other replicas
+    prefilter.compile(config)
+    status_hub.notify()
+    await cluster.put('config', config)
     return config
 
+def solana_address(phrase: str) -> str:
+    """Derive the first Solana account address of a BIP39 mnemonic."""
+    # Imported on first use: bip_utils is slow to load and only wallet endpoints need it
+    from bip_utils import Bip39SeedGenerator, Bip44, Bip44Coins, Bip44Changes
+    seed_bytes = Bip39SeedGenerator(phrase).Generate()
+    bip44_ctx = Bip44.FromSeed(seed_bytes, Bip44Coins.SOLANA).Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(0)
+    return bip44_ctx.PublicKey().ToAddress()
+
 @app.post("/wallet")
 async def create_wallet():
     """Generate a new Solana wallet (mnemonic & address)."""
+    from mnemonic import Mnemonic
     # Generate BIP39 mnemonic
     mnemo = Mnemonic("english")
     phrase = mnemo.generate(strength=128)
     # Derive seed and Solana key via BIP44
-    seed_bytes = Bip39SeedGenerator(phrase).Generate()
-    bip44_ctx = Bip44.FromSeed(seed_bytes, Bip44Coins.SOLANA).Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(0)
-    address = bip44_ctx.PublicKey().ToAddress()
+    address = solana_address(phrase)
     global saved_wallet
     saved_wallet = {"mnemonic": phrase, "address": address}
     return saved_wallet
@@ -176,9 +384,7 @@ async def import_wallet(w: WalletImportModel):
         # If spaces present, treat as BIP39 mnemonic
         if ' ' in val:
             try:
-                seed_bytes = Bip39SeedGenerator(val).Generate()
-                bip44_ctx = Bip44.FromSeed(seed_bytes, Bip44Coins.SOLANA).Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(0)
-                address = bip44_ctx.PublicKey().ToAddress()
+                address = solana_address(val)
                 saved_wallet = {"mnemonic": val, "address": address}
                 return saved_wallet
             except Exception as e:
@@ -203,92 +409,274 @@ async def get_wallet():
         return saved_wallet
     raise HTTPException(status_code=404, detail="No wallet generated or imported")
 
+# Windowing settings for batching raw signals before each decision
+WINDOW_SECONDS = float(os.getenv('WINDOW_SECONDS', '30'))
+WINDOW_SLIDE_SECONDS = float(os.getenv('WINDOW_SLIDE_SECONDS', '0')) or None
+WINDOW_MAX_EVENTS = int(os.getenv('WINDOW_MAX_EVENTS', '500'))
+WINDOW_ALLOWED_LATENESS = float(os.getenv('WINDOW_ALLOWED_LATENESS', '2'))
+WINDOW_TICK_SECONDS = float(os.getenv('WINDOW_TICK_SECONDS', '1'))
+# signals.raw is partitioned by mint across replicas; this replica's share of the hash ring
+SIGNALS_HASH_WEIGHT = os.getenv('SIGNALS_HASH_WEIGHT', '1')
+SIGNALS_QUEUE_EXPIRES_SECONDS = float(os.getenv('SIGNALS_QUEUE_EXPIRES_SECONDS', '600'))
+# Decision workers run separately from signal intake
+SIGNALS_PREFETCH = int(os.getenv('SIGNALS_PREFETCH', '500'))
+DECISION_WORKERS = int(os.getenv('DECISION_WORKERS', '4'))
+DECISION_MAX_PENDING = int(os.getenv('DECISION_MAX_PENDING', '16'))
+DECISION_TIMEOUT_SECONDS = float(os.getenv('DECISION_TIMEOUT_SECONDS', '60'))
+LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', '2'))
+LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '30'))
+# Approximate token budget for the events sent with each decision
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '3000'))
+# Identical prompts within the TTL reuse the previous decision
+decision_cache = DecisionCache(
+    ttl=float(os.getenv('DECISION_CACHE_TTL_SECONDS', '120')),
+    max_entries=int(os.getenv('DECISION_CACHE_SIZE', '256')),
+)
+llm_slots = None
+# Per-mint history across windows, fed from signals.raw
+features = FeatureStore(
+    capacity=int(os.getenv('FEATURE_STORE_SIZE', '50000')),
+    ttl=float(os.getenv('FEATURE_TTL_SECONDS', '21600')),
+    ewma_alpha=float(os.getenv('FEATURE_EWMA_ALPHA', '0.3')),
+    # Per replica: each holds only its own share of mints
+    path=os.getenv('FEATURE_SNAPSHOT_PATH', f'data/features-{REPLICA_ID}.bin'),
+)
+# Hard rules from config applied to candidates before the model
+prefilter = Prefilter(config, max_candidates=int(os.getenv('PREFILTER_MAX_CANDIDATES', '20')))
+FEATURE_SNAPSHOT_INTERVAL = float(os.getenv('FEATURE_SNAPSHOT_INTERVAL', '60'))
+
+async def snapshot_features():
+    """Periodically snapshot the feature store to disk."""
+    while True:
+        await asyncio.sleep(FEATURE_SNAPSHOT_INTERVAL)
+        features.evict_expired()
+        try:
+            features.save()
+        except OSError as e:
+            logging.error(f"Failed to save feature snapshot: {e}")
+
+async def declare_signals_queue(channel):
+    """Declare this replica's signals queue and bind it to the signals.raw and signals.broadcast exchanges."""
+    signals_exchange = await channel.declare_exchange('signals.raw', 'x-consistent-hash', durable=True)
+    broadcast_exchange = await channel.declare_exchange('signals.broadcast', aio_pika.ExchangeType.FANOUT,
+                                                        durable=True)
+    # The queue outlives restarts of this replica but is deleted once unused for the expiry,
+    # handing its mints back to the other replicas
+    queue = await channel.declare_queue(
+        f'signals.raw.{REPLICA_ID}',
+        durable=True,
+        arguments={'x-expires': int(SIGNALS_QUEUE_EXPIRES_SECONDS * 1000)},
+    )
+    await queue.bind(signals_exchange, routing_key=SIGNALS_HASH_WEIGHT)
+    await queue.bind(broadcast_exchange)
+    return queue
+
+async def keep_signals_queue():
+    """Re-declare the signals queue while this process lives, so it does not expire while stopped.
+
+    Redeclaring resets the queue's expiry; only once the replica is gone
+    does the queue expire and its mints move to the other replicas.
+    """
+    while True:
+        await asyncio.sleep(SIGNALS_QUEUE_EXPIRES_SECONDS / 3)
+        try:
+            await declare_signals_queue(rabbit_channel)
+        except Exception as e:
+            logging.error(f"Failed to refresh signals.raw.{REPLICA_ID}: {e!r}")
+
 async def consume_signals():
-    """Consume signals.raw, batch events, call OpenAI, store & publish decisions."""
-    global db_conn, rabbit_channel, status
-    # Setup OpenAI API key
-    openai.api_key = os.getenv('OPENAI_API_KEY')
-    # Ensure the raw signals queue is declared
-    queue = await rabbit_channel.declare_queue('signals.raw', durable=True)
-    buffer = []
-    window_start = None
-
-    async with queue.iterator() as it:
-        async for message in it:
-            async with message.process():
-                try:
-                    data = json.loads(message.body)
-                    logging.info(f"Consumed raw signal: {data.get('type')}")
-                except json.JSONDecodeError:
-                    logging.error("Invalid JSON in signal")
-                    continue
-                now = datetime.utcnow()
-                if window_start is None:
-                    window_start = now
-                buffer.append(data)
-                # If 30s window passed, process batch
-                if (now - window_start).total_seconds() >= 30:
-                    # Build prompt
-                    pumpfun_events = [e['data'] for e in buffer if e.get('type') == 'pumpfun']
-                    raydium_pools = [e['data'] for e in buffer if e.get('type') == 'raydium']
-                    twitter_stats = [e['data'] for e in buffer if e.get('type') == 'twitter']
-                    prompt = {
-                        'portfolio': status,
-                        'pumpfun_events': pumpfun_events,
-                        'raydium_pools': raydium_pools,
-                        'twitter_stats': twitter_stats,
-                        'constraints': config
-                    }
-                    # Call OpenAI
-                    try:
-                        response = await openai.ChatCompletion.acreate(
-                            model='gpt-4o',
-                            messages=[
-                                {'role': 'system', 'content': 'You are an AI trading agent on Solana.'},
-                                {'role': 'user', 'content': json.dumps(prompt)}
-                            ],
-                            functions=[{
-                                'name': 'make_trade',
-                                'description': 'Execute trade decision',
-                                'parameters': {
-                                    'type': 'object',
-                                    'properties': {
-                                        'action': {'type': 'string', 'enum': ['BUY', 'SELL', 'HOLD']},
-                                        'token_mint': {'type': 'string'},
-                                        'amount_sol': {'type': 'number'},
-                                        'reason': {'type': 'string'}
-                                    },
-                                    'required': ['action', 'token_mint', 'amount_sol', 'reason']
-                                }
-                            }],
-                            function_call={'name': 'make_trade'}
-                        )
-                        choice = response.choices[0].message
-                        if choice.function_call:
-                            args = json.loads(choice.function_call.arguments)
-                            decision = args
-                        else:
-                            decision = {'action': 'HOLD', 'token_mint': '', 'amount_sol': 0, 'reason': 'No action'}
-                    except Exception as e:
-                        logging.error(f"OpenAI call failed: {e}")
-                        decision = {'action': 'HOLD', 'token_mint': '', 'amount_sol': 0, 'reason': 'Error'}
-                    # Save decision to DB
+    """Consume signals.raw, group events into windows and hand closed windows to the decision pool.
+
+    Each replica consumes its own queue, bound to the consistent-hash
+    signals.raw exchange (its share of mints) and to the signals.broadcast
+    fanout (signals every replica needs), so windows only hold this
+    replica's mints. Messages are acked as soon as they are windowed; the
+    model is only ever called from the decision workers, so intake never
+    waits on it.
+    """
+    global decision_pool, llm_slots
+    # Usually already loaded and connected in the background since startup
+    await load_clients()
+    if rabbit_channel is None:
+        await asyncio.shield(rabbit_task)
+    # Bound unacked deliveries; the queue was declared and bound at connect time
+    await rabbit_channel.set_qos(prefetch_count=SIGNALS_PREFETCH)
+    queue = await declare_signals_queue(rabbit_channel)
+    llm_slots = asyncio.Semaphore(LLM_MAX_IN_FLIGHT)
+    decision_pool = DecisionPool(
+        process_window,
+        workers=DECISION_WORKERS,
+        max_pending=DECISION_MAX_PENDING,
+        timeout=DECISION_TIMEOUT_SECONDS,
+    )
+    decision_pool.start()
+
+    async def submit(window):
+        decision_pool.submit(window)
+
+    engine = WindowEngine(
+        size=WINDOW_SECONDS,
+        slide=WINDOW_SLIDE_SECONDS,
+        max_events=WINDOW_MAX_EVENTS,
+        allowed_lateness=WINDOW_ALLOWED_LATENESS,
+    )
+    # Close windows on time even when no new signals arrive
+    timer = asyncio.create_task(engine.run(submit, tick=WINDOW_TICK_SECONDS))
+    try:
+        async with queue.iterator() as it:
+            async for message in it:
+                async with message.process():
                     try:
-                        with db_conn.cursor() as cur:
-                            cur.execute(
-                                "INSERT INTO signals_decoded(decision) VALUES (%s)",
-                                (json.dumps(decision),)
-                            )
-                        db_conn.commit()
-                    except Exception as e:
-                        logging.error(f"Failed to save decoded signal: {e}")
-                    # Publish to decoded queue
-                    msg = aio_pika.Message(body=json.dumps(decision).encode())
-                    await rabbit_channel.default_exchange.publish(msg, routing_key='signals.decoded')
-                    logging.info(f"Published decision: {decision}")
-                    # Reset buffer
-                    buffer = []
-                    window_start = None
+                        data = decode(message.body, message.content_type)
+                        logging.debug(f"Consumed raw signal: {data.get('type')}")
+                    except ValueError:
+                        logging.error(f"Invalid {message.content_type or 'JSON'} body in signal")
+                        continue
+                    metrics.SIGNALS.labels(data.get('type')).inc()
+                    database.save_signal(data)
+                    features.update(data)
+                    metrics.SIGNAL_STAGE_SECONDS.labels('consumed').observe(mark(data, 'consumed'))
+                    published = stage_time(data, 'published')
+                    if published is not None:
+                        metrics.QUEUE_LAG_SECONDS.observe(stage_time(data, 'consumed') - published)
+                    for window in engine.add(data):
+                        decision_pool.submit(window)
+    finally:
+        timer.cancel()
+        await decision_pool.stop()
+
+# Function-calling schema the model must answer with
+TRADE_FUNCTION = {
+    'name': 'make_trade',
+    'description': 'Execute trade decision',
+    'parameters': {
+        'type': 'object',
+        'properties': {
+            'action': {'type': 'string', 'enum': ['BUY', 'SELL', 'HOLD']},
+            'token_mint': {'type': 'string'},
+            'amount_sol': {'type': 'number'},
+            'reason': {'type': 'string'}
+        },
+        'required': ['action', 'token_mint', 'amount_sol', 'reason']
+    }
+}
+
+async def call_model(prompt: dict) -> dict:
+    """Ask OpenAI for a trade decision, capping concurrent requests."""
+    async with llm_slots:
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = await asyncio.wait_for(
+                openai.ChatCompletion.acreate(
+                    model='gpt-4o',
+                    messages=[
+                        {'role': 'system', 'content': 'You are an AI trading agent on Solana.'},
+                        {'role': 'user', 'content': dumps(prompt)}
+                    ],
+                    functions=[TRADE_FUNCTION],
+                    function_call={'name': 'make_trade'}
+                ),
+                LLM_TIMEOUT_SECONDS,
+            )
+            outcome = 'ok'
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            raise
+        finally:
+            metrics.LLM_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+    choice = response.choices[0].message
+    if choice.function_call:
+        return json.loads(choice.function_call.arguments)
+    return {'action': 'HOLD', 'token_mint': '', 'amount_sol': 0, 'reason': 'No action'}
+
+def prompt_mints(prompt: dict) -> set:
+    """Mints with events in the prompt's window, i.e. in this replica's partition."""
+    return {event.get('mint') for key in ('pumpfun_events', 'raydium_pools') for event in prompt[key]} - {None}
+
+async def decide(prompt: dict, model=None) -> dict:
+    """Return a decision for the prompt, skipping the model when possible.
+
+    Windows with no Pump.fun or Raydium candidate left after the prefilter
+    get HOLD directly, unless this replica is the leader and there are open
+    positions to review; otherwise identical prompts are served from the
+    cache and concurrent identical requests share one model call. The
+    model's answer is checked against the prefilter rules. A replica may
+    SELL mints in its own partition (those with events in this window);
+    SELLs of other mints are left to the leader, which reviews every open
+    position, so two replicas do not act on the same mint.
+    `model` replaces `call_model`, e.g. with a local stub for replays.
+    """
+    model = model or call_model
+    review_positions = cluster.is_leader and prompt['portfolio']['positions']
+    if not prompt['pumpfun_events'] and not prompt['raydium_pools'] and not review_positions:
+        decision_cache.counters['short_circuits'] += 1
+        return {'action': 'HOLD', 'token_mint': '', 'amount_sol': 0, 'reason': 'No actionable events'}
+    try:
+        decision, source = await decision_cache.get_or_compute(prompt_key(prompt), lambda: model(prompt))
+        logging.info(f"Decision source: {source}")
+        if decision.get('action') == 'SELL' and not cluster.is_leader and \
+                decision.get('token_mint') not in prompt_mints(prompt):
+            metrics.SELLS_DEFERRED.inc()
+            logging.warning(f"SELL of {decision.get('token_mint')} left to the leader: not in this replica's partition")
+            return {'action': 'HOLD', 'token_mint': '', 'amount_sol': 0, 'reason': 'SELL left to the leader'}
+        return prefilter.check(decision)
+    except Exception as e:
+        logging.error(f"OpenAI call failed: {e!r}")
+        return {'action': 'HOLD', 'token_mint': '', 'amount_sol': 0, 'reason': 'Error'}
+
+async def evaluate_window(window, model=None):
+    """Build the prompt for a closed window and decide on it.
+
+    Returns `(decision, report)`; the report holds the prompt size and the
+    time spent building the prompt and deciding.
+    """
+    started = time.perf_counter()
+    # Build a compact, budgeted prompt from the window's events
+    prompt, report = build_prompt(
+        {signal_type: window.data(signal_type) for signal_type in window.events},
+        status,
+        config,
+        token_budget=PROMPT_TOKEN_BUDGET,
+        features=features,
+        prefilter=prefilter,
+    )
+    built = time.perf_counter()
+    decision = await decide(prompt, model=model)
+    report['prompt_ms'] = (built - started) * 1000
+    report['decide_ms'] = (time.perf_counter() - built) * 1000
+    return decision, report
+
+async def process_window(window):
+    """Decide on a closed window, store & publish the decision."""
+    logging.info(f"Processing {window}")
+    trace = window_trace(window)
+    stages = trace['stages']
+    stages['decide_started'] = time.time()
+    metrics.WINDOW_EVENTS.observe(window.count)
+    metrics.WINDOW_WAIT_SECONDS.observe(stages['decide_started'] - window.closed_at)
+    decision, report = await evaluate_window(window)
+    stages['decided'] = time.time()
+    metrics.DECISION_STAGE_SECONDS.labels('prompt').observe(report['prompt_ms'] / 1000)
+    metrics.DECISION_STAGE_SECONDS.labels('decide').observe(report['decide_ms'] / 1000)
+    status['last_prompt'] = report
+    status_hub.notify()
+    logging.info(f"Prompt for window {window.start}: {report}")
+    decision['trace'] = trace
+    # Publish to decoded queue; the message carries the stages up to publish_started
+    stages['publish_started'] = time.time()
+    msg = aio_pika.Message(body=json.dumps(decision).encode(), correlation_id=trace['id'])
+    try:
+        await rabbit_channel.default_exchange.publish(msg, routing_key='signals.decoded')
+        stages['published'] = time.time()
+    finally:
+        # Queue the decision for the batched DB writer, which records its db_write stage
+        database.save_decision(decision)
+    metrics.DECISION_STAGE_SECONDS.labels('publish').observe(stages['published'] - stages['publish_started'])
+    if 'first_ingest' in stages:
+        metrics.DECISION_STAGE_SECONDS.labels('end_to_end').observe(stages['published'] - stages['first_ingest'])
+    metrics.DECISIONS.labels(decision.get('action')).inc()
+    logging.info(f"Published decision {trace['id']}: {decision['action']} {decision.get('token_mint')}")
 
 def run_consumer():
     asyncio.run(consume_signals())
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+
+
+def diff(old: dict, new: dict) -> dict:
+    """JSON Merge Patch (RFC 7386) turning `old` into `new`.
+
+    Changed or added keys carry their new value, nested dicts are diffed
+    recursively and removed keys are set to None. Lists are replaced whole.
+    """
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+            continue
+        previous = old[key]
+        if isinstance(previous, dict) and isinstance(value, dict):
+            nested = diff(previous, value)
+            if nested:
+                patch[key] = nested
+        elif previous != value:
+            patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+
+class StatusHub:
+    """Single-producer fan-out of status changes to stream subscribers.
+
+    One producer task builds the status with `snapshot()` when `notify()` is
+    called, or every `interval` seconds to pick up counters, and only while
+    someone is subscribed. Each change is encoded once as a merge patch and
+    put on every subscriber's bounded queue; a subscriber whose queue is full
+    is dropped rather than slowing down the producer or the other clients.
+    New subscribers first receive a full snapshot.
+    """
+
+    def __init__(self, snapshot, interval=1.0, max_queue=64):
+        self.snapshot = snapshot
+        self.interval = interval
+        self.max_queue = max_queue
+        self.state = None
+        self.seq = 0
+        self._subscribers = set()
+        self._changed = None
+        self._task = None
+        self._stopping = False
+        self.counters = {'published': 0, 'messages': 0, 'bytes': 0, 'dropped_clients': 0}
+
+    def start(self):
+        self._stopping = False
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # The producer exits on the flag; the cancel only interrupts a publish in progress
+            self._stopping = True
+            self._changed.set()
+            self._task.cancel()
+            await asyncio.wait({self._task}, timeout=5)
+            self._task = None
+        for queue in list(self._subscribers):
+            self.unsubscribe(queue)
+
+    def notify(self):
+        """Ask the producer to publish now instead of at the next interval."""
+        if self._changed is not None:
+            self._changed.set()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber; its queue starts with a full snapshot.
+
+        The queue yields encoded JSON messages and None once the subscriber
+        has been dropped or unsubscribed.
+        """
+        self.publish()
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        self._send(queue, self._encode('snapshot', self.state))
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber and wake its reader with None."""
+        if queue not in self._subscribers:
+            return
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def publish(self) -> bool:
+        """Diff the current status against the last published one and fan out the patch."""
+        # Round-trip through JSON so the kept state is a deep, JSON-normalized copy
+        current = json.loads(json.dumps(self.snapshot(), default=str))
+        if self.state is None:
+            self.state = current
+            return False
+        patch = diff(self.state, current)
+        if not patch:
+            return False
+        self.state = current
+        self.seq += 1
+        self.counters['published'] += 1
+        message = self._encode('patch', patch)
+        for queue in list(self._subscribers):
+            if queue.full():
+                self.counters['dropped_clients'] += 1
+                logging.warning("Status stream subscriber too slow, dropping it")
+                self.unsubscribe(queue)
+                continue
+            self._send(queue, message)
+        return True
+
+    def stats(self) -> dict:
+        return {**self.counters, 'subscribers': len(self._subscribers), 'seq': self.seq}
+
+    def _encode(self, kind, data):
+        return json.dumps({'type': kind, 'seq': self.seq, 'data': data}, separators=(',', ':'))
+
+    def _send(self, queue, message):
+        queue.put_nowait(message)
+        self.counters['messages'] += 1
+        self.counters['bytes'] += len(message)
+
+    async def _run(self):
+        # Checks the stop flag rather than relying on cancellation, which wait_for
+        # can swallow before Python 3.12 when the event is set in the same tick
+        while not self._stopping:
+            changed = asyncio.ensure_future(self._changed.wait())
+            try:
+                await asyncio.wait({changed}, timeout=self.interval)
+            finally:
+                changed.cancel()
+            self._changed.clear()
+            if self._stopping or not self._subscribers:
+                continue
+            try:
+                self.publish()
+            except Exception as e:
+                logging.error(f"Failed to publish status: {e!r}")
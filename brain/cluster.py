@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import random
+
+from db import init_connection
+
+# Session advisory lock held by the leader replica
+LEADER_LOCK_KEY = 0x627261696e  # b'brain'
+NOTIFY_CHANNEL = 'brain_shared'
+
+
+def _jsonable(value):
+    return json.loads(json.dumps(value, default=str))
+
+
+class Cluster:
+    """Shared state and leader election for brain replicas, backed by Postgres.
+
+    State every replica must agree on (config, running) lives in the
+    brain_shared table. `put` writes it and NOTIFYs the other replicas,
+    which apply it through `on_change(key, value)`; on (re)connect the whole
+    table is applied. Every `interval` seconds each replica heartbeats its
+    `status()` into brain_replicas and reads back the live replicas.
+
+    The replica holding a session-level advisory lock is the leader. The
+    lock goes away with its connection, so when the leader dies another
+    replica takes over within `interval` seconds.
+    """
+
+    def __init__(self, dsn, replica_id, on_change, status=lambda: {}, interval=5.0):
+        self.dsn = dsn
+        self.replica_id = replica_id
+        self.on_change = on_change
+        self.status = status
+        self.interval = interval
+        self.is_leader = False
+        self.replicas = []
+        self.last_error = None
+        self._conn = None
+        self._lock = None
+        self._task = None
+        self.counters = {'heartbeats': 0, 'notifications': 0, 'elections_won': 0, 'reconnects': 0}
+
+    def start(self):
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._disconnect()
+
+    async def put(self, key: str, value) -> bool:
+        """Store shared state and notify the other replicas; False if Postgres is unavailable."""
+        if self._conn is None:
+            logging.warning(f"Shared state store unavailable; {key} only changed on this replica")
+            return False
+        value = _jsonable(value)
+        payload = json.dumps({'key': key, 'value': value, 'replica': self.replica_id})
+        try:
+            async with self._lock, self._conn.transaction():
+                await self._conn.execute(
+                    "INSERT INTO brain_shared (key, value, updated_by) VALUES ($1, $2, $3) "
+                    "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_by = EXCLUDED.updated_by, "
+                    "updated_at = NOW()",
+                    key, value, self.replica_id)
+                await self._conn.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, payload)
+        except Exception as e:
+            self.last_error = repr(e)
+            logging.error(f"Failed to store shared {key}: {e!r}")
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            'replica_id': self.replica_id,
+            'leader': self.is_leader,
+            'connected': self._conn is not None,
+            'replicas': self.replicas,
+            'last_error': self.last_error,
+        }
+
+    async def _run(self):
+        delay = 0.5
+        while True:
+            try:
+                await self._connect()
+                delay = 0.5
+                while True:
+                    await self._tick()
+                    await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = repr(e)
+                logging.error(f"Cluster connection lost, retrying in {delay:.1f}s: {e!r}")
+                await self._disconnect()
+                self.counters['reconnects'] += 1
+                await asyncio.sleep(delay * (0.5 + random.random()))
+                delay = min(delay * 2, 30.0)
+
+    async def _open(self):
+        import asyncpg
+        conn = await asyncpg.connect(self.dsn)
+        await init_connection(conn)
+        return conn
+
+    async def _connect(self):
+        conn = await self._open()
+        await conn.add_listener(NOTIFY_CHANNEL, self._notified)
+        self._conn = conn
+        async with self._lock:
+            rows = await conn.fetch("SELECT key, value FROM brain_shared")
+        for key, value in rows:
+            self._apply(key, value)
+        logging.info(f"Replica {self.replica_id} joined the cluster")
+
+    async def _disconnect(self):
+        conn, self._conn = self._conn, None
+        self.is_leader = False
+        if conn is not None:
+            try:
+                await asyncio.wait_for(conn.close(), 5)
+            except Exception:
+                conn.terminate()
+
+    async def _tick(self):
+        async with self._lock:
+            if not self.is_leader and await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", LEADER_LOCK_KEY):
+                self.is_leader = True
+                self.counters['elections_won'] += 1
+                logging.info(f"Replica {self.replica_id} is now the leader")
+            await self._conn.execute(
+                "INSERT INTO brain_replicas (replica_id, is_leader, status, heartbeat_at) VALUES ($1, $2, $3, NOW()) "
+                "ON CONFLICT (replica_id) DO UPDATE SET is_leader = EXCLUDED.is_leader, status = EXCLUDED.status, "
+                "heartbeat_at = NOW()",
+                self.replica_id, self.is_leader, _jsonable(self.status()))
+            rows = await self._conn.fetch(
+                "SELECT replica_id, is_leader, EXTRACT(EPOCH FROM NOW() - heartbeat_at)::float8 AS age "
+                "FROM brain_replicas WHERE heartbeat_at > NOW() - make_interval(secs => $1) ORDER BY replica_id",
+                self.interval * 3)
+            if self.is_leader:
+                await self._conn.execute("DELETE FROM brain_replicas WHERE heartbeat_at < NOW() - interval '1 day'")
+        self.replicas = [{'replica_id': r['replica_id'], 'leader': r['is_leader'], 'heartbeat_age_s': r['age']}
+                         for r in rows]
+        self.counters['heartbeats'] += 1
+
+    def _notified(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logging.error(f"Invalid {channel} notification: {payload!r}")
+            return
+        self.counters['notifications'] += 1
+        if message.get('replica') != self.replica_id:
+            self._apply(message['key'], message['value'])
+
+    def _apply(self, key, value):
+        try:
+            self.on_change(key, value)
+        except Exception as e:
+            logging.error(f"Failed to apply shared {key}: {e!r}")
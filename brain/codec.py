@@ -0,0 +1,25 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+
+
+def decode(body: bytes, content_type: str = None):
+    """Decode a signals.raw body according to its content type (JSON if unset)."""
+    if content_type == MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack message received but msgpack is not installed")
+        return msgpack.unpackb(body)
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
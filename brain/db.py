@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+import metrics
+from tracing import stage_time
+
+# Tables brain writes to and their single JSONB column
+TABLES = {
+    'signals_raw': 'signal',
+    'signals_decoded': 'decision',
+}
+
+
+async def init_connection(conn):
+    # Exchange JSONB as Python objects instead of strings
+    await conn.set_type_codec('jsonb', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+
+class Database:
+    """Async Postgres access for brain: pooled, self-healing and batched.
+
+    The pool is opened in the background and re-opened with jittered backoff
+    whenever it is lost, so callers never wait on Postgres. Rows saved with
+    `save_signal`/`save_decision` are buffered per table (bounded, oldest
+    dropped first) and written by a background task as a pipelined batch of
+    prepared INSERTs every `flush_interval` seconds or `batch_size` rows.
+    Traced rows get a `db_queued` stage when saved, and the time until their
+    batch is written is recorded as their `db_write` stage.
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=5, batch_size=200, flush_interval=0.5, max_pending=10000,
+                 health_interval=15.0):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.health_interval = health_interval
+        self.pool = None
+        # Errors that mean a row itself is bad (it is dropped); asyncpg's are added once it is imported.
+        # Any other write error requeues the rows and reopens the pool.
+        self.row_errors = (TypeError, ValueError)
+        self.healthy = False
+        self.last_error = None
+        self._pending = {table: [] for table in TABLES}
+        self._wakeup = None
+        self._flush_now = None
+        self._connected = None
+        self._tasks = []
+        self._closing = False
+        self.counters = {'rows_written': 0, 'batches': 0, 'dropped': 0, 'rejected': 0, 'errors': 0,
+                         'reconnects': 0}
+
+    def start(self):
+        """Start connecting, flushing and health checking in the background."""
+        self._wakeup = asyncio.Event()
+        self._flush_now = asyncio.Event()
+        self._connected = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._connect_loop()),
+            asyncio.create_task(self._flush_loop()),
+            asyncio.create_task(self._health_loop()),
+        ]
+
+    async def wait_connected(self, timeout=None):
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    async def _open_pool(self):
+        # Imported here, in the background connect loop, to keep brain's startup fast
+        import asyncpg
+        self.row_errors = (TypeError, ValueError, asyncpg.exceptions.DataError,
+                           asyncpg.exceptions.IntegrityConstraintViolationError)
+        return await asyncpg.create_pool(self.dsn, min_size=self.min_size, max_size=self.max_size,
+                                         init=init_connection)
+
+    async def _connect_loop(self):
+        delay = 0.5
+        while not self._closing:
+            if self.pool is None:
+                try:
+                    self.pool = await self._open_pool()
+                    self.healthy = True
+                    self._connected.set()
+                    delay = 0.5
+                    logging.info("Connected to Postgres")
+                except Exception as e:
+                    self.last_error = repr(e)
+                    logging.error(f"Postgres connection failed, retrying in {delay:.1f}s: {e!r}")
+                    await asyncio.sleep(delay * (0.5 + random.random()))
+                    delay = min(delay * 2, 30.0)
+                    continue
+            # Sleep until a health check asks for a reconnect
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+    async def _health_loop(self):
+        while not self._closing:
+            await asyncio.sleep(self.health_interval)
+            if self.pool is None:
+                continue
+            try:
+                await asyncio.wait_for(self.pool.fetchval('SELECT 1'), self.health_interval)
+                self.healthy = True
+            except Exception as e:
+                self.healthy = False
+                self.last_error = repr(e)
+                logging.error(f"Postgres health check failed, reconnecting: {e!r}")
+                await self._reset_pool()
+
+    async def _reset_pool(self):
+        pool, self.pool = self.pool, None
+        self._connected.clear()
+        self.counters['reconnects'] += 1
+        if pool is not None:
+            pool.terminate()
+        self._wakeup.set()
+
+    def save_signal(self, signal: dict):
+        self._enqueue('signals_raw', signal)
+
+    def save_decision(self, decision: dict):
+        self._enqueue('signals_decoded', decision)
+
+    def _enqueue(self, table, row):
+        trace = row.get('trace')
+        if isinstance(trace, dict):
+            trace.setdefault('stages', {})['db_queued'] = time.time()
+        pending = self._pending[table]
+        pending.append(row)
+        if len(pending) > self.max_pending:
+            del pending[0]
+            self.counters['dropped'] += 1
+        if len(pending) >= self.batch_size and self._flush_now is not None:
+            self._flush_now.set()
+
+    async def _flush_loop(self):
+        # Stops on the closing flag: before Python 3.12, wait_for can swallow a
+        # cancel that races with the event being set
+        while not self._closing:
+            wakeup = asyncio.ensure_future(self._flush_now.wait())
+            try:
+                await asyncio.wait({wakeup}, timeout=self.flush_interval)
+            finally:
+                wakeup.cancel()
+            self._flush_now.clear()
+            if self._closing:
+                return
+            await self.flush()
+
+    async def flush(self):
+        """Write all buffered rows.
+
+        A batch refused because of its data (`row_errors`, e.g. a DataError
+        or a NUL character jsonb will not take) is split in halves until the
+        offending rows are isolated; those are dropped and counted as
+        rejected, so one bad row never blocks the table. On any other error
+        the unwritten rows are kept for the next attempt and the pool is
+        reopened.
+        """
+        if self.pool is None:
+            return
+        for table, pending in self._pending.items():
+            while pending:
+                rows = pending[:self.batch_size]
+                del pending[:self.batch_size]
+                if not await self._write(table, rows, pending):
+                    await self._reset_pool()
+                    return
+
+    async def _write(self, table, rows, pending) -> bool:
+        """Insert `rows`, isolating rejected rows; False (rows requeued) on any other error."""
+        chunks = [rows]
+        while chunks:
+            chunk = chunks.pop()
+            started = time.perf_counter()
+            try:
+                await self._insert(table, chunk)
+            except Exception as e:
+                self.counters['errors'] += 1
+                self.last_error = repr(e)
+                if not isinstance(e, self.row_errors):
+                    logging.error(f"Failed to write {len(chunk)} rows to {table}: {e!r}")
+                    # Put back everything not yet written, in order
+                    pending[:0] = chunk + [row for rest in reversed(chunks) for row in rest]
+                    return False
+                if len(chunk) == 1:
+                    self.counters['rejected'] += 1
+                    metrics.DB_REJECTED_ROWS.labels(table).inc()
+                    logging.error(f"Dropping row rejected by {table}: {e!r}")
+                    continue
+                half = len(chunk) // 2
+                chunks.append(chunk[half:])
+                chunks.append(chunk[:half])
+                continue
+            metrics.DB_FLUSH_SECONDS.labels(table).observe(time.perf_counter() - started)
+            metrics.DB_BATCH_ROWS.labels(table).observe(len(chunk))
+            self._observe_written(table, chunk)
+            self.counters['rows_written'] += len(chunk)
+            self.counters['batches'] += 1
+        return True
+
+    @staticmethod
+    def _observe_written(table, rows):
+        stage = metrics.DB_WRITE_STAGES[table]
+        written = time.time()
+        for row in rows:
+            queued = stage_time(row, 'db_queued')
+            if queued is not None:
+                stage.observe(written - queued)
+
+    async def _insert(self, table, rows):
+        column = TABLES[table]
+        async with self.pool.acquire() as conn:
+            # executemany reuses the connection's cached prepared statement and pipelines the batch
+            await conn.executemany(f"INSERT INTO {table}({column}) VALUES ($1)", [(row,) for row in rows])
+
+    async def close(self):
+        self._closing = True
+        if self._flush_now is not None:
+            self._flush_now.set()
+        # The flush loop finishes the batch it is writing and stops; the others are cancelled
+        flush_loop = self._tasks[1] if self._tasks else None
+        for task in self._tasks:
+            if task is not flush_loop:
+                task.cancel()
+        if self._tasks:
+            _, stuck = await asyncio.wait(self._tasks, timeout=5)
+            for task in stuck:
+                task.cancel()
+        self._tasks = []
+        try:
+            await asyncio.wait_for(self.flush(), 5)
+        except Exception as e:
+            logging.error(f"Final DB flush failed: {e!r}")
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            'connected': self.pool is not None,
+            'healthy': self.healthy,
+            'pending': {table: len(rows) for table, rows in self._pending.items()},
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+
+from prompt import dumps
+
+
+def prompt_key(prompt: dict) -> str:
+    """Canonical hash of a compacted prompt."""
+    return hashlib.sha256(dumps(prompt).encode()).hexdigest()
+
+
+class DecisionCache:
+    """TTL + LRU cache of model decisions with request coalescing.
+
+    Concurrent lookups for the same key share a single in-flight computation.
+    Failed computations are not cached; the exception reaches every waiter.
+    """
+
+    def __init__(self, ttl=120.0, max_entries=256, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self.counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'short_circuits': 0}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return dict(value)
+
+    def put(self, key, value: dict):
+        self._entries[key] = (self.clock() + self.ttl, dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    async def get_or_compute(self, key, compute):
+        """Return `(value, source)` where source is 'hit', 'coalesced' or 'miss'.
+
+        `compute` is a zero-argument coroutine function, awaited only on a miss.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.counters['hits'] += 1
+            return value, 'hit'
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.counters['coalesced'] += 1
+            return dict(await asyncio.shield(task)), 'coalesced'
+        self.counters['misses'] += 1
+        task = asyncio.ensure_future(compute())
+        self._in_flight[key] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            self._in_flight.pop(key, None)
+        self.put(key, value)
+        return dict(value), 'miss'
+
+    def stats(self) -> dict:
+        lookups = self.counters['hits'] + self.counters['misses'] + self.counters['coalesced']
+        return {
+            **self.counters,
+            'entries': len(self._entries),
+            'in_flight': len(self._in_flight),
+            'hit_rate': (self.counters['hits'] + self.counters['coalesced']) / lookups if lookups else 0.0,
+        }
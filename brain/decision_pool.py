@@ -0,0 +1,70 @@
+import asyncio
+import logging
+
+
+class DecisionPool:
+    """Bounded pool of async workers that turn closed windows into decisions.
+
+    `submit` never blocks the caller: windows wait in a bounded queue and, when
+    it is full, the oldest pending window is dropped in favour of the newest.
+    Each handler call is cut off after `timeout` seconds.
+    """
+
+    def __init__(self, handler, workers=4, max_pending=16, timeout=60.0):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.queue = None
+        self._tasks = []
+        self.in_flight = 0
+        self.counters = {'submitted': 0, 'completed': 0, 'dropped': 0, 'timeouts': 0, 'errors': 0}
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    def submit(self, item) -> bool:
+        """Queue an item without waiting; returns False if an older item was dropped to make room."""
+        self.counters['submitted'] += 1
+        dropped = False
+        if self.queue.full():
+            stale = self.queue.get_nowait()
+            self.queue.task_done()
+            self.counters['dropped'] += 1
+            dropped = True
+            logging.warning(f"Decision queue full, dropping {stale}")
+        self.queue.put_nowait(item)
+        return not dropped
+
+    async def stop(self):
+        """Cancel the workers; pending items are discarded."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            'pending': self.queue.qsize() if self.queue is not None else 0,
+            'in_flight': self.in_flight,
+            'workers': len(self._tasks),
+        }
+
+    async def _worker(self, index):
+        while True:
+            item = await self.queue.get()
+            self.in_flight += 1
+            try:
+                await asyncio.wait_for(self.handler(item), self.timeout)
+                self.counters['completed'] += 1
+            except asyncio.TimeoutError:
+                self.counters['timeouts'] += 1
+                logging.error(f"Decision worker {index} timed out after {self.timeout}s on {item}")
+            except Exception as e:
+                self.counters['errors'] += 1
+                logging.error(f"Decision worker {index} failed on {item}: {e}")
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
@@ -0,0 +1,263 @@
+import json
+import logging
+import math
+import os
+import time
+from array import array
+from collections import OrderedDict
+
+from prompt import compact_pumpfun, compact_raydium, compact_twitter
+
+NAN = float('nan')
+
+# Per-mint feature columns and their array typecodes; one slot per tracked mint
+COLUMNS = {
+    'first_seen': 'd',
+    'last_seen': 'd',
+    'pumpfun_events': 'q',
+    'raydium_events': 'q',
+    'mentions': 'q',
+    'market_cap_first': 'd',
+    'market_cap': 'd',
+    'liquidity': 'd',
+    'liquidity_prev': 'd',
+    'liquidity_ewma': 'd',
+    'sentiment_ewma': 'd',
+}
+
+SNAPSHOT_VERSION = 1
+
+
+def _value(x):
+    return None if isinstance(x, float) and math.isnan(x) else x
+
+
+def _change(current, base):
+    if math.isnan(current) or math.isnan(base) or not base:
+        return None
+    return current / base - 1
+
+
+class FeatureStore:
+    """Bounded per-mint features, updated incrementally from signals.raw.
+
+    Features live in fixed-capacity typed arrays (one per column in
+    COLUMNS) indexed by a slot per mint, so an update or lookup is O(1) and
+    memory does not grow past `capacity`. Mints unseen for `ttl` seconds and,
+    when full, the least recently updated mint are evicted. Twitter keywords
+    are attributed to a mint when they match its address or symbol. `save`
+    and `load` snapshot the arrays to `path` for a fast restart.
+    """
+
+    def __init__(self, capacity=50000, ttl=6 * 3600, ewma_alpha=0.3, path=None, clock=time.time):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.ewma_alpha = ewma_alpha
+        self.path = path
+        self.clock = clock
+        self.columns = {name: self._empty(code) for name, code in COLUMNS.items()}
+        # mint -> slot, least recently updated first
+        self._slots = OrderedDict()
+        self._free = list(range(capacity - 1, -1, -1))
+        self._slot_symbol = [None] * capacity
+        self._symbols = {}
+        self.counters = {'updates': 0, 'evicted_ttl': 0, 'evicted_lru': 0, 'unmatched_keywords': 0}
+
+    def _empty(self, code):
+        return array(code, [NAN if code == 'd' else 0]) * self.capacity
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, mint):
+        return mint in self._slots
+
+    def update(self, signal: dict):
+        """Fold one signals.raw message into the features of its mint."""
+        data = signal.get('data')
+        if not isinstance(data, dict):
+            return
+        now = signal.get('ts') or self.clock()
+        kind = signal.get('type')
+        if kind == 'pumpfun':
+            event = compact_pumpfun(data)
+            slot = self._touch(event.get('mint'), now)
+            if slot is None:
+                return
+            self.columns['pumpfun_events'][slot] += 1
+            market_cap = event.get('market_cap_sol')
+            if market_cap is not None:
+                if math.isnan(self.columns['market_cap_first'][slot]):
+                    self.columns['market_cap_first'][slot] = market_cap
+                self.columns['market_cap'][slot] = market_cap
+            if event.get('symbol'):
+                self._index_symbol(event['symbol'], event['mint'], slot)
+        elif kind == 'raydium':
+            event = compact_raydium(data)
+            slot = self._touch(event.get('mint'), now)
+            if slot is None:
+                return
+            self.columns['raydium_events'][slot] += 1
+            liquidity = event.get('liquidity')
+            if liquidity is not None:
+                self.columns['liquidity_prev'][slot] = self.columns['liquidity'][slot]
+                self.columns['liquidity'][slot] = liquidity
+                self._ewma('liquidity_ewma', slot, liquidity)
+        elif kind == 'twitter':
+            event = compact_twitter(data)
+            slot = self._touch(self._keyword_mint(event.get('keyword')), now)
+            if slot is None:
+                self.counters['unmatched_keywords'] += 1
+                return
+            self.columns['mentions'][slot] += event.get('count') or 0
+            if event.get('sentiment') is not None and event.get('count'):
+                self._ewma('sentiment_ewma', slot, event['sentiment'])
+        else:
+            return
+        self.counters['updates'] += 1
+
+    def get(self, mint):
+        """Current features of `mint`, or None if it is not tracked."""
+        slot = self._slots.get(mint)
+        if slot is None:
+            return None
+        c = self.columns
+        return {
+            'first_seen': c['first_seen'][slot],
+            'last_seen': c['last_seen'][slot],
+            'pumpfun_events': c['pumpfun_events'][slot],
+            'raydium_events': c['raydium_events'][slot],
+            'mentions': c['mentions'][slot],
+            'market_cap_sol': _value(c['market_cap'][slot]),
+            'market_cap_change': _change(c['market_cap'][slot], c['market_cap_first'][slot]),
+            'liquidity': _value(c['liquidity'][slot]),
+            'liquidity_ewma': _value(c['liquidity_ewma'][slot]),
+            'liquidity_change': _change(c['liquidity'][slot], c['liquidity_prev'][slot]),
+            'sentiment_ewma': _value(c['sentiment_ewma'][slot]),
+        }
+
+    def evict_expired(self, now=None):
+        """Drop mints not updated within `ttl` seconds."""
+        cutoff = (now or self.clock()) - self.ttl
+        last_seen = self.columns['last_seen']
+        while self._slots:
+            mint, slot = next(iter(self._slots.items()))
+            if last_seen[slot] >= cutoff:
+                break
+            self._evict(mint)
+            self.counters['evicted_ttl'] += 1
+
+    def stats(self) -> dict:
+        return {**self.counters, 'mints': len(self._slots), 'capacity': self.capacity, 'symbols': len(self._symbols)}
+
+    def _touch(self, mint, now):
+        """Slot of `mint` (allocated if new), marked as most recently updated."""
+        if not mint or not isinstance(mint, str):
+            return None
+        slot = self._slots.get(mint)
+        if slot is None:
+            self.evict_expired(now)
+            if not self._free:
+                self._evict(next(iter(self._slots)))
+                self.counters['evicted_lru'] += 1
+            slot = self._free.pop()
+            self._slots[mint] = slot
+            self.columns['first_seen'][slot] = now
+        else:
+            self._slots.move_to_end(mint)
+        c = self.columns
+        if now > c['last_seen'][slot] or math.isnan(c['last_seen'][slot]):
+            c['last_seen'][slot] = now
+        return slot
+
+    def _evict(self, mint):
+        slot = self._slots.pop(mint)
+        for name, column in self.columns.items():
+            column[slot] = NAN if COLUMNS[name] == 'd' else 0
+        symbol = self._slot_symbol[slot]
+        if symbol is not None and self._symbols.get(symbol) == mint:
+            del self._symbols[symbol]
+        self._slot_symbol[slot] = None
+        self._free.append(slot)
+
+    def _ewma(self, column, slot, value):
+        previous = self.columns[column][slot]
+        if math.isnan(previous):
+            self.columns[column][slot] = value
+        else:
+            self.columns[column][slot] = previous + self.ewma_alpha * (value - previous)
+
+    def _index_symbol(self, symbol, mint, slot):
+        key = symbol.lstrip('$').lower()
+        old = self._slot_symbol[slot]
+        if old is not None and old != key and self._symbols.get(old) == mint:
+            del self._symbols[old]
+        self._slot_symbol[slot] = key
+        self._symbols[key] = mint
+
+    def _keyword_mint(self, keyword):
+        if not keyword:
+            return None
+        if keyword in self._slots:
+            return keyword
+        return self._symbols.get(keyword.lstrip('$').lower())
+
+    def save(self):
+        """Atomically write the tracked mints and their features to `path`.
+
+        The file is a JSON header line followed by each column's values as
+        raw array bytes, in least-recently-updated order.
+        """
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        mints = list(self._slots)
+        slots = list(self._slots.values())
+        header = {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': self.clock(),
+            'columns': COLUMNS,
+            'mints': mints,
+            'symbols': [self._slot_symbol[slot] for slot in slots],
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(json.dumps(header, separators=(',', ':')).encode() + b'\n')
+            for name, code in COLUMNS.items():
+                column = self.columns[name]
+                f.write(array(code, [column[slot] for slot in slots]).tobytes())
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Restore a snapshot written by `save`, if present and compatible."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.readline())
+                if header.get('version') != SNAPSHOT_VERSION or header.get('columns') != COLUMNS:
+                    logging.warning(f"Ignoring incompatible feature snapshot {self.path}")
+                    return
+                count = len(header['mints'])
+                values = {}
+                for name, code in COLUMNS.items():
+                    values[name] = array(code)
+                    values[name].fromfile(f, count)
+        except (OSError, ValueError, EOFError, KeyError) as e:
+            logging.error(f"Could not load feature snapshot: {e}")
+            return
+        # Keep the most recently updated mints if the snapshot exceeds capacity
+        skip = max(count - self.capacity, 0)
+        for index in range(skip, count):
+            mint = header['mints'][index]
+            slot = self._free.pop()
+            self._slots[mint] = slot
+            for name in COLUMNS:
+                self.columns[name][slot] = values[name][index]
+            symbol = header['symbols'][index]
+            if symbol:
+                self._index_symbol(symbol, mint, slot)
+        self.evict_expired()
+        logging.info(f"Loaded features for {len(self._slots)} mints")
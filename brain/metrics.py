@@ -0,0 +1,29 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+SIGNALS = Counter('brain_signals_total', 'Raw signals consumed', ['type'])
+SIGNAL_STAGE_SECONDS = Histogram('brain_signal_stage_seconds', 'Seconds from collector ingest to each stage',
+                                 ['stage'], buckets=LATENCY_BUCKETS)
+QUEUE_LAG_SECONDS = Histogram('brain_queue_lag_seconds', 'signals.raw time from publish to consume',
+                              buckets=LATENCY_BUCKETS)
+WINDOW_EVENTS = Histogram('brain_window_events', 'Events per closed window',
+                          buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500))
+WINDOW_WAIT_SECONDS = Histogram('brain_window_wait_seconds', 'Seconds a closed window waits for a decision worker',
+                                buckets=LATENCY_BUCKETS)
+LLM_SECONDS = Histogram('brain_llm_seconds', 'OpenAI call duration', ['outcome'], buckets=LATENCY_BUCKETS)
+DECISION_STAGE_SECONDS = Histogram('brain_decision_stage_seconds', 'Duration of each decision stage', ['stage'],
+                                   buckets=LATENCY_BUCKETS)
+DB_FLUSH_SECONDS = Histogram('brain_db_flush_seconds', 'Batched insert latency', ['table'], buckets=LATENCY_BUCKETS)
+DB_BATCH_ROWS = Histogram('brain_db_batch_rows', 'Rows per batched insert', ['table'],
+                          buckets=(1, 5, 10, 25, 50, 100, 200, 500))
+DB_REJECTED_ROWS = Counter('brain_db_rejected_rows_total', 'Rows dropped because Postgres refused them', ['table'])
+# Seconds from a traced row being queued for the batched writer until its INSERT completed
+DB_WRITE_STAGES = {
+    'signals_raw': SIGNAL_STAGE_SECONDS.labels('db_write'),
+    'signals_decoded': DECISION_STAGE_SECONDS.labels('db_write'),
+}
+DECISIONS = Counter('brain_decisions_total', 'Decisions published', ['action'])
+SELLS_DEFERRED = Counter('brain_sells_deferred_total', "SELLs outside this replica's partition left to the leader")
+PREFILTER = Counter('brain_prefilter_candidates_total', 'Candidates checked by the prefilter', ['outcome'])
+STARTUP_SECONDS = Gauge('brain_startup_seconds', 'Seconds from import to RabbitMQ and Postgres connected')
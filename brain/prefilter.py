@@ -0,0 +1,81 @@
+import metrics
+
+
+class Prefilter:
+    """Hard trading rules from `config`, applied to candidates before the model.
+
+    `compile` turns the blacklist into a frozenset and the limits into
+    floats, so checking a candidate costs a few set and dict lookups.
+    Candidates are the ranked Pump.fun and Raydium events of a prompt (see
+    prompt.extract_events). A candidate's liquidity is the largest of its
+    own liquidity or bonding-curve SOL, a Raydium pool for its mint in the
+    same window and the feature store's last known pool liquidity.
+    Survivors keep their rank order, capped at `max_candidates` per type.
+    """
+
+    def __init__(self, config: dict, max_candidates=20):
+        self.max_candidates = max_candidates
+        self.counters = {'passed': 0, 'blacklisted': 0, 'illiquid': 0, 'vetoed': 0, 'clamped': 0, 'reloads': 0}
+        self.compile(config)
+
+    def compile(self, config: dict):
+        """Build the rules from config; called again whenever POST /config changes it."""
+        self.blacklist = frozenset(m.strip() for m in config.get('token_blacklist') or [] if m and m.strip())
+        self.min_liquidity = float(config.get('min_liquidity_sol') or 0)
+        self.max_trade_amount = float(config.get('max_trade_amount_sol') or 0)
+        self.counters['reloads'] += 1
+
+    def apply(self, ranked: dict, features=None) -> dict:
+        """Drop rejected candidates from `ranked` in place and return this call's counts per outcome."""
+        window_liquidity = {}
+        for pool in ranked.get('raydium_pools', []):
+            mint = pool.get('mint')
+            if mint and (pool.get('liquidity') or 0) > window_liquidity.get(mint, 0):
+                window_liquidity[mint] = pool['liquidity']
+        counts = {'passed': 0, 'blacklisted': 0, 'illiquid': 0}
+        for field in ('pumpfun_events', 'raydium_pools'):
+            kept = []
+            for event in ranked.get(field, []):
+                mint = event.get('mint')
+                if mint in self.blacklist:
+                    outcome = 'blacklisted'
+                elif self.min_liquidity and self.liquidity(event, window_liquidity, features) < self.min_liquidity:
+                    outcome = 'illiquid'
+                else:
+                    outcome = 'passed'
+                    kept.append(event)
+                counts[outcome] += 1
+            ranked[field] = kept[:self.max_candidates]
+        for outcome, count in counts.items():
+            self.counters[outcome] += count
+            metrics.PREFILTER.labels(outcome).inc(count)
+        return counts
+
+    def liquidity(self, event: dict, window_liquidity: dict, features=None) -> float:
+        mint = event.get('mint')
+        best = max(event.get('liquidity') or 0, event.get('bonding_sol') or 0, window_liquidity.get(mint, 0))
+        if best < self.min_liquidity and features is not None:
+            found = features.get(mint)
+            if found and found['liquidity'] is not None:
+                best = max(best, found['liquidity'])
+        return best
+
+    def check(self, decision: dict) -> dict:
+        """Veto BUYs of blacklisted mints and clamp `amount_sol` to the max trade amount."""
+        if decision.get('action') == 'BUY' and decision.get('token_mint') in self.blacklist:
+            self.counters['vetoed'] += 1
+            return {'action': 'HOLD', 'token_mint': '', 'amount_sol': 0, 'reason': 'Blacklisted token'}
+        amount = decision.get('amount_sol')
+        if self.max_trade_amount and isinstance(amount, (int, float)) and amount > self.max_trade_amount:
+            self.counters['clamped'] += 1
+            return {**decision, 'amount_sol': self.max_trade_amount}
+        return decision
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            'blacklist_size': len(self.blacklist),
+            'min_liquidity_sol': self.min_liquidity,
+            'max_trade_amount_sol': self.max_trade_amount,
+            'max_candidates': self.max_candidates,
+        }
@@ -0,0 +1,175 @@
+import json
+
+# Rough chars-per-token ratio for compact JSON; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+
+def _num(value, digits=4):
+    """Parse a number from str/int/float and round it, or None."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return round(float(value), digits)
+    except (TypeError, ValueError):
+        return None
+
+
+def _first(data: dict, *keys):
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _mint_address(value):
+    # Raydium v3 nests mints as {"address": ...}
+    if isinstance(value, dict):
+        return value.get('address')
+    return value
+
+
+def _compact(record: dict) -> dict:
+    return {k: v for k, v in record.items() if v is not None}
+
+
+def compact_pumpfun(data: dict) -> dict:
+    """Reduce a Pump.fun new-token payload to the fields the model uses."""
+    return _compact({
+        'mint': _first(data, 'mint', 'tokenMint'),
+        'symbol': _first(data, 'symbol'),
+        'name': _first(data, 'name'),
+        'market_cap_sol': _num(_first(data, 'marketCapSol', 'market_cap_sol')),
+        'bonding_sol': _num(_first(data, 'vSolInBondingCurve')),
+        'initial_buy_sol': _num(_first(data, 'solAmount', 'initialBuy')),
+        'creator': _first(data, 'traderPublicKey', 'creator'),
+    })
+
+
+def compact_raydium(data: dict) -> dict:
+    """Reduce a Raydium pool payload to the fields the model uses."""
+    day = data.get('day') if isinstance(data.get('day'), dict) else {}
+    return _compact({
+        'pool': _first(data, 'id', 'address', 'ammId'),
+        'mint': _mint_address(_first(data, 'tokenAddress', 'baseMint', 'mintA')),
+        'quote_mint': _mint_address(_first(data, 'quoteMint', 'mintB')),
+        'liquidity': _num(_first(data, 'lpAmount', 'liquidity', 'tvl')),
+        'volume_24h': _num(_first(data, 'volume24h') or day.get('volume')),
+        'price': _num(_first(data, 'price'), 10),
+    })
+
+
+def compact_twitter(data: dict) -> dict:
+    """Reduce a keyword sentiment metric to the fields the model uses."""
+    return _compact({
+        'keyword': data.get('keyword'),
+        'count': data.get('count'),
+        'sentiment': _num(data.get('avg_sentiment'), 3),
+    })
+
+
+def compact_features(features: dict) -> dict:
+    """Reduce a mint's stored features (see features.FeatureStore) to the fields the model uses."""
+    return _compact({
+        'tracked_min': int((features['last_seen'] - features['first_seen']) // 60),
+        'pumpfun_events': features['pumpfun_events'] or None,
+        'raydium_events': features['raydium_events'] or None,
+        'mentions': features['mentions'] or None,
+        'market_cap_change': _num(features['market_cap_change'], 3),
+        'liquidity_ewma': _num(features['liquidity_ewma']),
+        'liquidity_change': _num(features['liquidity_change'], 3),
+        'sentiment': _num(features['sentiment_ewma'], 3),
+    })
+
+
+# Per signal type: compactor, dedupe key and ranking score (higher is more relevant)
+EXTRACTORS = {
+    'pumpfun': (compact_pumpfun, 'mint', lambda e: e.get('market_cap_sol') or e.get('bonding_sol') or 0),
+    'raydium': (compact_raydium, 'pool', lambda e: e.get('liquidity') or 0),
+    'twitter': (compact_twitter, 'keyword', lambda e: e.get('count') or 0),
+}
+
+# Prompt field for each signal type
+PROMPT_FIELDS = {'pumpfun': 'pumpfun_events', 'raydium': 'raydium_pools', 'twitter': 'twitter_stats'}
+
+
+def extract_events(signal_type: str, payloads: list) -> list:
+    """Compact, dedupe (latest payload wins) and rank payloads of one signal type."""
+    compactor, key, score = EXTRACTORS[signal_type]
+    unique = {}
+    for payload in payloads:
+        if not isinstance(payload, dict):
+            continue
+        event = compactor(payload)
+        ident = event.get(key)
+        if ident is None:
+            continue
+        unique.pop(ident, None)
+        unique[ident] = event
+    return sorted(unique.values(), key=score, reverse=True)
+
+
+def dumps(obj) -> str:
+    """Compact JSON used for prompts and token estimates."""
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True, default=str)
+
+
+def estimate_tokens(obj) -> int:
+    return len(dumps(obj)) // CHARS_PER_TOKEN + 1
+
+
+def build_prompt(events_by_type: dict, portfolio: dict, constraints: dict, token_budget: int = 3000,
+                 features=None, prefilter=None):
+    """Build a compact prompt that fits `token_budget`.
+
+    Events are added round-robin across signal types in rank order, so every
+    type keeps its best candidates when the budget truncates the rest. With a
+    `features` store, Pump.fun and Raydium events carry their mint's history;
+    with a `prefilter`, candidates failing its rules are dropped first.
+    Returns `(prompt, report)` where report describes the prompt size.
+    """
+    prompt = {
+        'portfolio': {'positions': portfolio.get('positions', []), 'pnl': portfolio.get('pnl', 0)},
+        'constraints': constraints,
+    }
+    ranked = {}
+    events_in = 0
+    for signal_type, field in PROMPT_FIELDS.items():
+        payloads = events_by_type.get(signal_type, [])
+        events_in += len(payloads)
+        ranked[field] = extract_events(signal_type, payloads)
+        prompt[field] = []
+    if features is not None:
+        for field in ('pumpfun_events', 'raydium_pools'):
+            for event in ranked[field]:
+                found = features.get(event.get('mint'))
+                if found:
+                    event['features'] = compact_features(found)
+    events_unique = sum(len(events) for events in ranked.values())
+    filtered = prefilter.apply(ranked, features) if prefilter is not None else None
+    # Add events one at a time, tracking the serialized size incrementally
+    size = len(dumps(prompt))
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    truncated = False
+    depth = 0
+    while any(depth < len(events) for events in ranked.values()):
+        for field, events in ranked.items():
+            if depth >= len(events):
+                continue
+            cost = len(dumps(events[depth])) + 1
+            if size + cost > budget_chars:
+                truncated = True
+                continue
+            prompt[field].append(events[depth])
+            size += cost
+        depth += 1
+    report = {
+        'events_in': events_in,
+        'events_unique': events_unique,
+        'events_kept': sum(len(prompt[field]) for field in ranked),
+        'tokens': size // CHARS_PER_TOKEN + 1,
+        'truncated': truncated,
+    }
+    if filtered is not None:
+        report['prefilter'] = filtered
+    return prompt, report
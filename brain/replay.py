@@ -0,0 +1,208 @@
+"""Replay recorded collector tables through brain's windowing and decision path.
+
+Rows from new_tokens, new_pools and social_metrics are streamed in created_at
+order through a server-side cursor, paced at 1x, Nx or max speed, windowed by
+event time and decided on with a deterministic local stub (or the real model).
+
+    python replay.py --since 2025-04-17 --until 2025-04-18 --speed max
+    python replay.py --since 2025-04-17T12:00 --speed 10 --report replay.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import asyncpg
+
+import brain
+from db import init_connection
+from decision_pool import DecisionPool
+from windowing import WindowEngine
+
+REPLAY_QUERY = """
+    SELECT kind, payload, EXTRACT(EPOCH FROM created_at)::float8 AS ts FROM (
+        SELECT 'pumpfun' AS kind, raw_data AS payload, created_at FROM new_tokens
+            WHERE created_at >= $1 AND ($2::timestamptz IS NULL OR created_at < $2)
+        UNION ALL
+        SELECT 'raydium', pool_data, created_at FROM new_pools
+            WHERE created_at >= $1 AND ($2::timestamptz IS NULL OR created_at < $2)
+        UNION ALL
+        SELECT 'twitter', metrics, created_at FROM social_metrics
+            WHERE created_at >= $1 AND ($2::timestamptz IS NULL OR created_at < $2)
+    ) recorded
+    ORDER BY created_at
+"""
+
+
+def parse_time(value):
+    """Parse an ISO timestamp, treating naive values as UTC."""
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def stream_signals(database_url, since, until=None, fetch_size=5000):
+    """Yield recorded signals in time order using a server-side cursor."""
+    conn = await asyncpg.connect(database_url)
+    try:
+        await init_connection(conn)
+        # asyncpg cursors are server-side and must live inside a transaction
+        async with conn.transaction(readonly=True):
+            async for kind, payload, ts in conn.cursor(REPLAY_QUERY, since, until, prefetch=fetch_size):
+                yield {'type': kind, 'data': payload, 'ts': ts}
+    finally:
+        await conn.close()
+
+
+class StubModel:
+    """Deterministic stand-in for the LLM.
+
+    Buys the highest-ranked Pump.fun token whose market cap is at least
+    `min_market_cap_sol`, otherwise holds. `latency` simulates model time.
+    """
+
+    def __init__(self, min_market_cap_sol=60.0, amount_sol=0.1, latency=0.0):
+        self.min_market_cap_sol = min_market_cap_sol
+        self.amount_sol = amount_sol
+        self.latency = latency
+        self.calls = 0
+
+    async def __call__(self, prompt: dict) -> dict:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for event in prompt['pumpfun_events']:
+            if (event.get('market_cap_sol') or 0) >= self.min_market_cap_sol:
+                amount = min(self.amount_sol, prompt['constraints'].get('max_trade_amount_sol', self.amount_sol))
+                return {'action': 'BUY', 'token_mint': event['mint'], 'amount_sol': amount,
+                        'reason': f"stub: market cap {event['market_cap_sol']} SOL"}
+        return {'action': 'HOLD', 'token_mint': '', 'amount_sol': 0, 'reason': 'stub: no candidate'}
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'mean': statistics.fmean(ordered), 'p50': pick(0.5), 'p95': pick(0.95), 'p99': pick(0.99),
+            'max': ordered[-1]}
+
+
+async def replay(signals, speed=None, model=None, window_seconds=None, workers=None):
+    """Drive `signals` (an async iterable) through windowing and decisions and return a report.
+
+    `speed` is the replay rate relative to recorded time (None for max speed).
+    The replay runs as the cluster leader, like a single production replica.
+    """
+    engine = WindowEngine(
+        size=window_seconds or brain.WINDOW_SECONDS,
+        slide=brain.WINDOW_SLIDE_SECONDS,
+        max_events=brain.WINDOW_MAX_EVENTS,
+        allowed_lateness=brain.WINDOW_ALLOWED_LATENESS,
+    )
+    if brain.llm_slots is None:
+        brain.llm_slots = asyncio.Semaphore(brain.LLM_MAX_IN_FLIGHT)
+    decisions = []
+    timings = {'queue_ms': [], 'prompt_ms': [], 'decide_ms': [], 'window_ms': []}
+    prompt_tokens = []
+
+    async def handle(item):
+        window, closed_at = item
+        started = time.perf_counter()
+        decision, report = await brain.evaluate_window(window, model=model)
+        timings['queue_ms'].append((started - closed_at) * 1000)
+        timings['prompt_ms'].append(report['prompt_ms'])
+        timings['decide_ms'].append(report['decide_ms'])
+        timings['window_ms'].append((time.perf_counter() - closed_at) * 1000)
+        prompt_tokens.append(report['tokens'])
+        decisions.append({'window_start': window.start, 'events': window.count, **decision})
+
+    pool = DecisionPool(handle, workers=workers or brain.DECISION_WORKERS, max_pending=1_000_000,
+                        timeout=brain.DECISION_TIMEOUT_SECONDS)
+    # A replay stands in for a single brain, which is its own leader: SELLs and position reviews are kept
+    was_leader = brain.cluster.is_leader
+    brain.cluster.is_leader = True
+    pool.start()
+    try:
+        events = 0
+        windows = 0
+        first_ts = None
+        started = time.perf_counter()
+        async for signal in signals:
+            if speed:
+                if first_ts is None:
+                    first_ts = signal['ts']
+                delay = started + (signal['ts'] - first_ts) / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            events += 1
+            brain.features.update(signal)
+            for window in engine.add(signal):
+                windows += 1
+                pool.submit((window, time.perf_counter()))
+        for window in engine.flush():
+            windows += 1
+            pool.submit((window, time.perf_counter()))
+        ingest_seconds = time.perf_counter() - started
+        await pool.queue.join()
+    finally:
+        await pool.stop()
+        brain.cluster.is_leader = was_leader
+    elapsed = time.perf_counter() - started
+    decisions.sort(key=lambda d: d['window_start'])
+    return {
+        'events': events,
+        'windows': windows,
+        'late_events': engine.late_events,
+        'elapsed_s': elapsed,
+        'events_per_s': events / ingest_seconds if ingest_seconds else 0.0,
+        'windows_per_s': windows / elapsed if elapsed else 0.0,
+        'actions': dict(Counter(d['action'] for d in decisions)),
+        'latency_ms': {stage: _percentiles(values) for stage, values in timings.items()},
+        'prompt_tokens': _percentiles(prompt_tokens),
+        'decision_pool': pool.stats(),
+        'decision_cache': brain.decision_cache.stats(),
+        'decisions': decisions,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'))
+    parser.add_argument('--since', required=True, type=parse_time, help='Start of the replayed range (ISO time)')
+    parser.add_argument('--until', type=parse_time, help='End of the replayed range (ISO time, default: now)')
+    parser.add_argument('--speed', default='max', help="'max', or a multiple of recorded time such as 1 or 10")
+    parser.add_argument('--model', choices=['stub', 'openai'], default='stub')
+    parser.add_argument('--stub-latency', type=float, default=0.0, help='Seconds the stub model sleeps per call')
+    parser.add_argument('--window-seconds', type=float)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--report', help='Write the full report (including decisions) to this JSON file')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    speed = None if args.speed == 'max' else float(args.speed)
+    if args.model == 'openai':
+        await brain.load_clients()
+        model = None
+    else:
+        model = StubModel(latency=args.stub_latency)
+    signals = stream_signals(args.database_url, args.since, args.until)
+    report = await replay(signals, speed=speed, model=model, window_seconds=args.window_seconds,
+                          workers=args.workers)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+    summary = {k: v for k, v in report.items() if k != 'decisions'}
+    print(json.dumps(summary, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,31 @@
+import argparse
+import asyncio
+
+import brain
+from bench_consume import SignalGenerator, bench
+from codec import decode
+from decision_cache import DecisionCache
+from features import FeatureStore
+
+
+def test_generated_signals_look_like_the_collectors():
+    signal = decode(SignalGenerator(mints=3).signal('raydium', 7))
+    assert signal['type'] == 'raydium'
+    assert signal['data']['id'] == 'pool7'
+    assert signal['trace']['stages']['ingest'] == signal['ts']
+
+
+def test_short_run_reaches_decisions(monkeypatch):
+    # bench() rewires brain's globals; let monkeypatch restore them afterwards
+    for name in ('rabbit_channel', 'database', 'call_model', 'decision_pool', 'llm_slots', 'WINDOW_SECONDS',
+                 'WINDOW_TICK_SECONDS', 'DECISION_WORKERS'):
+        monkeypatch.setattr(brain, name, getattr(brain, name))
+    monkeypatch.setattr(brain, 'features', FeatureStore(capacity=1000))
+    monkeypatch.setattr(brain, 'decision_cache', DecisionCache())
+    args = argparse.Namespace(pumpfun_rate=300, raydium_rate=50, max_speed=False, max_backlog=1000, duration=0.3,
+                              mints=20, window_seconds=0.2, workers=2, model_latency_ms=0)
+    report = asyncio.run(bench(args))
+    assert report['events'] > 0
+    assert report['database']['signals_raw'] == report['events']
+    assert report['windows'] == report['model_calls'] > 0
+    assert report['latency_ms']['end_to_end']['count'] == report['windows']
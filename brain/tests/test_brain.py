@@ -1,5 +1,116 @@
 import pytest
 
+
 def test_placeholder():
     # Placeholder test for brain
-    assert True
\ No newline at end of file
+    assert True
+
+
+def test_heavy_clients_are_not_imported_at_startup():
+    import subprocess
+    import sys
+    code = ("import sys, brain; "
+            "print(sorted(m for m in ('aio_pika', 'openai', 'asyncpg', 'bip_utils', 'mnemonic') if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == '[]'
+
+
+def test_liveness_and_readiness(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import brain
+
+    class Channel:
+        is_closed = False
+
+    class Database:
+        pool = object()
+
+    client = TestClient(brain.app)
+    assert client.get('/healthz').status_code == 200
+    monkeypatch.setattr(brain, 'rabbit_channel', None)
+    monkeypatch.setattr(brain, 'database', None)
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json()['rabbitmq'] is False
+    monkeypatch.setattr(brain, 'rabbit_channel', Channel())
+    monkeypatch.setattr(brain, 'database', Database())
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.json()['ready'] is True
+
+
+def test_connect_rabbit_retries_until_reachable(monkeypatch):
+    import asyncio
+    import types
+
+    import brain
+
+    attempts = []
+
+    declared = []
+
+    class Queue:
+        async def bind(self, exchange, routing_key=None):
+            pass
+
+    class Channel:
+        is_closed = False
+
+        async def declare_exchange(self, name, *args, **kwargs):
+            return name
+
+        async def declare_queue(self, name, **kwargs):
+            declared.append(name)
+            return Queue()
+
+    class Connection:
+        async def channel(self):
+            return Channel()
+
+        async def close(self):
+            pass
+
+    async def connect_robust(url):
+        attempts.append(url)
+        if len(attempts) < 3:
+            raise ConnectionError('refused')
+        return Connection()
+
+    async def run():
+        await brain.connect_rabbit('amqp://test', min_backoff=0, max_backoff=0)
+        brain.queue_keeper_task.cancel()
+
+    monkeypatch.setattr(brain, 'aio_pika', types.SimpleNamespace(
+        connect_robust=connect_robust, ExchangeType=types.SimpleNamespace(FANOUT='fanout')))
+    monkeypatch.setattr(brain, 'queue_keeper_task', None)
+    monkeypatch.setattr(brain, 'openai', object())
+    monkeypatch.setattr(brain, 'rabbit_conn', None)
+    monkeypatch.setattr(brain, 'rabbit_channel', None)
+    asyncio.run(run())
+    assert len(attempts) == 3
+    assert brain.readiness()['rabbitmq'] is True
+    # The replica's signals queue exists from startup, before /start
+    assert declared == ['signals.decoded', f'signals.raw.{brain.REPLICA_ID}']
+
+
+def test_sell_is_kept_for_mints_in_this_replicas_partition(monkeypatch):
+    import asyncio
+
+    import brain
+
+    async def sell_first(prompt):
+        return {'action': 'SELL', 'token_mint': 'owned', 'amount_sol': 0.1, 'reason': 'test'}
+
+    async def sell_other(prompt):
+        return {'action': 'SELL', 'token_mint': 'elsewhere', 'amount_sol': 0.1, 'reason': 'test'}
+
+    def prompt(n):
+        return {'pumpfun_events': [{'mint': 'owned', 'n': n}], 'raydium_pools': [],
+                'portfolio': {'positions': []}}
+
+    monkeypatch.setattr(brain.cluster, 'is_leader', False)
+    assert asyncio.run(brain.decide(prompt(1), model=sell_first))['action'] == 'SELL'
+    assert asyncio.run(brain.decide(prompt(2), model=sell_other))['action'] == 'HOLD'
+    monkeypatch.setattr(brain.cluster, 'is_leader', True)
+    assert asyncio.run(brain.decide(prompt(3), model=sell_other))['action'] == 'SELL'
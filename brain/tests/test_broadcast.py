@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from broadcast import StatusHub, diff
+
+
+def apply(target, patch):
+    # Reference merge-patch application, mirroring ui/main.js
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            apply(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+def test_diff_only_contains_changes():
+    old = {'running': False, 'pool': {'completed': 1, 'pending': 0}, 'gone': 1, 'list': [1]}
+    new = {'running': False, 'pool': {'completed': 2, 'pending': 0}, 'list': [1, 2], 'added': {'a': 1}}
+    patch = diff(old, new)
+    assert patch == {'pool': {'completed': 2}, 'gone': None, 'list': [1, 2], 'added': {'a': 1}}
+    assert apply(json.loads(json.dumps(old)), patch) == new
+    assert diff(new, new) == {}
+
+
+def test_snapshot_on_subscribe_then_patches():
+    state = {'running': False, 'pool': {'completed': 0}}
+
+    async def run():
+        hub = StatusHub(lambda: state)
+        queue = hub.subscribe()
+        snapshot = json.loads(queue.get_nowait())
+        assert snapshot['type'] == 'snapshot' and snapshot['data'] == state
+        # Nothing changed: nothing sent
+        assert hub.publish() is False
+        assert queue.empty()
+        state['pool']['completed'] = 1
+        assert hub.publish() is True
+        patch = json.loads(queue.get_nowait())
+        assert patch == {'type': 'patch', 'seq': 1, 'data': {'pool': {'completed': 1}}}
+        return apply(snapshot['data'], patch['data'])
+
+    assert asyncio.run(run()) == state
+
+
+def test_slow_subscriber_is_dropped_without_affecting_others():
+    state = {'n': 0}
+
+    async def run():
+        hub = StatusHub(lambda: state, max_queue=2)
+        slow = hub.subscribe()
+        fast = hub.subscribe()
+        fast.get_nowait()
+        for i in range(1, 4):
+            state['n'] = i
+            hub.publish()
+            if not fast.empty():
+                assert json.loads(fast.get_nowait())['data'] == {'n': i}
+        # The slow queue overflowed: it was emptied and told to stop
+        assert slow.get_nowait() is None
+        assert hub.stats()['subscribers'] == 1
+        assert hub.stats()['dropped_clients'] == 1
+
+    asyncio.run(run())
+
+
+def test_producer_publishes_on_notify_only_with_subscribers():
+    calls = []
+    state = {'n': 0}
+
+    def snapshot():
+        calls.append(1)
+        return state
+
+    async def run():
+        hub = StatusHub(snapshot, interval=60)
+        hub.start()
+        hub.notify()
+        await asyncio.sleep(0.01)
+        assert calls == []
+        queue = hub.subscribe()
+        queue.get_nowait()
+        state['n'] = 1
+        hub.notify()
+        message = await asyncio.wait_for(queue.get(), 1)
+        await hub.stop()
+        assert await queue.get() is None
+        return json.loads(message)
+
+    assert asyncio.run(run())['data'] == {'n': 1}
+
+
+def test_stop_right_after_notify():
+    async def run():
+        hub = StatusHub(lambda: {'n': 1}, interval=60)
+        hub.start()
+        hub.subscribe()
+        await asyncio.sleep(0)
+        hub.notify()
+        await asyncio.wait_for(hub.stop(), 2)
+        return hub
+
+    assert asyncio.run(run()).stats()['subscribers'] == 0
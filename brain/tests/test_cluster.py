@@ -0,0 +1,114 @@
+import asyncio
+import contextlib
+import json
+
+from cluster import Cluster
+
+
+class FakePostgres:
+    """Just enough of brain_shared, brain_replicas, advisory locks and NOTIFY for Cluster."""
+
+    def __init__(self):
+        self.shared = {}
+        self.replicas = {}
+        self.lock_owner = None
+        self.listeners = []
+
+
+class FakeConnection:
+    def __init__(self, pg):
+        self.pg = pg
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.pg.listeners.append((self, callback))
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetch(self, sql, *args):
+        if 'FROM brain_shared' in sql:
+            return list(self.pg.shared.items())
+        return [{'replica_id': r, 'is_leader': leader, 'age': 0.0} for r, leader in sorted(self.pg.replicas.items())]
+
+    async def fetchval(self, sql, *args):
+        assert 'pg_try_advisory_lock' in sql
+        if self.pg.lock_owner in (None, self):
+            self.pg.lock_owner = self
+            return True
+        return False
+
+    async def execute(self, sql, *args):
+        if 'INTO brain_shared' in sql:
+            self.pg.shared[args[0]] = args[1]
+        elif 'INTO brain_replicas' in sql:
+            self.pg.replicas[args[0]] = args[1]
+        elif 'pg_notify' in sql:
+            for _, callback in list(self.pg.listeners):
+                callback(self, 0, args[0], args[1])
+
+    async def close(self):
+        self.closed = True
+        # Session locks and listeners go away with the connection
+        if self.pg.lock_owner is self:
+            self.pg.lock_owner = None
+        self.pg.listeners = [(c, cb) for c, cb in self.pg.listeners if c is not self]
+
+
+class FakeCluster(Cluster):
+    def __init__(self, pg, replica_id, **kwargs):
+        self.changes = []
+        super().__init__('postgresql://unused', replica_id, lambda k, v: self.changes.append((k, v)),
+                         interval=0.01, **kwargs)
+        self.pg = pg
+
+    async def _open(self):
+        return FakeConnection(self.pg)
+
+
+def test_single_leader_and_failover():
+    async def run():
+        pg = FakePostgres()
+        a, b = FakeCluster(pg, 'a'), FakeCluster(pg, 'b')
+        a.start()
+        await asyncio.sleep(0.05)
+        b.start()
+        await asyncio.sleep(0.05)
+        assert (a.is_leader, b.is_leader) == (True, False)
+        assert [r['replica_id'] for r in b.replicas] == ['a', 'b']
+        await a.close()
+        await asyncio.sleep(0.05)
+        assert b.is_leader
+        await b.close()
+        return b
+
+    assert asyncio.run(run()).counters['elections_won'] == 1
+
+
+def test_shared_state_reaches_other_replicas():
+    async def run():
+        pg = FakePostgres()
+        pg.shared['running'] = True
+        a, b = FakeCluster(pg, 'a'), FakeCluster(pg, 'b')
+        a.start()
+        b.start()
+        await asyncio.sleep(0.03)
+        # Existing state is applied on connect
+        assert a.changes == b.changes == [('running', True)]
+        assert await a.put('config', {'min_liquidity_sol': 2.0})
+        await a.close()
+        await b.close()
+        return pg, a, b
+
+    pg, a, b = asyncio.run(run())
+    assert pg.shared['config'] == {'min_liquidity_sol': 2.0}
+    assert b.changes[-1] == ('config', {'min_liquidity_sol': 2.0})
+    # A replica does not re-apply its own change
+    assert a.changes == [('running', True)]
+
+
+def test_put_without_connection_is_local_only():
+    cluster = FakeCluster(FakePostgres(), 'a')
+    assert asyncio.run(cluster.put('running', True)) is False
+    assert json.dumps(cluster.stats())
@@ -0,0 +1,12 @@
+import json
+
+import msgpack
+
+from codec import MSGPACK, decode
+
+
+def test_decodes_by_content_type():
+    signal = {'type': 'raydium', 'data': {'id': 'pool'}, 'ts': 1.5}
+    assert decode(json.dumps(signal).encode()) == signal
+    assert decode(json.dumps(signal).encode(), 'application/json') == signal
+    assert decode(msgpack.packb(signal), MSGPACK) == signal
@@ -0,0 +1,181 @@
+import asyncio
+
+from db import Database
+
+
+class FakePool:
+    def __init__(self):
+        self.terminated = False
+
+    def terminate(self):
+        self.terminated = True
+
+    async def close(self):
+        pass
+
+
+class FakeDatabase(Database):
+    """Database whose pool and inserts are in-memory; `fail_opens`/`fail_inserts` inject errors."""
+
+    def __init__(self, fail_opens=0, fail_inserts=0, reject=None, insert_error=ConnectionResetError, **kwargs):
+        super().__init__('postgresql://unused', **kwargs)
+        self.fail_opens = fail_opens
+        self.fail_inserts = fail_inserts
+        self.reject = reject
+        self.insert_error = insert_error
+        self.opens = 0
+        self.written = []
+
+    async def _open_pool(self):
+        self.opens += 1
+        if self.fail_opens:
+            self.fail_opens -= 1
+            raise OSError('connection refused')
+        return FakePool()
+
+    async def _insert(self, table, rows):
+        if self.fail_inserts:
+            self.fail_inserts -= 1
+            raise self.insert_error('connection lost')
+        if self.reject is not None and any(self.reject(row) for row in rows):
+            raise ValueError('unsupported Unicode escape sequence')
+        self.written.append((table, list(rows)))
+
+
+def test_connects_in_background_with_retry():
+    async def run():
+        db = FakeDatabase(fail_opens=2)
+        db.start()
+        await db.wait_connected(timeout=5)
+        await db.close()
+        return db
+
+    db = asyncio.run(run())
+    assert db.opens == 3
+    assert db.stats()['last_error'] == "OSError('connection refused')"
+
+
+def test_rows_are_batched_per_table():
+    async def run():
+        db = FakeDatabase(batch_size=2, flush_interval=10)
+        db.start()
+        await db.wait_connected(timeout=1)
+        db.save_signal({'n': 1})
+        db.save_decision({'action': 'HOLD'})
+        db.save_signal({'n': 2})
+        # Reaching batch_size wakes the flusher before flush_interval
+        await asyncio.sleep(0.05)
+        await db.close()
+        return db
+
+    db = asyncio.run(run())
+    assert db.written == [
+        ('signals_raw', [{'n': 1}, {'n': 2}]),
+        ('signals_decoded', [{'action': 'HOLD'}]),
+    ]
+    assert db.stats()['rows_written'] == 3
+
+
+def test_failed_flush_keeps_rows_and_reconnects():
+    async def run():
+        db = FakeDatabase(fail_inserts=1, flush_interval=10)
+        db.start()
+        await db.wait_connected(timeout=1)
+        first_pool = db.pool
+        db.save_decision({'action': 'BUY'})
+        await db.flush()
+        assert db.stats()['pending']['signals_decoded'] == 1
+        assert first_pool.terminated
+        await db.wait_connected(timeout=1)
+        await db.flush()
+        await db.close()
+        return db
+
+    db = asyncio.run(run())
+    assert db.written == [('signals_decoded', [{'action': 'BUY'}])]
+    assert db.counters['reconnects'] == 1
+    assert db.opens == 2
+
+
+def test_rejected_row_is_dropped_without_blocking_the_table():
+    async def run():
+        db = FakeDatabase(batch_size=8, flush_interval=10, reject=lambda row: row['n'] == 5)
+        db.start()
+        await db.wait_connected(timeout=1)
+        for i in range(10):
+            db.save_signal({'n': i})
+        await db.flush()
+        pool = db.pool
+        await db.close()
+        return db, pool
+
+    db, pool = asyncio.run(run())
+    written = [row['n'] for _, rows in db.written for row in rows]
+    assert written == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    assert db.stats()['pending']['signals_raw'] == 0
+    assert (db.counters['rejected'], db.counters['reconnects']) == (1, 0)
+    assert not pool.terminated
+
+
+def test_non_data_errors_requeue_instead_of_rejecting():
+    async def run():
+        db = FakeDatabase(fail_inserts=1, insert_error=asyncio.TimeoutError, flush_interval=10)
+        db.start()
+        await db.wait_connected(timeout=1)
+        db.save_signal({'n': 1})
+        db.save_signal({'n': 2})
+        await db.flush()
+        assert db.stats()['pending']['signals_raw'] == 2
+        await db.wait_connected(timeout=1)
+        await db.flush()
+        await db.close()
+        return db
+
+    db = asyncio.run(run())
+    assert db.written == [('signals_raw', [{'n': 1}, {'n': 2}])]
+    assert (db.counters['rejected'], db.counters['reconnects']) == (0, 1)
+
+
+def test_close_right_after_batch_size_is_reached():
+    async def run():
+        db = FakeDatabase(batch_size=2, flush_interval=10)
+        db.start()
+        await db.wait_connected(timeout=1)
+        db.save_signal({'n': 1})
+        db.save_signal({'n': 2})
+        await asyncio.wait_for(db.close(), 2)
+        return db
+
+    db = asyncio.run(run())
+    assert db.written == [('signals_raw', [{'n': 1}, {'n': 2}])]
+
+
+def test_pending_rows_are_bounded():
+    db = FakeDatabase(max_pending=2)
+    for i in range(3):
+        db.save_signal({'n': i})
+    assert db._pending['signals_raw'] == [{'n': 1}, {'n': 2}]
+    assert db.counters['dropped'] == 1
+
+
+def test_write_latency_is_recorded_for_traced_rows():
+    from prometheus_client import REGISTRY
+
+    def written_count():
+        return REGISTRY.get_sample_value('brain_decision_stage_seconds_count', {'stage': 'db_write'}) or 0
+
+    async def run():
+        db = FakeDatabase(flush_interval=10)
+        db.start()
+        await db.wait_connected(timeout=1)
+        decision = {'action': 'HOLD', 'trace': {'id': 't', 'stages': {}}}
+        db.save_decision(decision)
+        db.save_decision({'action': 'HOLD'})
+        before = written_count()
+        await db.flush()
+        await db.close()
+        return decision, written_count() - before
+
+    decision, observed = asyncio.run(run())
+    assert 'db_queued' in decision['trace']['stages']
+    assert observed == 1
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from decision_cache import DecisionCache, prompt_key
+
+
+def test_prompt_key_ignores_key_order():
+    assert prompt_key({'a': 1, 'b': [1, 2]}) == prompt_key({'b': [1, 2], 'a': 1})
+    assert prompt_key({'a': 1}) != prompt_key({'a': 2})
+
+
+def test_ttl_and_lru_eviction():
+    now = [0.0]
+    cache = DecisionCache(ttl=10, max_entries=2, clock=lambda: now[0])
+    cache.put('a', {'action': 'HOLD'})
+    cache.put('b', {'action': 'BUY'})
+    assert cache.get('a') == {'action': 'HOLD'}
+    # 'b' is now least recently used
+    cache.put('c', {'action': 'SELL'})
+    assert cache.get('b') is None
+    assert cache.counters['evictions'] == 1
+    now[0] = 11
+    assert cache.get('a') is None
+
+
+def test_concurrent_identical_requests_are_coalesced():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'action': 'BUY', 'token_mint': 'm', 'amount_sol': 0.1, 'reason': 'r'}
+
+    async def run():
+        cache = DecisionCache()
+        results = await asyncio.gather(*[cache.get_or_compute('k', compute) for _ in range(3)])
+        again = await cache.get_or_compute('k', compute)
+        return cache, results, again
+
+    cache, results, again = asyncio.run(run())
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == ['coalesced', 'coalesced', 'miss']
+    assert again[1] == 'hit'
+    stats = cache.stats()
+    assert (stats['misses'], stats['coalesced'], stats['hits']) == (1, 2, 1)
+
+
+def test_failures_are_not_cached():
+    async def fail():
+        raise RuntimeError('boom')
+
+    async def run():
+        cache = DecisionCache()
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute('k', fail)
+        return cache
+
+    cache = asyncio.run(run())
+    assert cache.get('k') is None
+    assert cache.stats()['in_flight'] == 0
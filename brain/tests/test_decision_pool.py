@@ -0,0 +1,67 @@
+import asyncio
+
+from decision_pool import DecisionPool
+
+
+def test_submit_does_not_wait_for_slow_handler():
+    started = []
+    release = None
+
+    async def handler(item):
+        started.append(item)
+        await release.wait()
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        pool = DecisionPool(handler, workers=2, max_pending=4)
+        pool.start()
+        for i in range(3):
+            pool.submit(i)
+        await asyncio.sleep(0.01)
+        # Two workers busy, third item still pending
+        assert started == [0, 1]
+        assert pool.stats()['in_flight'] == 2
+        release.set()
+        await pool.queue.join()
+        await pool.stop()
+        return pool
+
+    pool = asyncio.run(run())
+    assert started == [0, 1, 2]
+    assert pool.stats()['completed'] == 3
+
+
+def test_full_queue_drops_oldest_pending():
+    async def handler(item):
+        pass
+
+    async def run():
+        pool = DecisionPool(handler, workers=1, max_pending=2)
+        # No workers started, so items stay queued
+        pool.queue = asyncio.Queue(maxsize=2)
+        assert pool.submit('a')
+        assert pool.submit('b')
+        assert not pool.submit('c')
+        return pool, [pool.queue.get_nowait(), pool.queue.get_nowait()]
+
+    pool, pending = asyncio.run(run())
+    assert pending == ['b', 'c']
+    assert pool.counters['dropped'] == 1
+
+
+def test_handler_timeout_is_counted():
+    async def handler(item):
+        await asyncio.sleep(1)
+
+    async def run():
+        pool = DecisionPool(handler, workers=1, timeout=0.01)
+        pool.start()
+        pool.submit('slow')
+        await pool.queue.join()
+        await pool.stop()
+        return pool
+
+    pool = asyncio.run(run())
+    assert pool.counters['timeouts'] == 1
+    assert pool.counters['completed'] == 0
@@ -0,0 +1,78 @@
+from features import FeatureStore
+from prompt import build_prompt
+
+
+def pumpfun(mint, ts, market_cap, symbol='AAA'):
+    return {'type': 'pumpfun', 'ts': ts, 'data': {'mint': mint, 'symbol': symbol, 'marketCapSol': market_cap}}
+
+
+def raydium(mint, ts, liquidity):
+    return {'type': 'raydium', 'ts': ts, 'data': {'id': f'pool-{mint}', 'tokenAddress': mint, 'lpAmount': liquidity}}
+
+
+def twitter(keyword, ts, count, sentiment):
+    return {'type': 'twitter', 'ts': ts, 'data': {'keyword': keyword, 'count': count, 'avg_sentiment': sentiment}}
+
+
+def test_features_are_updated_incrementally():
+    store = FeatureStore(capacity=4, ewma_alpha=0.5)
+    store.update(pumpfun('m1', 100, 10))
+    store.update(pumpfun('m1', 160, 15))
+    store.update(raydium('m1', 170, 100))
+    store.update(raydium('m1', 180, 200))
+    store.update(twitter('$aaa', 190, 4, 0.8))
+    store.update(twitter('m1', 200, 2, 0.2))
+    store.update(twitter('unknown', 200, 9, 1.0))
+    f = store.get('m1')
+    assert f['first_seen'] == 100 and f['last_seen'] == 200
+    assert (f['pumpfun_events'], f['raydium_events'], f['mentions']) == (2, 2, 6)
+    assert f['market_cap_change'] == 0.5
+    assert f['liquidity'] == 200 and f['liquidity_change'] == 1.0 and f['liquidity_ewma'] == 150
+    assert abs(f['sentiment_ewma'] - 0.5) < 1e-9
+    assert store.get('m2') is None
+    assert store.stats()['unmatched_keywords'] == 1
+
+
+def test_lru_and_ttl_eviction():
+    store = FeatureStore(capacity=2, ttl=100)
+    store.update(pumpfun('a', 1, 1, symbol='A'))
+    store.update(pumpfun('b', 10, 1, symbol='B'))
+    store.update(pumpfun('a', 20, 2, symbol='A'))
+    # Full: 'b' is least recently updated
+    store.update(pumpfun('c', 30, 1, symbol='C'))
+    assert 'b' not in store and 'a' in store and 'c' in store
+    store.update(twitter('b', 31, 1, 0.5))
+    assert store.stats()['unmatched_keywords'] == 1
+    # 'a' and 'c' are older than the TTL when 'd' arrives
+    store.update(pumpfun('d', 200, 1, symbol='D'))
+    assert len(store) == 1 and 'd' in store
+    assert store.stats()['evicted_lru'] == 1 and store.stats()['evicted_ttl'] == 2
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'features.bin')
+    now = [1000.0]
+    store = FeatureStore(capacity=10, path=path, clock=lambda: now[0])
+    for i in range(5):
+        store.update(pumpfun(f'm{i}', 990 + i, i + 1, symbol=f'S{i}'))
+    store.update(raydium('m0', 999, 50))
+    store.save()
+
+    restored = FeatureStore(capacity=3, path=path, clock=lambda: now[0])
+    restored.load()
+    # Only the most recently updated mints fit
+    assert sorted(restored._slots) == ['m0', 'm3', 'm4']
+    assert restored.get('m0') == store.get('m0')
+    restored.update(twitter('s4', 1001, 3, 0.4))
+    assert restored.get('m4')['mentions'] == 3
+
+
+def test_prompt_events_carry_features():
+    store = FeatureStore()
+    store.update(pumpfun('m1', 1000, 10))
+    store.update(pumpfun('m1', 1600, 20))
+    prompt, _ = build_prompt({'pumpfun': [{'mint': 'm1', 'marketCapSol': 20}, {'mint': 'm2'}]}, {}, {},
+                             features=store)
+    by_mint = {e['mint']: e for e in prompt['pumpfun_events']}
+    assert by_mint['m1']['features'] == {'tracked_min': 10, 'pumpfun_events': 2, 'market_cap_change': 1.0}
+    assert 'features' not in by_mint['m2']
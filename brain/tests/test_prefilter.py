@@ -0,0 +1,61 @@
+import asyncio
+
+import brain
+from features import FeatureStore
+from prefilter import Prefilter
+from prompt import build_prompt
+
+CONFIG = {'token_blacklist': ['bad', ' '], 'min_liquidity_sol': 5, 'max_trade_amount_sol': 1.0}
+
+
+def test_candidates_are_filtered_and_ranked():
+    prefilter = Prefilter(CONFIG, max_candidates=2)
+    store = FeatureStore()
+    store.update({'type': 'raydium', 'ts': 1000, 'data': {'id': 'p0', 'tokenAddress': 'known', 'lpAmount': 50}})
+    events = {
+        'pumpfun': [
+            {'mint': 'bad', 'vSolInBondingCurve': 100},
+            {'mint': 'thin', 'vSolInBondingCurve': 1},
+            {'mint': 'pooled', 'vSolInBondingCurve': 1},
+            {'mint': 'known', 'vSolInBondingCurve': 1},
+            {'mint': 'deep', 'vSolInBondingCurve': 30, 'marketCapSol': 90},
+            {'mint': 'deep2', 'vSolInBondingCurve': 20, 'marketCapSol': 80},
+        ],
+        # Liquidity of a pool in the same window counts for its mint
+        'raydium': [{'id': 'p1', 'tokenAddress': 'pooled', 'lpAmount': 10}],
+    }
+    prompt, report = build_prompt(events, {}, CONFIG, features=store, prefilter=prefilter)
+    assert [e['mint'] for e in prompt['pumpfun_events']] == ['deep', 'deep2']
+    assert [e['mint'] for e in prompt['raydium_pools']] == ['pooled']
+    assert report['prefilter'] == {'passed': 5, 'blacklisted': 1, 'illiquid': 1}
+    assert report['events_unique'] == 7
+
+
+def test_rules_hot_reload_and_decision_check():
+    prefilter = Prefilter(CONFIG)
+    assert prefilter.check({'action': 'BUY', 'token_mint': 'bad', 'amount_sol': 0.5})['action'] == 'HOLD'
+    assert prefilter.check({'action': 'BUY', 'token_mint': 'ok', 'amount_sol': 3})['amount_sol'] == 1.0
+    prefilter.compile({'token_blacklist': [], 'min_liquidity_sol': 0, 'max_trade_amount_sol': 5})
+    assert prefilter.check({'action': 'BUY', 'token_mint': 'bad', 'amount_sol': 3}) == \
+        {'action': 'BUY', 'token_mint': 'bad', 'amount_sol': 3}
+    assert prefilter.stats()['reloads'] == 2
+
+
+def test_model_not_called_when_no_candidate_passes():
+    calls = []
+
+    async def model(prompt):
+        calls.append(prompt)
+        return {'action': 'BUY', 'token_mint': prompt['pumpfun_events'][0]['mint'], 'amount_sol': 99}
+
+    brain.prefilter.compile(CONFIG)
+    prompt, _ = build_prompt({'pumpfun': [{'mint': 'bad', 'vSolInBondingCurve': 100}]}, {}, CONFIG,
+                             prefilter=brain.prefilter)
+    decision = asyncio.run(brain.decide(prompt, model=model))
+    assert decision['action'] == 'HOLD' and calls == []
+
+    prompt, _ = build_prompt({'pumpfun': [{'mint': 'good', 'vSolInBondingCurve': 100}]}, {}, CONFIG,
+                             prefilter=brain.prefilter)
+    decision = asyncio.run(brain.decide(prompt, model=model))
+    assert decision == {'action': 'BUY', 'token_mint': 'good', 'amount_sol': 1.0}
+    brain.prefilter.compile(brain.config)
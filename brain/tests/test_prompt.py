@@ -0,0 +1,45 @@
+from prompt import build_prompt, compact_raydium, extract_events
+
+
+def test_raydium_pool_is_compacted_to_fixed_schema():
+    pool = {
+        'id': 'pool1',
+        'mintA': {'address': 'mintA', 'symbol': 'AAA', 'logoURI': 'https://example.com/a.png'},
+        'mintB': {'address': 'So11111111111111111111111111111111111111112'},
+        'tvl': '1234.567891',
+        'day': {'volume': 42, 'apr': 1.5},
+        'rewardDefaultInfos': [{'mint': {}}],
+    }
+    assert compact_raydium(pool) == {
+        'pool': 'pool1',
+        'mint': 'mintA',
+        'quote_mint': 'So11111111111111111111111111111111111111112',
+        'liquidity': 1234.5679,
+        'volume_24h': 42.0,
+    }
+
+
+def test_events_are_deduped_and_ranked():
+    payloads = [
+        {'mint': 'a', 'marketCapSol': 10},
+        {'mint': 'b', 'marketCapSol': 50},
+        {'mint': 'a', 'marketCapSol': 70},
+        {'name': 'no mint'},
+    ]
+    events = extract_events('pumpfun', payloads)
+    assert [(e['mint'], e['market_cap_sol']) for e in events] == [('a', 70.0), ('b', 50.0)]
+
+
+def test_prompt_is_truncated_to_budget_keeping_each_type():
+    events = {
+        'pumpfun': [{'mint': f'mint{i}', 'name': 'x' * 40, 'marketCapSol': i} for i in range(200)],
+        'raydium': [{'id': f'pool{i}', 'lpAmount': i} for i in range(200)],
+    }
+    prompt, report = build_prompt(events, {'positions': [], 'pnl': 0, 'extra': 'x' * 1000}, {}, token_budget=300)
+    assert report['events_in'] == 400
+    assert report['truncated']
+    assert report['tokens'] <= 300
+    assert 'extra' not in prompt['portfolio']
+    assert prompt['pumpfun_events'][0]['mint'] == 'mint199'
+    assert prompt['raydium_pools'][0]['pool'] == 'pool199'
+    assert report['events_kept'] == len(prompt['pumpfun_events']) + len(prompt['raydium_pools'])
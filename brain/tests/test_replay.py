@@ -0,0 +1,47 @@
+import asyncio
+
+import brain
+from replay import StubModel, replay
+
+
+async def recorded(signals):
+    for signal in signals:
+        yield signal
+
+
+def make_signals():
+    return [
+        {'type': 'pumpfun', 'ts': 1.0, 'data': {'mint': 'small', 'marketCapSol': 30, 'vSolInBondingCurve': 31}},
+        {'type': 'pumpfun', 'ts': 2.0, 'data': {'mint': 'big', 'marketCapSol': 90, 'vSolInBondingCurve': 45}},
+        {'type': 'twitter', 'ts': 12.0, 'data': {'keyword': 'sol', 'count': 3, 'avg_sentiment': 0.2}},
+        {'type': 'pumpfun', 'ts': 25.0, 'data': {'mint': 'small', 'marketCapSol': 31, 'vSolInBondingCurve': 31}},
+    ]
+
+
+def test_replay_is_deterministic_with_stub_model():
+    model = StubModel(min_market_cap_sol=60)
+    report = asyncio.run(replay(recorded(make_signals()), model=model, window_seconds=10))
+    assert report['events'] == 4
+    assert report['windows'] == 3
+    assert [(d['window_start'], d['action'], d['token_mint']) for d in report['decisions']] == [
+        (0, 'BUY', 'big'), (10, 'HOLD', ''), (20, 'HOLD', '')]
+    # The twitter-only window never reaches the model
+    assert model.calls == 2
+    assert report['actions'] == {'BUY': 1, 'HOLD': 2}
+    assert report['latency_ms']['decide_ms']['p50'] >= 0
+
+
+def test_replay_paces_by_recorded_time():
+    signals = [{'type': 'pumpfun', 'ts': ts, 'data': {'mint': f'm{ts}'}} for ts in (0.0, 1.0, 2.0)]
+    report = asyncio.run(replay(recorded(signals), speed=20, model=StubModel(), window_seconds=10))
+    # 2 seconds of recorded time at 20x takes about 0.1s
+    assert report['elapsed_s'] >= 0.09
+
+
+def test_replay_keeps_sells_as_the_leader():
+    async def sell(prompt):
+        return {'action': 'SELL', 'token_mint': 'big', 'amount_sol': 0.1, 'reason': 'test'}
+
+    report = asyncio.run(replay(recorded(make_signals()[:2]), model=sell, window_seconds=10))
+    assert [d['action'] for d in report['decisions']] == ['SELL']
+    assert not brain.cluster.is_leader
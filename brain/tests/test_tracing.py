@@ -0,0 +1,28 @@
+from tracing import mark, stage_time, window_trace
+from windowing import WindowEngine
+
+
+def traced(kind, ts, trace_id, ingest):
+    return {'type': kind, 'ts': ts, 'data': {}, 'trace': {'id': trace_id, 'stages': {'ingest': ingest}}}
+
+
+def test_mark_records_stage_and_returns_latency_since_ingest():
+    signal = traced('pumpfun', 1, 'a', 100.0)
+    assert mark(signal, 'consumed', 100.25) == 0.25
+    assert stage_time(signal, 'consumed') == 100.25
+    untraced = {'type': 'pumpfun'}
+    assert mark(untraced, 'consumed') == 0.0
+    assert stage_time(untraced, 'consumed') is None
+
+
+def test_window_trace_links_signal_traces():
+    engine = WindowEngine(size=10)
+    engine.add(traced('pumpfun', 1, 'a', 101.0))
+    engine.add(traced('raydium', 2, 'b', 100.5))
+    engine.add({'type': 'twitter', 'ts': 3, 'data': {}})
+    window, = engine.flush()
+    trace = window_trace(window)
+    assert sorted(trace['signals']) == ['a', 'b']
+    assert trace['stages']['first_ingest'] == 100.5
+    assert trace['stages']['window_closed'] == window.closed_at
+    assert len(trace['id']) == 32
@@ -0,0 +1,98 @@
+import asyncio
+
+from windowing import WindowEngine
+
+
+def signal(kind, ts, **data):
+    return {'type': kind, 'data': data, 'ts': ts}
+
+
+def test_tumbling_window_closes_when_watermark_passes_end():
+    engine = WindowEngine(size=30)
+    assert engine.add(signal('pumpfun', 1, mint='a')) == []
+    assert engine.add(signal('raydium', 10, id='p')) == []
+    closed = engine.add(signal('pumpfun', 31, mint='b'))
+    assert len(closed) == 1
+    window = closed[0]
+    assert (window.start, window.end, window.count) == (0, 30, 2)
+    assert window.data('pumpfun') == [{'mint': 'a'}]
+    assert window.data('raydium') == [{'id': 'p'}]
+    assert window.data('twitter') == []
+    assert window.reason == 'watermark'
+
+
+def test_sliding_window_assigns_event_to_overlapping_windows():
+    engine = WindowEngine(size=30, slide=10)
+    engine.add(signal('pumpfun', 25))
+    assert sorted(w.start for w in engine.windows.values()) == [0, 10, 20]
+    closed = engine.add(signal('pumpfun', 41))
+    assert [w.start for w in closed] == [0, 10]
+
+
+def test_fractional_slide_keeps_each_window_under_one_key():
+    engine = WindowEngine(size=0.3, slide=0.1)
+    for n in range(1, 60):
+        engine.add(signal('pumpfun', n * 0.1 + 0.05))
+    closed = engine.flush()
+    starts = [w.start for w in closed]
+    assert len(starts) == len(set(round(s, 9) for s in starts))
+    # Every window that was fully covered saw exactly the three events inside it
+    assert all(w.count == 3 for w in closed[2:-3])
+    assert all(abs(w.end - w.start - 0.3) < 1e-9 for w in closed)
+
+
+def test_max_events_triggers_early_flush():
+    engine = WindowEngine(size=30, max_events=2)
+    assert engine.add(signal('pumpfun', 1)) == []
+    closed = engine.add(signal('pumpfun', 2))
+    assert [(w.count, w.reason) for w in closed] == [(2, 'max_events')]
+    assert engine.windows == {}
+
+
+def test_late_events_within_allowed_lateness_are_kept():
+    engine = WindowEngine(size=10, allowed_lateness=5)
+    engine.add(signal('pumpfun', 12))
+    # Watermark is 7, so the [0, 10) window is still open
+    assert engine.add(signal('pumpfun', 8)) == []
+    closed = engine.add(signal('pumpfun', 16))
+    assert [(w.start, w.count) for w in closed] == [(0, 1)]
+    # [0, 10) has closed, so this one is late
+    assert engine.add(signal('pumpfun', 9)) == []
+    assert engine.late_events == 1
+
+
+def test_timer_closes_window_without_new_events():
+    now = [0.0]
+    engine = WindowEngine(size=1, clock=lambda: now[0])
+    engine.add(signal('twitter', 0.5))
+    emitted = []
+
+    async def emit(window):
+        emitted.append(window)
+
+    async def run():
+        task = asyncio.create_task(engine.run(emit, tick=0.01))
+        now[0] = 1.5
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+    assert [(w.start, w.reason) for w in emitted] == [(0, 'watermark')]
+
+
+def test_lagging_events_are_not_dropped_by_the_timer():
+    # A backlog recorded 100s ago is drained while the timer keeps ticking
+    now = [1000.0]
+    engine = WindowEngine(size=1, allowed_lateness=2, clock=lambda: now[0])
+    closed = []
+    for n in range(100):
+        closed += engine.add(signal('pumpfun', 900 + n * 0.1))
+        now[0] += 0.001
+        if n % 10 == 0:
+            closed += engine.advance(engine.idle_watermark())
+    closed += engine.flush()
+    assert engine.late_events == 0
+    assert sum(w.count for w in closed) == 100
+    # Without new events the watermark still moves on with local time
+    now[0] += 5
+    assert engine.idle_watermark() > 909.9 + 2
@@ -0,0 +1,43 @@
+import time
+import uuid
+
+# Cap on signal trace ids carried by a decision
+MAX_LINKED_TRACES = 100
+
+
+def mark(signal: dict, stage: str, at: float = None) -> float:
+    """Record when `signal` reached `stage`; returns seconds since ingest (0 if untraced)."""
+    trace = signal.get('trace')
+    if not isinstance(trace, dict):
+        return 0.0
+    at = at or time.time()
+    stages = trace.setdefault('stages', {})
+    stages[stage] = at
+    return at - stages.get('ingest', at)
+
+
+def stage_time(signal: dict, stage: str):
+    trace = signal.get('trace')
+    if not isinstance(trace, dict):
+        return None
+    return trace.get('stages', {}).get(stage)
+
+
+def window_trace(window) -> dict:
+    """Start a decision trace linked to the traces of the window's signals."""
+    ids = []
+    first_ingest = None
+    for events in window.events.values():
+        for signal in events:
+            trace = signal.get('trace')
+            if not isinstance(trace, dict):
+                continue
+            if len(ids) < MAX_LINKED_TRACES:
+                ids.append(trace.get('id'))
+            ingest = trace.get('stages', {}).get('ingest')
+            if ingest is not None and (first_ingest is None or ingest < first_ingest):
+                first_ingest = ingest
+    stages = {'window_closed': window.closed_at}
+    if first_ingest is not None:
+        stages['first_ingest'] = first_ingest
+    return {'id': uuid.uuid4().hex, 'signals': ids, 'stages': stages}
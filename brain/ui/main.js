@@ -28,24 +28,55 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
   
-  async function loadStatus() {
-    try {
-      const res = await fetch('/status');
-      const st = await res.json();
-      statusPre.textContent = JSON.stringify(st, null, 2);
-      toggleButtons(st.running);
-    } catch (e) {
-      console.error('Failed to load status', e);
+  // Status pushed by /stream: a snapshot on connect, then JSON merge patches
+  let currentStatus = {};
+  
+  const isObject = (v) => v !== null && typeof v === 'object' && !Array.isArray(v);
+  
+  function applyPatch(target, patch) {
+    for (const [key, value] of Object.entries(patch)) {
+      if (value === null) {
+        delete target[key];
+      } else if (isObject(value) && isObject(target[key])) {
+        applyPatch(target[key], value);
+      } else {
+        target[key] = value;
+      }
     }
   }
   
+  function renderStatus() {
+    statusPre.textContent = JSON.stringify(currentStatus, null, 2);
+    toggleButtons(currentStatus.running);
+  }
+  
+  function connectStream(delay = 1000) {
+    const ws = new WebSocket(
+      (location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/stream'
+    );
+    ws.onopen = () => { delay = 1000; };
+    ws.onmessage = (evt) => {
+      try {
+        const msg = JSON.parse(evt.data);
+        if (msg.type === 'snapshot') {
+          currentStatus = msg.data;
+        } else {
+          applyPatch(currentStatus, msg.data);
+        }
+        renderStatus();
+      } catch (e) {
+        console.error('Invalid status message', e);
+      }
+    };
+    // Reconnect with backoff; the server sends a fresh snapshot on connect
+    ws.onclose = () => setTimeout(() => connectStream(Math.min(delay * 2, 30000)), delay);
+  }
+  
   startBtn.onclick = async () => {
     await fetch('/start', { method: 'POST' });
-    loadStatus();
   };
   stopBtn.onclick = async () => {
     await fetch('/stop', { method: 'POST' });
-    loadStatus();
   };
   
   configForm.onsubmit = async (e) => {
@@ -113,19 +144,5 @@ document.addEventListener('DOMContentLoaded', () => {
   };
   
   loadConfig();
-  loadStatus();
-  setInterval(loadStatus, 5000);
-  
-  const ws = new WebSocket(
-    (location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/stream'
-  );
-  ws.onmessage = (evt) => {
-    try {
-      const msg = JSON.parse(evt.data);
-      statusPre.textContent = JSON.stringify(msg, null, 2);
-      if (msg.running !== undefined) toggleButtons(msg.running);
-    } catch {
-      statusPre.textContent = evt.data;
-    }
-  };
+  connectStream();
 });
\ No newline at end of file
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import math
+import time
+
+# Signal types published by the collector; each window keeps one buffer per type
+SIGNAL_TYPES = ('pumpfun', 'raydium', 'twitter')
+
+
+class Window:
+    """Events collected for one [start, end) interval, partitioned by signal type."""
+
+    def __init__(self, start: float, end: float):
+        self.start = start
+        self.end = end
+        self.events = {t: [] for t in SIGNAL_TYPES}
+        self.count = 0
+        self.reason = None
+        self.closed_at = None
+
+    def add(self, signal: dict):
+        self.events.setdefault(signal.get('type'), []).append(signal)
+        self.count += 1
+
+    def data(self, signal_type: str) -> list:
+        """Payloads of all events of the given type."""
+        return [e.get('data') for e in self.events.get(signal_type, [])]
+
+    def __repr__(self):
+        return f"Window(start={self.start}, end={self.end}, count={self.count}, reason={self.reason})"
+
+
+class WindowEngine:
+    """Event-time tumbling/sliding windows with a watermark.
+
+    Each signal is assigned to every window covering its timestamp (`ts` field,
+    falling back to arrival time). A window is emitted once the watermark passes
+    its end, or early when it holds `max_events` events. The watermark is the
+    newest event time minus `allowed_lateness`; on timer ticks without new
+    events it moves on by the local time passed since that event arrived, so
+    consumer lag or clock skew against the collector never counts as
+    lateness. Events older than an already closed window are dropped
+    and counted in `late_events`. With `slide` equal to `size` (the default)
+    windows are tumbling. Windows are keyed by their integer slide index `k`
+    and start at `k * slide`, so fractional slides never drift into two keys
+    for the same window.
+    """
+
+    def __init__(self, size=30.0, slide=None, max_events=500, allowed_lateness=0.0, clock=time.time):
+        if size <= 0:
+            raise ValueError("Window size must be positive")
+        self.size = float(size)
+        self.slide = float(slide or size)
+        if self.slide <= 0 or self.slide > self.size:
+            raise ValueError("Window slide must be in (0, size]")
+        self.max_events = max_events
+        self.allowed_lateness = float(allowed_lateness)
+        self.clock = clock
+        self.windows = {}
+        self.watermark = float('-inf')
+        self.late_events = 0
+        # Newest event time seen and the local clock when it arrived, for idle advances
+        self.newest_ts = None
+        self.newest_arrival = None
+
+    def _indexes_for(self, ts: float):
+        k = math.floor(ts / self.slide)
+        # Division can round across a boundary; settle k so k * slide <= ts < (k + 1) * slide
+        if k * self.slide > ts:
+            k -= 1
+        elif (k + 1) * self.slide <= ts:
+            k += 1
+        while k * self.slide + self.size > ts:
+            yield k
+            k -= 1
+
+    def add(self, signal: dict, ts: float = None) -> list:
+        """Add a signal and return any windows it caused to close."""
+        if ts is None:
+            ts = signal.get('ts') or self.clock()
+        if self.newest_ts is None or ts > self.newest_ts:
+            self.newest_ts = ts
+            self.newest_arrival = self.clock()
+        closed = []
+        accepted = False
+        for k in self._indexes_for(ts):
+            start = k * self.slide
+            end = start + self.size
+            if end <= self.watermark:
+                continue
+            accepted = True
+            window = self.windows.get(k)
+            if window is None:
+                window = self.windows[k] = Window(start, end)
+            window.add(signal)
+            if self.max_events and window.count >= self.max_events:
+                closed.append(self._close(k, 'max_events'))
+        if not accepted:
+            self.late_events += 1
+            logging.debug(f"Dropping late {signal.get('type')} event at {ts} (watermark {self.watermark})")
+            return closed
+        return closed + self.advance(ts - self.allowed_lateness)
+
+    def advance(self, watermark: float) -> list:
+        """Move the watermark forward and return the windows it closes, oldest first."""
+        if watermark > self.watermark:
+            self.watermark = watermark
+        ready = sorted(k for k, w in self.windows.items() if w.end <= self.watermark)
+        return [self._close(k, 'watermark') for k in ready]
+
+    def flush(self) -> list:
+        """Close and return all open windows."""
+        return [self._close(k, 'flush') for k in sorted(self.windows)]
+
+    def _close(self, k: int, reason: str) -> Window:
+        window = self.windows.pop(k)
+        window.reason = reason
+        window.closed_at = time.time()
+        return window
+
+    def idle_watermark(self):
+        """Watermark implied by the newest event plus the local time passed since it arrived."""
+        if self.newest_ts is None:
+            return None
+        return self.newest_ts + (self.clock() - self.newest_arrival) - self.allowed_lateness
+
+    async def run(self, emit, tick=1.0):
+        """Advance the watermark every `tick` seconds, awaiting `emit` per closed window.
+
+        This keeps windows closing on time even when no new signals arrive.
+        """
+        while True:
+            await asyncio.sleep(tick)
+            watermark = self.idle_watermark()
+            if watermark is None:
+                continue
+            for window in self.advance(watermark):
+                await emit(window)
@@ -0,0 +1,248 @@
+"""Load-test the collector ingest path with synthetic Pump.fun and Raydium events.
+
+Pump.fun events are streamed at --pumpfun-rate from a local WebSocket server
+through the collector's StreamClient; Raydium pools are fed at --raydium-rate
+through the save/publish path watch_raydium uses. RabbitMQ and Postgres are
+in-process stand-ins with configurable latency. Reports throughput, p50/p99
+per stage and memory as JSON.
+
+    python bench_ingest.py --pumpfun-rate 2000 --raydium-rate 200 --duration 10
+    python bench_ingest.py --max-speed --duration 5 --output ingest.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import statistics
+import time
+
+from aiohttp import web
+
+from bench_publish import InProcessExchange, make_signals
+from collector import Collector
+from db_writer import BatchWriter
+
+
+def percentiles(values, scale=1000):
+    """Count and mean/p50/p99/max of `values` (seconds) in milliseconds."""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale
+    return {'count': len(ordered), 'mean': statistics.fmean(ordered) * scale, 'p50': pick(0.5), 'p99': pick(0.99),
+            'max': ordered[-1] * scale}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def paced(rate, duration):
+    """Yield event numbers at `rate` per second (None: as fast as consumed) for `duration` seconds."""
+    started = time.perf_counter()
+    sent = 0
+    while True:
+        elapsed = time.perf_counter() - started
+        if elapsed >= duration:
+            return
+        due = int(elapsed * rate) + 1 if rate else sent + 100
+        while sent < due:
+            yield sent
+            sent += 1
+        await asyncio.sleep(0.001 if rate else 0)
+
+
+def make_pools(count: int) -> list:
+    rng = random.Random(7)
+    pools = []
+    for i in range(count):
+        mint = ''.join(rng.choice('123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz') for _ in range(44))
+        pools.append({
+            'id': f'pool{i}',
+            'baseMint': mint,
+            'quoteMint': 'So11111111111111111111111111111111111111112',
+            'lpAmount': rng.uniform(1, 500),
+            'volume24h': rng.uniform(0, 1e5),
+            'price': rng.uniform(1e-9, 1e-3),
+        })
+    return pools
+
+
+class InProcessWriter(BatchWriter):
+    """BatchWriter whose batches are serialized and held for `latency` seconds instead of sent to Postgres."""
+
+    def __init__(self, latency, **kwargs):
+        super().__init__('postgresql://unused', **kwargs)
+        self.latency = latency
+        self.write_seconds = []
+
+    def _connect(self):
+        return None
+
+    def _write_batch(self, table, rows):
+        started = time.perf_counter()
+        for row in rows:
+            row[-1].dumps(row[-1].adapted)
+        time.sleep(self.latency)
+        self.write_seconds.append(time.perf_counter() - started)
+
+
+class PumpfunServer:
+    """Local stand-in for the Pump.fun WebSocket: streams `events` at `rate` after the subscribe ack.
+
+    `rate` 0 sends nothing; None sends as fast as the collector reads.
+    """
+
+    def __init__(self, events, rate, duration):
+        self.events = events
+        self.rate = rate
+        self.duration = duration
+        self.sent_at = {}
+        self.done = asyncio.Event()
+        self.url = None
+        self._runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/ws', self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.url = f'http://127.0.0.1:{self._runner.addresses[0][1]}/ws'
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subscribe = json.loads((await ws.receive()).data)
+        await ws.send_str(json.dumps({'jsonrpc': '2.0', 'id': subscribe['id'], 'result': 'bench'}))
+        if self.rate != 0:
+            async for n in paced(self.rate, self.duration):
+                data = {**self.events[n % len(self.events)], 'signature': f'bench{n}'}
+                self.sent_at[data['signature']] = time.time()
+                await ws.send_str(json.dumps({'jsonrpc': '2.0', 'method': 'subscribe',
+                                              'params': {'subscription': 'bench', 'result': data}}))
+        self.done.set()
+        # Keep the stream open until the collector disconnects
+        async for _ in ws:
+            pass
+        return ws
+
+
+async def bench(args) -> dict:
+    collector = Collector()
+    collector.db_writer = InProcessWriter(args.db_latency_ms / 1000, batch_size=args.db_batch_size)
+    exchange = InProcessExchange(args.confirm_latency_ms / 1000)
+    await collector.db_writer.start()
+    collector.publisher.start(exchange)
+    collector.broadcast_exchange = exchange
+
+    published = []
+    publish = collector.publisher.publish
+
+    async def record_publish(signal, routing_key=None, exchange=None):
+        published.append(signal)
+        await publish(signal, routing_key=routing_key, exchange=exchange)
+    collector.publisher.publish = record_publish
+
+    events = [s['data'] for s in make_signals(min(args.distinct, 20000))]
+    server = PumpfunServer(events, None if args.max_speed else args.pumpfun_rate, args.duration)
+    await server.start()
+    stages = {'ws_receive': [], 'pumpfun_handler': [], 'raydium_handler': []}
+    handler = collector.on_pumpfun_event
+
+    async def timed_handler(stream, data, received):
+        sent = server.sent_at.pop(data.get('signature'), None)
+        if sent is not None:
+            stages['ws_receive'].append(received - sent)
+        started = time.perf_counter()
+        await handler(stream, data, received)
+        stages['pumpfun_handler'].append(time.perf_counter() - started)
+    collector.pumpfun_stream.url = server.url
+    collector.pumpfun_stream.handler = timed_handler
+    collector.pumpfun_log.interval = float('inf')
+
+    async def feed_raydium():
+        if not args.raydium_rate:
+            return
+        pools = make_pools(min(args.distinct, 20000))
+        async for n in paced(None if args.max_speed else args.raydium_rate, args.duration):
+            started = time.perf_counter()
+            pool = pools[n % len(pools)]
+            await collector.save_new_pools(pool)
+            await collector.publish_signal({'type': 'raydium', 'data': pool})
+            stages['raydium_handler'].append(time.perf_counter() - started)
+
+    rss_before = peak_rss_mb()
+    cpu = time.process_time()
+    started = time.perf_counter()
+    stream = asyncio.create_task(collector.pumpfun_stream.run())
+    await feed_raydium()
+    if args.pumpfun_rate:
+        await server.done.wait()
+    # Let the stream drain what was already sent
+    while ((server.sent_at or len(stages['pumpfun_handler']) < len(stages['ws_receive']))
+           and time.perf_counter() - started < args.duration + 10):
+        await asyncio.sleep(0.01)
+    ingest_seconds = time.perf_counter() - started
+    stream.cancel()
+    await asyncio.gather(stream, return_exceptions=True)
+    await collector.publisher.close()
+    await collector.db_writer.close()
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu
+    await server.stop()
+
+    for name in ('published', 'confirmed'):
+        stages[name] = [s['trace']['stages'][name] - s['trace']['stages']['ingest']
+                        for s in published if name in s['trace']['stages']]
+    stages['db_write'] = collector.db_writer.write_seconds
+    counts = {kind: sum(1 for s in published if s['type'] == kind) for kind in ('pumpfun', 'raydium')}
+    return {
+        'events': len(published),
+        'events_by_type': counts,
+        'elapsed_s': elapsed,
+        'events_per_s': len(published) / ingest_seconds if ingest_seconds else 0.0,
+        'cpu_s': cpu,
+        'confirmed': len(exchange.bodies),
+        'undelivered': len(server.sent_at),
+        'latency_ms': {stage: percentiles(values) for stage, values in stages.items()},
+        'memory': {'peak_rss_mb': peak_rss_mb(), 'peak_rss_growth_mb': peak_rss_mb() - rss_before},
+        'stream': collector.pumpfun_stream.stats(),
+        'publisher': collector.publisher.counters,
+        'db_writer': collector.db_writer.stats(),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pumpfun-rate', type=float, default=1000, help='Pump.fun events/s; 0 disables')
+    parser.add_argument('--raydium-rate', type=float, default=100, help='Raydium pools/s; 0 disables')
+    parser.add_argument('--max-speed', action='store_true', help='Run the enabled generators as fast as possible')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load')
+    parser.add_argument('--distinct', type=int, default=5000, help='Distinct synthetic events cycled through')
+    parser.add_argument('--confirm-latency-ms', type=float, default=0.5, help='Simulated broker confirm round trip')
+    parser.add_argument('--db-latency-ms', type=float, default=2.0, help='Simulated bulk INSERT time per batch')
+    parser.add_argument('--db-batch-size', type=int, default=int(os.getenv('DB_WRITE_BATCH_SIZE', '500')))
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    report = {'args': vars(args), **await bench(args)}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+    else:
+        print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj, default=str).encode()
+
+
+def _orjson_dumps(obj) -> bytes:
+    return orjson.dumps(obj, default=str)
+
+
+def _msgpack_dumps(obj) -> bytes:
+    return msgpack.packb(obj, default=str)
+
+
+# Codec name -> (content type, encoder)
+CODECS = {'json': (JSON, _json_dumps)}
+if orjson is not None:
+    CODECS['orjson'] = (JSON, _orjson_dumps)
+if msgpack is not None:
+    CODECS['msgpack'] = (MSGPACK, _msgpack_dumps)
+
+
+def get_codec(name: str):
+    """Return `(content_type, encode)` for a codec name."""
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Codec {name!r} is not available (installed: {', '.join(CODECS)})")
+    return codec
+
+
+def decode(body: bytes, content_type: str = None):
+    """Decode a message body according to its content type (JSON if unset)."""
+    if content_type == MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack message received but msgpack is not installed")
+        return msgpack.unpackb(body)
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
@@ -1,13 +1,23 @@
 import asyncio
 import os
-import json
 import logging
-from datetime import datetime
+import signal
+import time
+from datetime import datetime, timezone
 import aiohttp
 import aio_pika
-import psycopg2
-import snscrape.modules.twitter as sntwitter
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from psycopg2.extras import Json
+
+from codec import CODECS, get_codec
+from db_writer import BatchWriter
+import metrics
+from publisher import SignalPublisher
+from raydium_watcher import RaydiumPoolWatcher
+from routing import BROADCAST_TYPES, declare_exchanges, partition_key
+from stream_client import LogThrottle, StreamClient
+from twitter_pipeline import TwitterSentimentPipeline
+from tracing import new_trace
+
 
 class Collector:
     def __init__(self):
@@ -15,155 +25,189 @@ class Collector:
         self.rabbit_url = os.getenv("RABBITMQ_URL")
         self.pumpfun_ws_url = os.getenv("PUMPFUN_WS_URL")
         self.raydium_pools_url = os.getenv("RAYDIUM_POOLS_URL")
+        codec_name = os.getenv("SIGNAL_CODEC", "orjson")
+        if codec_name not in CODECS:
+            logging.warning(f"Signal codec {codec_name} unavailable, using json")
+            codec_name = "json"
+        content_type, encode = get_codec(codec_name)
+        self.publisher = SignalPublisher(
+            content_type,
+            encode,
+            batch_size=int(os.getenv("PUBLISH_BATCH_SIZE", "200")),
+            flush_interval=float(os.getenv("PUBLISH_FLUSH_INTERVAL", "0.05")),
+            persistent=os.getenv("PUBLISH_PERSISTENT", "false").lower() in ("1", "true", "yes"),
+            max_retries=int(os.getenv("PUBLISH_MAX_RETRIES", "3")),
+        )
+        self.raydium_watcher = RaydiumPoolWatcher(
+            self.raydium_pools_url,
+            seen_path=os.getenv("RAYDIUM_SEEN_PATH", "data/raydium_seen.json"),
+            max_seen=int(os.getenv("RAYDIUM_MAX_SEEN", "50000")),
+            interval=float(os.getenv("RAYDIUM_POLL_INTERVAL", "90")),
+            min_interval=float(os.getenv("RAYDIUM_POLL_MIN_INTERVAL", "15")),
+            max_interval=float(os.getenv("RAYDIUM_POLL_MAX_INTERVAL", "300")),
+            liquidity_change=float(os.getenv("RAYDIUM_LIQUIDITY_CHANGE", "0.2")),
+        )
         self.twitter_keywords = os.getenv("TWITTER_KEYWORDS", "")
         self.twitter_interval = int(os.getenv("TWITTER_POLL_INTERVAL", "60"))
         self.loop = asyncio.get_event_loop()
         self.rabbit_conn = None
         self.rabbit_channel = None
-        self.analyzer = SentimentIntensityAnalyzer()
+        self.broadcast_exchange = None
+        self.twitter_pipeline = TwitterSentimentPipeline(
+            self.twitter_keywords.split(','),
+            max_tweets=int(os.getenv("TWITTER_MAX_TWEETS", "100")),
+            batch_size=int(os.getenv("TWITTER_SCORE_BATCH_SIZE", "64")),
+            ewma_alpha=float(os.getenv("TWITTER_EWMA_ALPHA", "0.3")),
+        )
+        # Shared batched writer for new_tokens/new_pools/social_metrics
+        self.db_writer = BatchWriter(
+            self.db_url,
+            max_queue=int(os.getenv("DB_WRITE_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("DB_WRITE_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "1.0")),
+            pool_size=int(os.getenv("DB_POOL_SIZE", "4")),
+        )
+        self.maintenance_interval = float(os.getenv("DB_MAINTENANCE_INTERVAL", "3600"))
+        self.partitions_ahead = int(os.getenv("DB_PARTITIONS_AHEAD", "7"))
+        # Expired rows are rolled up; the newest new_tokens/new_pools row per mint
+        # survives in *_latest for the trader (database/migrations/003_retention.sql)
+        self.retention_days = int(os.getenv("DB_RETENTION_DAYS", "14"))
+        # One connection carrying every Pump.fun stream in PUMPFUN_STREAMS
+        sequence_field = os.getenv("PUMPFUN_SEQUENCE_FIELD", "")
+        self.pumpfun_stream = StreamClient(
+            self.pumpfun_ws_url,
+            self.on_pumpfun_event,
+            name="pumpfun",
+            heartbeat=float(os.getenv("PUMPFUN_HEARTBEAT", "15")),
+            idle_timeout=float(os.getenv("PUMPFUN_IDLE_TIMEOUT", "60")),
+            max_backoff=float(os.getenv("PUMPFUN_MAX_BACKOFF", "30")),
+            sequence=(lambda data: data.get(sequence_field)) if sequence_field else None,
+            on_gap=self.on_pumpfun_gap,
+        )
+        for stream in os.getenv("PUMPFUN_STREAMS", "GetPumpFunNewTokensStream").split(','):
+            if stream.strip():
+                self.pumpfun_stream.subscribe(stream.strip(), [stream.strip(), {}])
+        self.pumpfun_log = LogThrottle(float(os.getenv("PUMPFUN_LOG_INTERVAL", "10")))
 
     async def init(self):
+        # Initialize DB writer pool
+        await self.db_writer.start()
         # Initialize RabbitMQ connection
         self.rabbit_conn = await aio_pika.connect_robust(self.rabbit_url)
-        self.rabbit_channel = await self.rabbit_conn.channel()
-        await self.rabbit_channel.declare_queue('signals.raw', durable=True)
-
-    async def publish_signal(self, signal: dict):
-        msg = aio_pika.Message(body=json.dumps(signal).encode())
-        await self.rabbit_channel.default_exchange.publish(msg, routing_key='signals.raw')
-
-    def save_new_tokens(self, data: dict):
-        try:
-            conn = psycopg2.connect(self.db_url)
-            token_mint = data.get('tokenMint') or data.get('mint') or ''
-            with conn.cursor() as cur:
-                cur.execute(
-                    "INSERT INTO new_tokens(token_mint, raw_data) VALUES (%s, %s)",
-                    (token_mint, json.dumps(data))
-                )
-                conn.commit()
-            conn.close()
-        except Exception as e:
-            logging.error(f"Failed to insert new token: {e}")
-
-    def save_new_pools(self, data: dict):
-        try:
-            conn = psycopg2.connect(self.db_url)
-            with conn.cursor() as cur:
-                cur.execute(
-                    "INSERT INTO new_pools(pool_data) VALUES (%s)",
-                    (json.dumps(data),)
-                )
-                conn.commit()
-            conn.close()
-        except Exception as e:
-            logging.error(f"Failed to insert new pool: {e}")
-
-    def save_social_metrics(self, data: dict):
-        try:
-            conn = psycopg2.connect(self.db_url)
-            with conn.cursor() as cur:
-                cur.execute(
-                    "INSERT INTO social_metrics(metrics) VALUES (%s)",
-                    (json.dumps(data),)
-                )
-                conn.commit()
-            conn.close()
-        except Exception as e:
-            logging.error(f"Failed to insert social metric: {e}")
+        self.rabbit_channel = await self.rabbit_conn.channel(publisher_confirms=True)
+        # Signals are partitioned by mint across brain replicas (see routing.py)
+        signals_exchange, self.broadcast_exchange = await declare_exchanges(self.rabbit_channel)
+        self.publisher.start(signals_exchange)
+
+    async def publish_signal(self, signal: dict, ingested_at: float = None):
+        ingested_at = ingested_at or time.time()
+        # Event time used by brain's windowing, plus a trace followed through to signals.decoded
+        signal.setdefault('ts', ingested_at)
+        signal['trace'] = new_trace(ingested_at)
+        metrics.EVENTS.labels(signal.get('type')).inc()
+        if signal.get('type') in BROADCAST_TYPES:
+            await self.publisher.publish(signal, exchange=self.broadcast_exchange)
+        else:
+            # Signals without a mint are spread by their trace id
+            await self.publisher.publish(signal, routing_key=partition_key(signal) or signal['trace']['id'])
+
+    async def close(self):
+        """Flush pending DB writes and close connections."""
+        await self.db_writer.close()
+        self.twitter_pipeline.close()
+        await self.publisher.close()
+        if self.rabbit_conn:
+            await self.rabbit_conn.close()
+
+    async def save_new_tokens(self, data: dict):
+        token_mint = data.get('tokenMint') or data.get('mint') or ''
+        await self.db_writer.put('new_tokens', (token_mint, Json(data)))
+
+    async def save_new_pools(self, data: dict):
+        await self.db_writer.put('new_pools', (Json(data),))
+
+    async def save_social_metrics(self, data: dict):
+        await self.db_writer.put('social_metrics', (Json(data),))
 
     async def watch_pumpfun(self):
         logging.info("Starting watch_pumpfun")
-        # Continuously connect and listen, with reconnection logic
-        while True:
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.ws_connect(self.pumpfun_ws_url) as ws:
-                        logging.info("Connected to Pump.fun WebSocket")
-                        # Subscribe to PumpFun stream
-                        subscribe_payload = {
-                            "jsonrpc": "2.0",
-                            "id": 1,
-                            "method": "subscribe",
-                            "params": ["GetPumpFunNewTokensStream", {}]
-                        }
-                        await ws.send_json(subscribe_payload)
-                        async for msg in ws:
-                            if msg.type == aiohttp.WSMsgType.TEXT:
-                                try:
-                                    raw = json.loads(msg.data)
-                                    # Extract actual event payload
-                                    data = raw.get('params', {}).get('result', raw)
-                                    # Log pumpfun event
-                                    mint = data.get('mint') or data.get('tokenMint')
-                                    logging.info(f"Pumpfun event received: mint={mint}")
-                                except Exception:
-                                    logging.error("Invalid JSON from pumpfun WebSocket")
-                                    continue
-                                # Save to DB and publish
-                                self.loop.run_in_executor(None, self.save_new_tokens, data)
-                                await self.publish_signal({"type": "pumpfun", "data": data})
-                            elif msg.type == aiohttp.WSMsgType.ERROR:
-                                logging.error("Pumpfun WS error, reconnecting")
-                                break
-            except Exception as e:
-                logging.error(f"Pumpfun WebSocket connection failed: {e}")
-            # Wait before reconnect attempt
-            await asyncio.sleep(5)
+        await self.pumpfun_stream.run()
+
+    async def on_pumpfun_event(self, stream: str, data: dict, received: float):
+        if not isinstance(data, dict):
+            return
+        mint = data.get('mint') or data.get('tokenMint')
+        logging.debug(f"Pumpfun event received: stream={stream} mint={mint}")
+        count = self.pumpfun_log()
+        if count:
+            logging.info(f"Pumpfun: {count} event(s) since last report, latest mint={mint}")
+        # Save to DB and publish
+        await self.save_new_tokens(data)
+        await self.publish_signal({"type": "pumpfun", "data": data}, received)
+
+    async def on_pumpfun_gap(self, gap: dict):
+        """Backfill hook for missed Pump.fun events.
+
+        The stream has no replay endpoint yet, so gaps are only logged (and
+        counted in collector_stream_gaps_total).
+        """
+        if gap['kind'] == 'sequence':
+            logging.warning(f"Pumpfun {gap['stream']} skipped events {gap['from_seq']}..{gap['to_seq']}")
+        else:
+            logging.warning(f"Pumpfun {gap['stream']} was disconnected for {gap['until'] - gap['since']:.1f}s")
 
     async def watch_raydium(self):
         logging.info("Starting watch_raydium")
+        self.raydium_watcher.load()
         async with aiohttp.ClientSession() as session:
             while True:
+                pools = []
                 try:
-                    resp = await session.get(self.raydium_pools_url)
-                    data = await resp.json()
-                    # Assume data is a list of pools
-                    for pool in data:
-                        # Log raydium pool event
+                    # Only pools not seen before (or materially changed) are returned
+                    pools = await self.raydium_watcher.poll(session)
+                    for pool in pools:
                         logging.info(f"Raydium new pool: {pool.get('id') or pool.get('address')}")
-                        self.loop.run_in_executor(None, self.save_new_pools, pool)
+                        await self.save_new_pools(pool)
                         await self.publish_signal({"type": "raydium", "data": pool})
                 except Exception as e:
                     logging.error(f"Error polling raydium: {e}")
-                await asyncio.sleep(90)
-
-    def fetch_twitter_metrics(self, since):
-        """Synchronous scrape of Twitter keywords since a given time."""
-        metrics = []
-        for keyword in self.twitter_keywords.split(','):
-            keyword = keyword.strip()
-            count = 0
-            sentiment_total = 0.0
-            # Limit to max 100 tweets
-            for tweet in sntwitter.TwitterSearchScraper(keyword).get_items():
-                if tweet.date < since or count >= 100:
-                    break
-                count += 1
-                score = self.analyzer.polarity_scores(tweet.content)['compound']
-                sentiment_total += score
-            avg_sentiment = sentiment_total / count if count > 0 else 0.0
-            metrics.append({'keyword': keyword, 'count': count, 'avg_sentiment': avg_sentiment, 'since': since.isoformat()})
-        return metrics
+                interval = self.raydium_watcher.next_interval(len(pools))
+                logging.info(f"Raydium poll found {len(pools)} new/changed pools; next poll in {interval:.0f}s")
+                await asyncio.sleep(interval)
 
     async def watch_twitter(self):
         logging.info("Starting watch_twitter")
-        prev_time = datetime.utcnow()
+        prev_time = datetime.now(timezone.utc)
         while True:
-            now = datetime.utcnow()
+            now = datetime.now(timezone.utc)
             try:
-                metrics_list = await self.loop.run_in_executor(None, self.fetch_twitter_metrics, prev_time)
+                # Keywords are scraped concurrently and only new tweets are scored
+                metrics_list = await self.twitter_pipeline.poll(prev_time)
                 for metric in metrics_list:
                     # Save and publish each metric
-                    await self.loop.run_in_executor(None, self.save_social_metrics, metric)
+                    await self.save_social_metrics(metric)
                     await self.publish_signal({'type': 'twitter', 'data': metric})
             except Exception as e:
                 logging.error(f"Error in watch_twitter: {e}")
             prev_time = now
             await asyncio.sleep(self.twitter_interval)
 
+    async def maintain_database(self):
+        """Periodically create upcoming partitions and roll up expired ones."""
+        logging.info("Starting maintain_database")
+        while True:
+            try:
+                created, dropped = await self.db_writer.maintain_partitions(self.partitions_ahead,
+                                                                            self.retention_days)
+                logging.info(f"Partition maintenance: {created} created, {dropped} rolled up and dropped")
+            except Exception as e:
+                logging.error(f"Partition maintenance failed: {e}")
+            await asyncio.sleep(self.maintenance_interval)
+
+
 async def main():
     logging.basicConfig(level=logging.INFO)
+    metrics.serve(int(os.getenv("METRICS_PORT", "9100")))
     collector = Collector()
     await collector.init()
     tasks = [
@@ -171,7 +215,19 @@ async def main():
         asyncio.create_task(collector.watch_raydium()),
         # asyncio.create_task(collector.watch_twitter()) # Disabled twitter for now due to SSL errors
     ]
-    await asyncio.gather(*tasks)
+    if collector.maintenance_interval > 0:
+        tasks.append(asyncio.create_task(collector.maintain_database()))
+    # Cancel the watchers on SIGTERM/SIGINT so queued rows are flushed before exit
+    gathered = asyncio.gather(*tasks)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, gathered.cancel)
+    try:
+        await gathered
+    except asyncio.CancelledError:
+        logging.info("Collector shutting down")
+    finally:
+        await collector.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
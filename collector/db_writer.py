@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import execute_values
+
+import metrics
+
+# Tables the collector writes to and the columns each row provides
+TABLES = {
+    'new_tokens': ('token_mint', 'raw_data'),
+    'new_pools': ('pool_data',),
+    'social_metrics': ('metrics',),
+}
+
+# Queue marker telling the writer loop to flush everything and exit
+_CLOSE = object()
+
+
+class BatchWriter:
+    """Pooled Postgres writer that bulk-inserts queued rows.
+
+    Producers `await put(table, row)`; rows are buffered per table and written
+    with a single multi-row INSERT once `batch_size` rows are pending or
+    `flush_interval` seconds have passed. The bounded queue gives backpressure:
+    when Postgres falls behind, `put` waits instead of growing memory.
+    """
+
+    def __init__(self, db_url, max_queue=10000, batch_size=500, flush_interval=1.0, pool_size=4):
+        self.db_url = db_url
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pool_size = pool_size
+        self.pool = None
+        self.queue = None
+        self._executor = None
+        self._task = None
+        self._flush_slots = None
+        self._flushes = set()
+        self._pending = {table: [] for table in TABLES}
+        self.counters = {
+            'enqueued': 0,
+            'rows_written': 0,
+            'batches': 0,
+            'errors': 0,
+            'last_batch_size': 0,
+            'max_queue_depth': 0,
+            'flush_latency_ms_last': 0.0,
+            'flush_latency_ms_max': 0.0,
+            'flush_latency_ms_total': 0.0,
+        }
+
+    async def start(self):
+        """Open the connection pool and start the background flush loop."""
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._flush_slots = asyncio.Semaphore(self.pool_size)
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='db-writer')
+        loop = asyncio.get_running_loop()
+        self.pool = await loop.run_in_executor(self._executor, self._connect)
+        self._task = asyncio.create_task(self._run())
+        metrics.DB_QUEUE_DEPTH.set_function(self.queue.qsize)
+
+    def _connect(self):
+        return ThreadedConnectionPool(1, self.pool_size, self.db_url)
+
+    async def put(self, table: str, row: tuple):
+        """Queue a row for `table`, waiting while the queue is full."""
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        await self.queue.put((table, row))
+        self.counters['enqueued'] += 1
+        depth = self.queue.qsize()
+        if depth > self.counters['max_queue_depth']:
+            self.counters['max_queue_depth'] = depth
+
+    async def close(self):
+        """Flush all queued rows, wait for in-flight batches and close the pool."""
+        if self._task is None:
+            return
+        await self.queue.put(_CLOSE)
+        await self._task
+        self._task = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes)
+        if self.pool is not None:
+            self.pool.closeall()
+            self.pool = None
+        self._executor.shutdown(wait=True)
+        logging.info(f"DB writer closed: {self.stats()}")
+
+    def stats(self) -> dict:
+        """Snapshot of writer counters, including current queue depth and averages."""
+        batches = self.counters['batches']
+        stats = dict(self.counters)
+        stats['queue_depth'] = self.queue.qsize() if self.queue is not None else 0
+        stats['avg_batch_size'] = self.counters['rows_written'] / batches if batches else 0.0
+        stats['flush_latency_ms_avg'] = self.counters['flush_latency_ms_total'] / batches if batches else 0.0
+        return stats
+
+    async def _run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(deadline - time.monotonic(), 0)
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+            if item is _CLOSE:
+                await self._flush_all()
+                return
+            if item is not None:
+                table, row = item
+                pending = self._pending[table]
+                pending.append(row)
+                if len(pending) >= self.batch_size:
+                    await self._schedule(table)
+            if time.monotonic() >= deadline:
+                await self._flush_all()
+                deadline = time.monotonic() + self.flush_interval
+
+    async def _flush_all(self):
+        for table, rows in self._pending.items():
+            if rows:
+                await self._schedule(table)
+
+    async def _schedule(self, table):
+        # Hand the pending rows to a flush task; at most pool_size run at once
+        rows = self._pending[table]
+        self._pending[table] = []
+        await self._flush_slots.acquire()
+        task = asyncio.create_task(self._flush(table, rows))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, table, rows):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            await loop.run_in_executor(self._executor, self._write_batch, table, rows)
+        except Exception as e:
+            self.counters['errors'] += 1
+            metrics.DB_ERRORS.labels(table).inc()
+            logging.error(f"Failed to insert {len(rows)} rows into {table}: {e}")
+            return
+        finally:
+            self._flush_slots.release()
+        latency = time.perf_counter() - started
+        metrics.DB_FLUSH_SECONDS.labels(table).observe(latency)
+        metrics.DB_BATCH_ROWS.labels(table).observe(len(rows))
+        latency_ms = latency * 1000
+        self.counters['batches'] += 1
+        self.counters['rows_written'] += len(rows)
+        self.counters['last_batch_size'] = len(rows)
+        self.counters['flush_latency_ms_last'] = latency_ms
+        self.counters['flush_latency_ms_total'] += latency_ms
+        if latency_ms > self.counters['flush_latency_ms_max']:
+            self.counters['flush_latency_ms_max'] = latency_ms
+
+    async def maintain_partitions(self, days_ahead=7, retention_days=14):
+        """Create upcoming daily partitions and roll up and drop expired ones.
+
+        Runs `maintain_partitions()` from database/migrations/003_retention.sql
+        and returns the number of partitions created and dropped.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._maintain_partitions, days_ahead, retention_days)
+
+    def _maintain_partitions(self, days_ahead, retention_days):
+        conn = self.pool.getconn()
+        broken = False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT * FROM maintain_partitions(%s, make_interval(days => %s))",
+                            (days_ahead, retention_days))
+                created, dropped = cur.fetchone()
+            conn.commit()
+            return created, dropped
+        except Exception:
+            broken = conn.closed != 0
+            if not broken:
+                conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn, close=broken)
+
+    def _write_batch(self, table, rows):
+        """Insert rows with one multi-row VALUES statement (runs in the writer thread pool)."""
+        columns = ', '.join(TABLES[table])
+        conn = self.pool.getconn()
+        broken = False
+        try:
+            with conn.cursor() as cur:
+                execute_values(cur, f"INSERT INTO {table} ({columns}) VALUES %s", rows, page_size=len(rows))
+            conn.commit()
+        except Exception:
+            # Drop the connection so the pool replaces it if it went bad
+            broken = conn.closed != 0
+            if not broken:
+                conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn, close=broken)
@@ -0,0 +1,28 @@
+import logging
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+EVENTS = Counter('collector_events_total', 'Events ingested', ['type'])
+STAGE_SECONDS = Histogram('collector_stage_seconds', 'Seconds from ingest to each collector stage', ['stage'],
+                          buckets=LATENCY_BUCKETS)
+PUBLISH_BUFFER = Gauge('collector_publish_buffer', 'Signals waiting to be published')
+PUBLISH_RETRIES = Counter('collector_publish_retries_total', 'Unconfirmed signals requeued for another publish')
+PUBLISH_UNROUTABLE = Counter('collector_publish_unroutable_total', 'Signals returned because no queue was bound')
+PUBLISH_FAILURES = Counter('collector_publish_failures_total', 'Signals dropped after the broker did not confirm them')
+DB_QUEUE_DEPTH = Gauge('collector_db_queue_depth', 'Rows waiting in the DB writer queue')
+DB_BATCH_ROWS = Histogram('collector_db_batch_rows', 'Rows per bulk insert', ['table'],
+                          buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000))
+DB_FLUSH_SECONDS = Histogram('collector_db_flush_seconds', 'Bulk insert latency', ['table'], buckets=LATENCY_BUCKETS)
+DB_ERRORS = Counter('collector_db_errors_total', 'Failed bulk inserts', ['table'])
+STREAM_MESSAGES = Counter('collector_stream_messages_total', 'WebSocket stream events received', ['stream'])
+STREAM_RECONNECTS = Counter('collector_stream_reconnects_total', 'WebSocket stream disconnects', ['stream'])
+STREAM_GAPS = Counter('collector_stream_gaps_total', 'Detected WebSocket stream gaps', ['stream', 'kind'])
+
+
+def serve(port: int):
+    """Expose /metrics for Prometheus on `port` (0 disables)."""
+    if port:
+        start_http_server(port)
+        logging.info(f"Metrics server listening on :{port}")
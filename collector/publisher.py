@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+
+import aio_pika
+from aiormq.abc import DeliveredMessage
+
+import metrics
+from stream_client import LogThrottle
+from tracing import mark
+
+
+class SignalPublisher:
+    """Batched publisher for signals.raw.
+
+    Signals are buffered and published in batches of up to `batch_size`, or
+    every `flush_interval` seconds. All publishes of a batch are pipelined and
+    their publisher confirms awaited together, instead of one round trip per
+    message. When the buffer holds `max_buffer` signals, `publish` waits for
+    the next flush. Signals the broker does not confirm are put back at the
+    head of the buffer and retried with the next flush, up to `max_retries`
+    times before they are dropped and counted as failed. Signals are
+    published as mandatory; those the broker returns because no queue is
+    bound (e.g. no brain replica has declared its queue) are counted and
+    logged as unroutable instead of passing for confirmed.
+    """
+
+    def __init__(self, content_type, encode, routing_key='signals.raw', batch_size=200, flush_interval=0.05,
+                 persistent=False, max_buffer=10000, max_retries=3):
+        self.content_type = content_type
+        self.encode = encode
+        self.routing_key = routing_key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.delivery_mode = aio_pika.DeliveryMode.PERSISTENT if persistent else None
+        self.max_buffer = max_buffer
+        self.max_retries = max_retries
+        self.exchange = None
+        self._buffer = []
+        self._lock = None
+        self._has_room = None
+        self._task = None
+        self._unroutable_log = LogThrottle(30.0)
+        self.counters = {'published': 0, 'batches': 0, 'retried': 0, 'failed': 0, 'unroutable': 0,
+                         'last_batch_size': 0, 'confirm_latency_ms_last': 0.0}
+
+    def start(self, exchange):
+        self.exchange = exchange
+        self._lock = asyncio.Lock()
+        self._has_room = asyncio.Event()
+        self._has_room.set()
+        self._task = asyncio.create_task(self._run())
+        metrics.PUBLISH_BUFFER.set_function(lambda: len(self._buffer))
+
+    async def publish(self, signal: dict, routing_key: str = None, exchange=None):
+        """Buffer a signal for `exchange` (default: the one given to `start`)."""
+        while len(self._buffer) >= self.max_buffer:
+            self._has_room.clear()
+            await self._has_room.wait()
+        self._buffer.append((exchange or self.exchange, routing_key or self.routing_key, signal, 0))
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Publish everything buffered and wait for the broker's confirms.
+
+        Stops early after a batch with unconfirmed signals, leaving them for
+        the next flush to retry.
+        """
+        async with self._lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                if await self._publish_batch(batch):
+                    break
+            self._has_room.set()
+
+    async def close(self):
+        """Stop the flush timer and drain the buffer, including retries."""
+        if self._task is None:
+            return
+        # Holding the lock means no flush is in flight, so cancelling cannot cut a batch short
+        async with self._lock:
+            self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        while self._buffer:
+            await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buffer:
+                await self.flush()
+
+    async def _publish_batch(self, batch) -> int:
+        """Publish one batch and return how many signals were requeued for retry."""
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *[exchange.publish(self._message(signal), routing_key=key, mandatory=True)
+              for exchange, key, signal, _ in batch],
+            return_exceptions=True,
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        # A returned message comes back as the result instead of the broker's ack
+        unroutable = sum(1 for r in results if isinstance(r, DeliveredMessage))
+        confirmed_at = time.time()
+        retry = []
+        dropped = 0
+        for (exchange, key, signal, attempts), result in zip(batch, results):
+            if isinstance(result, DeliveredMessage):
+                continue
+            if not isinstance(result, Exception):
+                metrics.STAGE_SECONDS.labels('confirmed').observe(mark(signal, 'confirmed', confirmed_at))
+            elif attempts < self.max_retries:
+                retry.append((exchange, key, signal, attempts + 1))
+            else:
+                dropped += 1
+        # Retries go back to the head of the buffer so signals keep their order as far as possible
+        self._buffer[:0] = retry
+        metrics.PUBLISH_RETRIES.inc(len(retry))
+        metrics.PUBLISH_FAILURES.inc(dropped)
+        metrics.PUBLISH_UNROUTABLE.inc(unroutable)
+        self.counters['published'] += len(batch) - len(failures) - unroutable
+        self.counters['unroutable'] += unroutable
+        self.counters['retried'] += len(retry)
+        self.counters['failed'] += dropped
+        self.counters['batches'] += 1
+        self.counters['last_batch_size'] = len(batch)
+        self.counters['confirm_latency_ms_last'] = (time.perf_counter() - started) * 1000
+        if failures:
+            logging.error(f"{len(failures)}/{len(batch)} signals not confirmed ({len(retry)} requeued, "
+                          f"{dropped} dropped): {failures[0]!r}")
+        if unroutable and self._unroutable_log():
+            logging.warning(f"{self.counters['unroutable']} signals returned as unroutable so far; "
+                            f"is a brain replica running and bound to its queue?")
+        return len(retry)
+
+    def _message(self, signal):
+        metrics.STAGE_SECONDS.labels('published').observe(mark(signal, 'published'))
+        trace = signal.get('trace')
+        return aio_pika.Message(
+            body=self.encode(signal),
+            content_type=self.content_type,
+            delivery_mode=self.delivery_mode,
+            message_id=trace['id'] if trace else None,
+        )
@@ -0,0 +1,231 @@
+import asyncio
+import codecs
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+
+# Pool fields that move on every poll; they are left out of the change fingerprint
+VOLATILE_FIELDS = {
+    'price', 'tvl', 'liquidity', 'lpAmount', 'lpPrice', 'tokenAmountCoin', 'tokenAmountPc', 'tokenAmountLp',
+    'volume24h', 'volume7d', 'volume30d', 'fee24h', 'fee7d', 'fee30d', 'apr24h', 'apr7d', 'apr30d',
+    'mintAmountA', 'mintAmountB', 'day', 'week', 'month', 'farmUpcomingCount', 'farmOngoingCount',
+}
+
+
+def pool_id(pool: dict):
+    return pool.get('id') or pool.get('address') or pool.get('ammId')
+
+
+def pool_liquidity(pool: dict) -> float:
+    for key in ('lpAmount', 'liquidity', 'tvl'):
+        try:
+            return float(pool[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 0.0
+
+
+def pool_fingerprint(pool: dict) -> str:
+    stable = {k: v for k, v in pool.items() if k not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _pools_in(document):
+    """Find the pool list inside a non-array response body."""
+    if isinstance(document, list):
+        return document
+    if not isinstance(document, dict):
+        return []
+    data = document.get('data')
+    if isinstance(data, (list, dict)):
+        return _pools_in(data)
+    # e.g. {"official": [...], "unOfficial": [...]}
+    pools = []
+    for value in document.values():
+        if isinstance(value, list):
+            pools.extend(value)
+    return pools
+
+
+async def iter_json_array(chunks):
+    """Yield elements of a JSON document streamed as byte chunks.
+
+    A top-level array is decoded element by element as bytes arrive, so the
+    full list is never held in memory. Any other document is buffered and
+    its pool list extracted once complete.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = 0
+    streaming = None
+    done = False
+    async for chunk in chunks:
+        buf += utf8.decode(chunk)
+        if streaming is None:
+            stripped = buf.lstrip()
+            if not stripped:
+                continue
+            streaming = stripped[0] == '['
+            if streaming:
+                pos = buf.index('[') + 1
+        if not streaming or done:
+            continue
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == ']':
+                done = True
+                break
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break
+            # A value ending exactly at the buffer edge may be truncated (e.g. a number)
+            if end >= len(buf):
+                break
+            yield item
+            pos = end
+        buf = buf[pos:]
+        pos = 0
+    buf += utf8.decode(b'', final=True)
+    if streaming is False:
+        for item in _pools_in(json.loads(buf)):
+            yield item
+    elif streaming and not done:
+        raise ValueError("Truncated JSON array in response")
+
+
+class RaydiumPoolWatcher:
+    """Incremental poller that only reports new or changed Raydium pools.
+
+    Seen pools are kept in a bounded LRU index (persisted to `seen_path`);
+    the bound grows to the size of the latest response, so pools still
+    listed upstream are never evicted and re-emitted. Requests are
+    conditional on the previous ETag/Last-Modified, and the poll interval
+    halves after a poll with changes and grows by half after a quiet one,
+    within [min_interval, max_interval].
+    """
+
+    def __init__(self, url, seen_path=None, max_seen=50000, interval=90.0, min_interval=15.0,
+                 max_interval=300.0, liquidity_change=0.2):
+        self.url = url
+        self.seen_path = seen_path
+        self.max_seen = max_seen
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.liquidity_change = liquidity_change
+        self.seen = OrderedDict()
+        self.etag = None
+        self.last_modified = None
+
+    def load(self):
+        """Restore the seen-pool index from disk, if present."""
+        if not self.seen_path or not os.path.exists(self.seen_path):
+            return
+        try:
+            with open(self.seen_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not load Raydium seen-pool index: {e}")
+            return
+        self.seen = OrderedDict((k, tuple(v)) for k, v in state.get('pools', []))
+        self.etag = state.get('etag')
+        self.last_modified = state.get('last_modified')
+        logging.info(f"Loaded {len(self.seen)} seen Raydium pools")
+
+    def save(self):
+        """Atomically write the seen-pool index to disk."""
+        if not self.seen_path:
+            return
+        directory = os.path.dirname(self.seen_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'pools': [[k, list(v)] for k, v in self.seen.items()],
+        }
+        tmp_path = f"{self.seen_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.seen_path)
+
+    def observe(self, pool: dict, evict=True) -> bool:
+        """Record a pool and return True if it is new or has changed since it was last reported.
+
+        With `evict` False the index may exceed `max_seen` until `evict()` is called.
+        """
+        if not isinstance(pool, dict):
+            return False
+        key = pool_id(pool)
+        if key is None:
+            return False
+        fingerprint = pool_fingerprint(pool)
+        liquidity = pool_liquidity(pool)
+        previous = self.seen.get(key)
+        changed = previous is None or self._changed(previous, fingerprint, liquidity)
+        # Keep the liquidity last reported, so gradual drift adds up until it is reported
+        if changed:
+            self.seen[key] = (fingerprint, liquidity)
+        self.seen.move_to_end(key)
+        if evict:
+            self.evict()
+        return changed
+
+    def _changed(self, previous, fingerprint, liquidity) -> bool:
+        old_fingerprint, old_liquidity = previous
+        if old_fingerprint != fingerprint:
+            return True
+        if old_liquidity == liquidity:
+            return False
+        base = max(abs(old_liquidity), 1e-9)
+        return abs(liquidity - old_liquidity) / base >= self.liquidity_change
+
+    def evict(self, keep=0):
+        """Drop the least recently seen pools beyond max(max_seen, keep)."""
+        while len(self.seen) > max(self.max_seen, keep):
+            self.seen.popitem(last=False)
+
+    async def poll(self, session) -> list:
+        """Fetch the pool list and return the pools that are new or changed."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        changed = []
+        listed = set()
+        async with session.get(self.url, headers=headers) as resp:
+            if resp.status == 304:
+                return changed
+            resp.raise_for_status()
+            async for pool in iter_json_array(resp.content.iter_any()):
+                # Evict once the whole list is seen, so a response never pushes out its own pools
+                if self.observe(pool, evict=False):
+                    changed.append(pool)
+                if isinstance(pool, dict) and pool_id(pool) is not None:
+                    listed.add(pool_id(pool))
+            self.etag = resp.headers.get('ETag')
+            self.last_modified = resp.headers.get('Last-Modified')
+        if len(listed) > self.max_seen:
+            logging.warning(f"Raydium lists {len(listed)} pools, more than RAYDIUM_MAX_SEEN={self.max_seen}; "
+                            f"keeping them all in the seen-pool index")
+        # Pools in this response were just moved to the LRU tail, so only unlisted ones are evicted
+        self.evict(keep=len(listed))
+        if changed:
+            await asyncio.get_running_loop().run_in_executor(None, self.save)
+        return changed
+
+    def next_interval(self, changed: int) -> float:
+        """Adapt the poll interval to the observed rate of change."""
+        if changed:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        return self.interval
@@ -0,0 +1,39 @@
+"""Routing of signals.raw across brain replicas.
+
+Pump.fun and Raydium signals go to a consistent-hash exchange keyed by token
+mint, so every event of a mint reaches the same brain replica. Signals every
+replica needs (keyword sentiment) go to a fanout exchange.
+"""
+import aio_pika
+
+SIGNALS_EXCHANGE = 'signals.raw'
+BROADCAST_EXCHANGE = 'signals.broadcast'
+# Needs the rabbitmq_consistent_hash_exchange plugin
+CONSISTENT_HASH = 'x-consistent-hash'
+BROADCAST_TYPES = frozenset({'twitter'})
+
+
+def partition_key(signal: dict):
+    """Token mint a signal is about, or None."""
+    data = signal.get('data')
+    if not isinstance(data, dict):
+        return None
+    kind = signal.get('type')
+    if kind == 'pumpfun':
+        return data.get('mint') or data.get('tokenMint') or None
+    if kind == 'raydium':
+        for key in ('tokenAddress', 'baseMint', 'mintA'):
+            value = data.get(key)
+            # Raydium v3 nests mints as {"address": ...}
+            if isinstance(value, dict):
+                value = value.get('address')
+            if value:
+                return value
+    return None
+
+
+async def declare_exchanges(channel):
+    """Declare the signals and broadcast exchanges; returns both."""
+    signals = await channel.declare_exchange(SIGNALS_EXCHANGE, CONSISTENT_HASH, durable=True)
+    broadcast = await channel.declare_exchange(BROADCAST_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True)
+    return signals, broadcast
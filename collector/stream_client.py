@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+import aiohttp
+
+import metrics
+from codec import decode
+
+
+class LogThrottle:
+    """Let a log line through at most once per `interval` seconds.
+
+    Calling it returns 0 while throttled, otherwise the number of calls since
+    the last line that got through (including this one), for summaries.
+    """
+
+    def __init__(self, interval=10.0, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.count = 0
+        self._next = 0.0
+
+    def __call__(self) -> int:
+        self.count += 1
+        now = self.clock()
+        if now < self._next:
+            return 0
+        self._next = now + self.interval
+        count, self.count = self.count, 0
+        return count
+
+
+class StreamClient:
+    """Resilient JSON-RPC WebSocket ingest for one endpoint.
+
+    All `subscribe`d streams are multiplexed over one connection and
+    re-subscribed on every reconnect; notifications are routed back to
+    their stream by subscription id and passed to `await handler(stream,
+    data, received_at)`. The aiohttp session is created once and reused.
+    Pings are sent every `heartbeat` seconds and a connection silent for
+    `idle_timeout` seconds is dropped. Reconnects back off exponentially
+    with jitter, resetting once data flows again. Any error raised while
+    reading or handling (other than cancellation) ends the connection and
+    is retried the same way.
+
+    With a `sequence(data)` function, duplicate or replayed events are
+    dropped and missing sequence numbers are reported to `on_gap`, as is
+    the time a stream was disconnected, so a backfill can fill the hole.
+    Sequence tracking starts over on each connection.
+    """
+
+    def __init__(self, url, handler, name='stream', session=None, heartbeat=15.0, idle_timeout=60.0,
+                 min_backoff=0.5, max_backoff=30.0, sequence=None, on_gap=None):
+        self.url = url
+        self.handler = handler
+        self.name = name
+        self.session = session
+        self.heartbeat = heartbeat
+        self.idle_timeout = idle_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.sequence = sequence
+        self.on_gap = on_gap
+        self.subscriptions = {}
+        self.last_seq = {}
+        self.connected = False
+        self.disconnected_at = None
+        self._backoff = min_backoff
+        self._gap_tasks = set()
+        self._error_log = LogThrottle()
+        self.counters = {'connects': 0, 'messages': 0, 'invalid': 0, 'duplicates': 0, 'gaps': 0, 'errors': 0}
+
+    def subscribe(self, stream: str, params, method='subscribe'):
+        """Add a stream, subscribed with `method(params)` on every connection."""
+        self.subscriptions[stream] = (method, params)
+
+    async def run(self):
+        """Connect and consume forever, reconnecting with backoff."""
+        own_session = self.session is None
+        if own_session:
+            self.session = aiohttp.ClientSession()
+        try:
+            while True:
+                try:
+                    await self._connect_and_read()
+                    reason = 'closed by server'
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    reason = repr(e)
+                except Exception as e:
+                    # A failing handler or publish must not end ingest: log it and reconnect
+                    logging.exception(f"{self.name} stream failed")
+                    reason = repr(e)
+                self.counters['errors'] += 1
+                metrics.STREAM_RECONNECTS.labels(self.name).inc()
+                if self.connected or self.disconnected_at is None:
+                    self.disconnected_at = time.time()
+                self.connected = False
+                delay = self._backoff * (0.5 + random.random())
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+                suppressed = self._error_log()
+                if suppressed:
+                    logging.warning(f"{self.name} stream disconnected ({reason}; {suppressed} disconnect(s) "
+                                    f"since last report), reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        finally:
+            for task in self._gap_tasks:
+                task.cancel()
+            if own_session:
+                await self.session.close()
+                self.session = None
+
+    def stats(self) -> dict:
+        return {**self.counters, 'connected': self.connected, 'streams': list(self.subscriptions)}
+
+    async def _connect_and_read(self):
+        async with self.session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+            self.connected = True
+            self.counters['connects'] += 1
+            # A new connection may restart the numbering; the disconnect itself is reported as a gap below
+            self.last_seq.clear()
+            logging.info(f"Connected to {self.name} stream ({len(self.subscriptions)} subscriptions)")
+            pending = {}
+            for request_id, (stream, (method, params)) in enumerate(self.subscriptions.items(), 1):
+                await ws.send_str(json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}))
+                pending[request_id] = stream
+            if self.disconnected_at is not None:
+                for stream in self.subscriptions:
+                    self._report_gap({'stream': stream, 'kind': 'disconnect', 'since': self.disconnected_at,
+                                      'until': time.time()})
+                self.disconnected_at = None
+            routes = {}
+            while True:
+                msg = await ws.receive(timeout=self.idle_timeout)
+                if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    await self._dispatch(msg.data, pending, routes)
+                elif msg.type == aiohttp.WSMsgType.ERROR:
+                    raise aiohttp.ClientError(f"WebSocket error: {ws.exception()!r}")
+                elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED):
+                    return
+
+    async def _dispatch(self, payload, pending, routes):
+        received = time.time()
+        try:
+            raw = decode(payload)
+        except ValueError:
+            self.counters['invalid'] += 1
+            return
+        if not isinstance(raw, dict):
+            self.counters['invalid'] += 1
+            return
+        # Subscription acknowledgements map the server's subscription id to our stream
+        if raw.get('id') in pending and ('result' in raw or 'error' in raw):
+            stream = pending.pop(raw['id'])
+            if 'error' in raw:
+                logging.error(f"{self.name} subscription {stream} failed: {raw['error']}")
+            elif raw['result'] is not None and not isinstance(raw['result'], dict):
+                routes[str(raw['result'])] = stream
+            return
+        params = raw.get('params')
+        if isinstance(params, dict):
+            stream = routes.get(str(params.get('subscription')))
+            data = params.get('result', raw)
+        else:
+            stream = None
+            data = raw
+        if stream is None:
+            stream = next(iter(self.subscriptions), self.name)
+        if self.sequence is not None and not self._in_sequence(stream, data):
+            return
+        # Any data resets the reconnect backoff
+        self._backoff = self.min_backoff
+        self.counters['messages'] += 1
+        metrics.STREAM_MESSAGES.labels(self.name).inc()
+        await self.handler(stream, data, received)
+
+    def _in_sequence(self, stream, data) -> bool:
+        try:
+            seq = int(self.sequence(data))
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            return True
+        last = self.last_seq.get(stream)
+        if last is not None:
+            if seq <= last:
+                self.counters['duplicates'] += 1
+                return False
+            if seq > last + 1:
+                self._report_gap({'stream': stream, 'kind': 'sequence', 'from_seq': last + 1, 'to_seq': seq - 1})
+        self.last_seq[stream] = seq
+        return True
+
+    def _report_gap(self, gap):
+        self.counters['gaps'] += 1
+        metrics.STREAM_GAPS.labels(self.name, gap['kind']).inc()
+        if self.on_gap is None:
+            return
+        # Backfills run beside the stream so reading never waits on them
+        task = asyncio.create_task(self.on_gap(gap))
+        self._gap_tasks.add(task)
+        task.add_done_callback(self._gap_done)
+
+    def _gap_done(self, task):
+        self._gap_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"{self.name} backfill failed: {task.exception()!r}")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the service modules importable when pytest runs from the service root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
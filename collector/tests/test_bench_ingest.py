@@ -0,0 +1,25 @@
+import argparse
+import asyncio
+
+from bench_ingest import bench, paced
+
+
+def test_paced_yields_at_rate():
+    async def run():
+        return [n async for n in paced(200, 0.1)]
+
+    sent = asyncio.run(run())
+    assert sent == list(range(len(sent)))
+    assert 15 <= len(sent) <= 25
+
+
+def test_short_run_reports_every_stage():
+    args = argparse.Namespace(pumpfun_rate=200, raydium_rate=50, max_speed=False, duration=0.3, distinct=50,
+                              confirm_latency_ms=0.1, db_latency_ms=0.1, db_batch_size=50)
+    report = asyncio.run(bench(args))
+    assert report['events'] == report['confirmed'] > 0
+    assert report['events_by_type']['raydium'] > 0
+    assert report['undelivered'] == 0
+    for stage in ('ws_receive', 'published', 'confirmed', 'db_write'):
+        assert report['latency_ms'][stage]['count'] > 0
+    assert report['memory']['peak_rss_mb'] > 0
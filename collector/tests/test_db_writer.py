@@ -0,0 +1,132 @@
+import asyncio
+
+from db_writer import BatchWriter
+
+
+class RecordingWriter(BatchWriter):
+    """BatchWriter that records batches instead of talking to Postgres."""
+
+    def __init__(self, **kwargs):
+        super().__init__('postgresql://unused', **kwargs)
+        self.batches = []
+
+    def _connect(self):
+        return None
+
+    def _write_batch(self, table, rows):
+        self.batches.append((table, list(rows)))
+
+
+def test_flushes_when_batch_size_reached():
+    async def run():
+        writer = RecordingWriter(batch_size=3, flush_interval=60)
+        await writer.start()
+        for i in range(3):
+            await writer.put('new_pools', (i,))
+        await asyncio.sleep(0.05)
+        assert writer.batches == [('new_pools', [(0,), (1,), (2,)])]
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(run())
+    assert writer.stats()['rows_written'] == 3
+
+
+def test_flushes_on_interval_and_on_close():
+    async def run():
+        writer = RecordingWriter(batch_size=100, flush_interval=0.05)
+        await writer.start()
+        await writer.put('new_tokens', ('mint1', '{}'))
+        await asyncio.sleep(0.15)
+        assert writer.batches == [('new_tokens', [('mint1', '{}')])]
+        await writer.put('social_metrics', ('{}',))
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(run())
+    assert writer.batches[-1] == ('social_metrics', [('{}',)])
+    stats = writer.stats()
+    assert stats['batches'] == 2
+    assert stats['queue_depth'] == 0
+
+
+def test_put_blocks_when_queue_full():
+    async def run():
+        writer = RecordingWriter(max_queue=2, batch_size=100, flush_interval=60)
+        # Queue only, no writer loop draining it
+        writer.queue = asyncio.Queue(maxsize=writer.max_queue)
+        await writer.put('new_pools', (1,))
+        await writer.put('new_pools', (2,))
+        blocked = asyncio.ensure_future(writer.put('new_pools', (3,)))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        writer.queue.get_nowait()
+        await asyncio.wait_for(blocked, 1)
+
+    asyncio.run(run())
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        self.conn.executed.append((sql, params))
+
+    def fetchone(self):
+        return (8, 2)
+
+
+class FakeConnection:
+    closed = 0
+
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConnection()
+        self.returned = []
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        self.returned.append(close)
+
+    def closeall(self):
+        pass
+
+
+def test_maintain_partitions_runs_maintenance_function():
+    pool = FakePool()
+
+    class PooledWriter(RecordingWriter):
+        def _connect(self):
+            return pool
+
+    async def run():
+        writer = PooledWriter()
+        await writer.start()
+        result = await writer.maintain_partitions(days_ahead=3, retention_days=30)
+        await writer.close()
+        return result
+
+    assert asyncio.run(run()) == (8, 2)
+    (sql, params), = pool.conn.executed
+    assert 'maintain_partitions' in sql and params == (3, 30)
+    assert pool.conn.commits == 1 and pool.returned == [False]
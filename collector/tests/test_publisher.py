@@ -0,0 +1,174 @@
+import asyncio
+
+import pytest
+from aiormq.abc import DeliveredMessage
+
+from codec import CODECS, MSGPACK, decode, get_codec
+from publisher import SignalPublisher
+from tracing import new_trace
+
+
+class FakeExchange:
+    """In-process exchange that confirms every publish unless told to fail or return it as unroutable."""
+
+    def __init__(self, fail_every=0, unroutable=False):
+        self.messages = []
+        self.fail_every = fail_every
+        self.unroutable = unroutable
+
+    async def publish(self, message, routing_key, mandatory=False):
+        await asyncio.sleep(0)
+        self.messages.append((routing_key, message))
+        if self.fail_every and len(self.messages) % self.fail_every == 0:
+            raise RuntimeError('nack')
+        if self.unroutable and mandatory:
+            return DeliveredMessage(delivery=None, header=None, body=message.body, channel=None)
+
+
+@pytest.mark.parametrize('name', sorted(CODECS))
+def test_codecs_round_trip(name):
+    content_type, encode = get_codec(name)
+    signal = {'type': 'pumpfun', 'data': {'mint': 'abc', 'marketCapSol': 31.5}, 'ts': 1.25}
+    assert decode(encode(signal), content_type) == signal
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        get_codec('xml')
+
+
+def test_batches_by_size_and_interval():
+    content_type, encode = get_codec('msgpack' if 'msgpack' in CODECS else 'json')
+
+    async def run():
+        exchange = FakeExchange()
+        publisher = SignalPublisher(content_type, encode, batch_size=3, flush_interval=0.02, persistent=True)
+        publisher.start(exchange)
+        for i in range(4):
+            await publisher.publish({'n': i})
+        # First three went out as one size-triggered batch
+        assert len(exchange.messages) == 3
+        await asyncio.sleep(0.05)
+        await publisher.close()
+        return exchange, publisher
+
+    exchange, publisher = asyncio.run(run())
+    assert [decode(m.body, m.content_type)['n'] for _, m in exchange.messages] == [0, 1, 2, 3]
+    assert {key for key, _ in exchange.messages} == {'signals.raw'}
+    assert exchange.messages[0][1].delivery_mode == 2
+    assert publisher.counters['batches'] == 2
+    assert publisher.counters['published'] == 4
+    if 'msgpack' in CODECS:
+        assert exchange.messages[0][1].content_type == MSGPACK
+
+
+def test_unconfirmed_publishes_are_counted():
+    content_type, encode = get_codec('json')
+
+    async def run():
+        publisher = SignalPublisher(content_type, encode, batch_size=10, max_retries=0)
+        publisher.start(FakeExchange(fail_every=2))
+        for i in range(4):
+            await publisher.publish({'n': i})
+        await publisher.close()
+        return publisher
+
+    publisher = asyncio.run(run())
+    assert (publisher.counters['published'], publisher.counters['failed']) == (2, 2)
+
+
+def test_unconfirmed_publishes_are_retried():
+    content_type, encode = get_codec('json')
+
+    async def run():
+        exchange = FakeExchange(fail_every=2)
+        publisher = SignalPublisher(content_type, encode, batch_size=10)
+        publisher.start(exchange)
+        for i in range(4):
+            await publisher.publish({'n': i})
+        await publisher.close()
+        return exchange, publisher
+
+    exchange, publisher = asyncio.run(run())
+    # Messages 2 and 4 are nacked, then 6 on the first retry
+    confirmed = [decode(m.body)['n'] for i, (_, m) in enumerate(exchange.messages, 1) if i % 2]
+    assert sorted(confirmed) == [0, 1, 2, 3]
+    assert (publisher.counters['published'], publisher.counters['retried'], publisher.counters['failed']) == (4, 3, 0)
+
+
+def test_close_waits_for_in_flight_batch():
+    content_type, encode = get_codec('json')
+
+    class SlowExchange(FakeExchange):
+        async def publish(self, message, routing_key, mandatory=False):
+            await asyncio.sleep(0.05)
+            await super().publish(message, routing_key, mandatory)
+
+    async def run():
+        exchange = SlowExchange()
+        publisher = SignalPublisher(content_type, encode, batch_size=100, flush_interval=0.01)
+        publisher.start(exchange)
+        for i in range(3):
+            await publisher.publish({'n': i})
+        # Let the timer start flushing, then buffer more behind it
+        await asyncio.sleep(0.02)
+        await publisher.publish({'n': 3})
+        await publisher.close()
+        return exchange, publisher
+
+    exchange, publisher = asyncio.run(run())
+    assert sorted(decode(m.body)['n'] for _, m in exchange.messages) == [0, 1, 2, 3]
+    assert publisher.counters['published'] == 4
+
+
+def test_traced_signals_get_message_id_and_stage_times():
+    content_type, encode = get_codec('json')
+    signal = {'type': 'pumpfun', 'data': {}, 'trace': new_trace(100.0)}
+
+    async def run():
+        exchange = FakeExchange()
+        publisher = SignalPublisher(content_type, encode, batch_size=1)
+        publisher.start(exchange)
+        await publisher.publish(signal)
+        await publisher.close()
+        return exchange
+
+    exchange = asyncio.run(run())
+    message = exchange.messages[0][1]
+    assert message.message_id == signal['trace']['id']
+    stages = decode(message.body)['trace']['stages']
+    assert stages['ingest'] == 100.0
+    assert stages['published'] > 100.0
+    assert signal['trace']['stages']['confirmed'] >= stages['published']
+
+
+def test_routing_key_and_exchange_per_signal():
+    content_type, encode = get_codec('json')
+
+    async def run():
+        signals, broadcast = FakeExchange(), FakeExchange()
+        publisher = SignalPublisher(content_type, encode, batch_size=10)
+        publisher.start(signals)
+        await publisher.publish({'type': 'pumpfun'}, routing_key='mint1')
+        await publisher.publish({'type': 'twitter'}, exchange=broadcast)
+        await publisher.close()
+        return signals, broadcast
+
+    signals, broadcast = asyncio.run(run())
+    assert [key for key, _ in signals.messages] == ['mint1']
+    assert [decode(m.body)['type'] for _, m in broadcast.messages] == ['twitter']
+
+
+def test_unroutable_signals_are_counted():
+    content_type, encode = get_codec('json')
+
+    async def run():
+        publisher = SignalPublisher(content_type, encode, batch_size=10)
+        publisher.start(FakeExchange(unroutable=True))
+        for i in range(3):
+            await publisher.publish({'n': i})
+        await publisher.close()
+        return publisher
+
+    publisher = asyncio.run(run())
+    assert (publisher.counters['published'], publisher.counters['unroutable']) == (0, 3)
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+import aiohttp
+from aiohttp import web
+
+from raydium_watcher import RaydiumPoolWatcher, iter_json_array
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _collect(data, size):
+    async def run():
+        return [item async for item in iter_json_array(_chunks(data, size))]
+    return asyncio.run(run())
+
+
+def test_streams_array_elements_across_chunk_boundaries():
+    pools = [{'id': f'p{i}', 'name': 'é' * i, 'lpAmount': 12345 + i} for i in range(5)] + [123456]
+    data = json.dumps(pools).encode()
+    for size in (1, 3, 7, len(data)):
+        assert _collect(data, size) == pools
+
+
+def test_non_array_response_falls_back_to_pool_lists():
+    data = json.dumps({'name': 'Raydium', 'official': [{'id': 'a'}], 'unOfficial': [{'id': 'b'}]}).encode()
+    assert _collect(data, 4) == [{'id': 'a'}, {'id': 'b'}]
+    data = json.dumps({'success': True, 'data': {'count': 1, 'data': [{'id': 'c'}]}}).encode()
+    assert _collect(data, 4) == [{'id': 'c'}]
+
+
+def test_observe_reports_new_and_changed_pools_only():
+    watcher = RaydiumPoolWatcher('http://unused', max_seen=2)
+    assert watcher.observe({'id': 'a', 'lpAmount': 100, 'price': 1})
+    # Price and small liquidity moves are not changes
+    assert not watcher.observe({'id': 'a', 'lpAmount': 110, 'price': 2})
+    assert watcher.observe({'id': 'a', 'lpAmount': 200})
+    assert watcher.observe({'id': 'a', 'lpAmount': 200, 'status': 'closed'})
+    assert not watcher.observe({'name': 'no id'})
+    watcher.observe({'id': 'b'})
+    watcher.observe({'id': 'c'})
+    assert list(watcher.seen) == ['b', 'c']
+
+
+def test_gradual_liquidity_drift_is_reported():
+    watcher = RaydiumPoolWatcher('http://unused', liquidity_change=0.2)
+    liquidity = 100.0
+    reported = [watcher.observe({'id': 'a', 'lpAmount': liquidity})]
+    for _ in range(10):
+        liquidity *= 1.1
+        reported.append(watcher.observe({'id': 'a', 'lpAmount': liquidity}))
+    # +10% per poll crosses the 20% threshold every second poll
+    assert reported == [True] + [False, True] * 5
+    assert watcher.seen['a'][1] == liquidity
+
+
+def test_seen_index_persists(tmp_path):
+    path = str(tmp_path / 'state' / 'seen.json')
+    watcher = RaydiumPoolWatcher('http://unused', seen_path=path)
+    watcher.observe({'id': 'a', 'lpAmount': 1})
+    watcher.etag = '"v1"'
+    watcher.save()
+    restored = RaydiumPoolWatcher('http://unused', seen_path=path)
+    restored.load()
+    assert restored.etag == '"v1"'
+    assert not restored.observe({'id': 'a', 'lpAmount': 1})
+
+
+def test_poll_uses_etag_and_emits_only_new_pools():
+    pools = [{'id': 'a'}, {'id': 'b'}]
+    requests = []
+
+    async def handler(request):
+        requests.append(request.headers.get('If-None-Match'))
+        etag = f'"{len(pools)}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304)
+        return web.json_response(pools, headers={'ETag': etag})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/pools', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        watcher = RaydiumPoolWatcher(f'http://127.0.0.1:{port}/pools', interval=60, min_interval=10, max_interval=120)
+        results = []
+        async with aiohttp.ClientSession() as session:
+            results.append(await watcher.poll(session))
+            results.append(await watcher.poll(session))
+            pools.append({'id': 'c'})
+            results.append(await watcher.poll(session))
+        await runner.cleanup()
+        return watcher, results
+
+    watcher, results = asyncio.run(run())
+    assert results == [[{'id': 'a'}, {'id': 'b'}], [], [{'id': 'c'}]]
+    assert requests == [None, '"2"', '"2"']
+    assert watcher.next_interval(0) == 90
+    assert watcher.next_interval(1) == 45
+
+
+def test_pool_list_larger_than_max_seen_is_not_re_emitted():
+    pools = [{'id': f'p{i}', 'lpAmount': 100} for i in range(5)]
+
+    async def handler(request):
+        return web.json_response(pools)
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/pools', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        watcher = RaydiumPoolWatcher(f'http://127.0.0.1:{port}/pools', max_seen=3)
+        watcher.observe({'id': 'gone'})
+        async with aiohttp.ClientSession() as session:
+            first = await watcher.poll(session)
+            second = await watcher.poll(session)
+        await runner.cleanup()
+        return watcher, first, second
+
+    watcher, first, second = asyncio.run(run())
+    assert first == pools
+    assert second == []
+    assert list(watcher.seen) == [p['id'] for p in pools]
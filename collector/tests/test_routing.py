@@ -0,0 +1,14 @@
+from routing import partition_key
+
+
+def test_partition_key_is_the_token_mint():
+    assert partition_key({'type': 'pumpfun', 'data': {'mint': 'm1'}}) == 'm1'
+    assert partition_key({'type': 'pumpfun', 'data': {'tokenMint': 'm2'}}) == 'm2'
+    assert partition_key({'type': 'raydium', 'data': {'id': 'p', 'tokenAddress': 'm3'}}) == 'm3'
+    assert partition_key({'type': 'raydium', 'data': {'id': 'p', 'mintA': {'address': 'm4'}}}) == 'm4'
+
+
+def test_signals_without_mint_have_no_key():
+    assert partition_key({'type': 'twitter', 'data': {'keyword': 'sol'}}) is None
+    assert partition_key({'type': 'raydium', 'data': {'id': 'p'}}) is None
+    assert partition_key({'type': 'pumpfun', 'data': None}) is None
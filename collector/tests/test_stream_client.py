@@ -0,0 +1,290 @@
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+from stream_client import LogThrottle, StreamClient
+
+
+class StreamServer:
+    """Local JSON-RPC WebSocket stand-in for the Pump.fun stream.
+
+    Each connection acknowledges subscriptions with `sub-<stream>` ids and
+    then runs the next entry of `scripts`: an async function of
+    (ws, subscriptions) that sends events and returns to close the socket.
+    """
+
+    def __init__(self, scripts, subscriptions=1):
+        self.scripts = list(scripts)
+        self.expected_subscriptions = subscriptions
+        self.connections = 0
+        self.subscribe_requests = []
+        self.url = None
+        self._runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/ws', self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f'http://127.0.0.1:{port}/ws'
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        script = self.scripts[min(self.connections, len(self.scripts) - 1)]
+        self.connections += 1
+        subscriptions = []
+        for _ in range(self.expected_subscriptions):
+            request_msg = json.loads((await ws.receive()).data)
+            self.subscribe_requests.append(request_msg)
+            stream = request_msg['params'][0]
+            subscriptions.append(stream)
+            await ws.send_str(json.dumps({'jsonrpc': '2.0', 'id': request_msg['id'], 'result': f'sub-{stream}'}))
+        await script(ws, subscriptions)
+        await ws.close()
+        return ws
+
+
+def notification(stream, result):
+    return json.dumps({'jsonrpc': '2.0', 'method': 'subscribe',
+                       'params': {'subscription': f'sub-{stream}', 'result': result}})
+
+
+async def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        await asyncio.sleep(0.01)
+
+
+def make_client(server, received, **kwargs):
+    async def handler(stream, data, received_at):
+        received.append((stream, data))
+
+    kwargs.setdefault('min_backoff', 0.01)
+    kwargs.setdefault('max_backoff', 0.05)
+    return StreamClient(server.url, handler, name='test', **kwargs)
+
+
+async def idle(ws, subscriptions):
+    # Send nothing until the client goes away
+    async for _ in ws:
+        pass
+
+
+def test_multiplexed_streams_are_routed_by_subscription():
+    async def script(ws, subscriptions):
+        await ws.send_str(notification('B', {'mint': 'b1'}))
+        await ws.send_str(notification('A', {'mint': 'a1'}))
+        await idle(ws, subscriptions)
+
+    async def run():
+        server = StreamServer([script], subscriptions=2)
+        await server.start()
+        received = []
+        client = make_client(server, received)
+        client.subscribe('A', ['A', {}])
+        client.subscribe('B', ['B', {}])
+        task = asyncio.create_task(client.run())
+        try:
+            await wait_until(lambda: len(received) == 2)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+        return server, received, client
+
+    server, received, client = asyncio.run(run())
+    assert sorted(received) == [('A', {'mint': 'a1'}), ('B', {'mint': 'b1'})]
+    assert [r['method'] for r in server.subscribe_requests] == ['subscribe', 'subscribe']
+    assert client.counters['connects'] == 1
+
+
+def test_reconnects_resubscribes_and_reports_disconnect_gap():
+    def batch(start):
+        async def script(ws, subscriptions):
+            for n in range(start, start + 3):
+                await ws.send_str(notification('S', {'n': n}))
+        return script
+
+    gaps = []
+
+    async def on_gap(gap):
+        gaps.append(gap)
+
+    async def run():
+        server = StreamServer([batch(0), batch(3), idle])
+        await server.start()
+        received = []
+        client = make_client(server, received, on_gap=on_gap)
+        client.subscribe('S', ['S', {}])
+        task = asyncio.create_task(client.run())
+        try:
+            await wait_until(lambda: len(received) == 6 and server.connections == 3)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+        return server, received, client
+
+    server, received, client = asyncio.run(run())
+    assert [data['n'] for _, data in received] == list(range(6))
+    assert len(server.subscribe_requests) == 3
+    assert client.counters['connects'] == 3
+    assert gaps and all(g['kind'] == 'disconnect' and g['until'] >= g['since'] for g in gaps)
+
+
+def test_handler_error_reconnects_instead_of_stopping():
+    async def script(ws, subscriptions):
+        await ws.send_str(notification('S', {'n': 0}))
+        await ws.send_str(notification('S', {'n': 1}))
+        await idle(ws, subscriptions)
+
+    async def run():
+        server = StreamServer([script])
+        await server.start()
+        received = []
+
+        async def handler(stream, data, received_at):
+            received.append(data['n'])
+            if len(received) == 1:
+                raise RuntimeError('publish failed')
+
+        client = StreamClient(server.url, handler, name='test', min_backoff=0.01, max_backoff=0.05)
+        client.subscribe('S', ['S', {}])
+        task = asyncio.create_task(client.run())
+        try:
+            await wait_until(lambda: server.connections >= 2 and len(received) >= 3)
+            assert not task.done()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+        return received
+
+    assert asyncio.run(run())[:3] == [0, 0, 1]
+
+
+def test_idle_connection_is_dropped():
+    async def run():
+        server = StreamServer([idle])
+        await server.start()
+        client = make_client(server, [], idle_timeout=0.1)
+        client.subscribe('S', ['S', {}])
+        task = asyncio.create_task(client.run())
+        try:
+            await wait_until(lambda: server.connections >= 2)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_sequence_gaps_and_duplicates():
+    async def script(ws, subscriptions):
+        for seq in (1, 2, 2, 5, 6):
+            await ws.send_str(notification('S', {'seq': seq}))
+        await idle(ws, subscriptions)
+
+    gaps = []
+
+    async def on_gap(gap):
+        gaps.append(gap)
+
+    async def run():
+        server = StreamServer([script])
+        await server.start()
+        received = []
+        client = make_client(server, received, sequence=lambda data: data.get('seq'), on_gap=on_gap)
+        client.subscribe('S', ['S', {}])
+        task = asyncio.create_task(client.run())
+        try:
+            await wait_until(lambda: len(received) == 4 and gaps)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+        return received, client
+
+    received, client = asyncio.run(run())
+    assert [data['seq'] for _, data in received] == [1, 2, 5, 6]
+    assert client.counters['duplicates'] == 1
+    assert gaps == [{'stream': 'S', 'kind': 'sequence', 'from_seq': 3, 'to_seq': 4}]
+
+
+def test_sequence_restarting_after_reconnect_is_accepted():
+    def numbered(seqs):
+        async def script(ws, subscriptions):
+            for seq in seqs:
+                await ws.send_str(notification('S', {'seq': seq}))
+        return script
+
+    async def run():
+        server = StreamServer([numbered((7, 8, 9)), numbered((1, 2)), idle])
+        await server.start()
+        received = []
+        client = make_client(server, received, sequence=lambda data: data.get('seq'))
+        client.subscribe('S', ['S', {}])
+        task = asyncio.create_task(client.run())
+        try:
+            await wait_until(lambda: len(received) == 5)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+        return received, client
+
+    received, client = asyncio.run(run())
+    assert [data['seq'] for _, data in received] == [7, 8, 9, 1, 2]
+    assert client.counters['duplicates'] == 0
+
+
+def test_throughput():
+    total = 20000
+    payload = {'mint': 'x' * 44, 'marketCapSol': 31.5, 'name': 'token', 'symbol': 'TKN'}
+
+    async def script(ws, subscriptions):
+        for n in range(total):
+            await ws.send_str(notification('S', {**payload, 'n': n}))
+        await idle(ws, subscriptions)
+
+    async def run():
+        server = StreamServer([script])
+        await server.start()
+        received = []
+        client = make_client(server, received)
+        client.subscribe('S', ['S', {}])
+        started = time.perf_counter()
+        task = asyncio.create_task(client.run())
+        try:
+            await wait_until(lambda: len(received) == total, timeout=30)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+        return received, time.perf_counter() - started
+
+    received, elapsed = asyncio.run(run())
+    assert received[-1][1]['n'] == total - 1
+    # Loose floor so the test only catches pathological slowdowns
+    assert total / elapsed > 1000
+
+
+def test_log_throttle_counts_suppressed_calls():
+    now = [0.0]
+    throttle = LogThrottle(10, clock=lambda: now[0])
+    assert throttle() == 1
+    assert throttle() == 0
+    assert throttle() == 0
+    now[0] = 10.0
+    assert throttle() == 3
@@ -0,0 +1,72 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from twitter_pipeline import TwitterSentimentPipeline, score_texts
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeScraper:
+    """Offline stand-in for snscrape: serves tweets newer than the cursor, newest first."""
+
+    def __init__(self):
+        self.tweets = {}
+        self.calls = []
+
+    def add(self, keyword, tweet_id, text):
+        self.tweets.setdefault(keyword, []).append(
+            {'id': tweet_id, 'date': START + timedelta(seconds=tweet_id), 'text': text})
+
+    def __call__(self, keyword, since_id, since, limit):
+        self.calls.append((keyword, since_id))
+        newer = [t for t in self.tweets.get(keyword, []) if since_id is None or t['id'] > since_id]
+        return sorted(newer, key=lambda t: t['id'], reverse=True)[:limit]
+
+
+def test_score_texts_uses_vader():
+    good, bad = score_texts(['I love this, great coin!', 'terrible scam, awful'])
+    assert good > 0 > bad
+
+
+def test_polls_are_incremental_with_rolling_aggregates():
+    scraper = FakeScraper()
+    scraper.add('sol', 1, 'great')
+    scraper.add('sol', 2, 'awful')
+    scraper.add('bonk', 3, 'love it')
+    pipeline = TwitterSentimentPipeline(['sol', ' bonk'], scraper=scraper, batch_size=1,
+                                        score_executor=ThreadPoolExecutor(2), ewma_alpha=0.5)
+
+    async def run():
+        first = await pipeline.poll(START)
+        scraper.add('sol', 4, 'great')
+        second = await pipeline.poll(START)
+        return first, second
+
+    first, second = asyncio.run(run())
+    pipeline.close()
+    sol_first, bonk_first = first
+    assert (sol_first['keyword'], sol_first['count'], sol_first['last_tweet_id']) == ('sol', 2, 2)
+    assert bonk_first['count'] == 1
+    sol_second, bonk_second = second
+    # Only the new tweet was fetched and scored
+    assert sol_second['count'] == 1
+    assert sol_second['total_count'] == 3
+    assert bonk_second['count'] == 0
+    assert ('sol', 2) in scraper.calls and ('bonk', 3) in scraper.calls
+    great, awful = score_texts(['great', 'awful'])
+    assert abs(sol_second['mean_sentiment'] - (2 * great + awful) / 3) < 1e-9
+    expected_ewma = 0.5 * great + 0.5 * (0.5 * awful + 0.5 * great)
+    assert abs(sol_second['ewma_sentiment'] - expected_ewma) < 1e-9
+
+
+def test_failing_keyword_does_not_block_others():
+    def scraper(keyword, since_id, since, limit):
+        if keyword == 'bad':
+            raise RuntimeError('rate limited')
+        return []
+
+    pipeline = TwitterSentimentPipeline(['bad', 'good'], scraper=scraper, score_executor=ThreadPoolExecutor(1))
+    metrics = asyncio.run(pipeline.poll(START))
+    pipeline.close()
+    assert [m['keyword'] for m in metrics] == ['good']
@@ -0,0 +1,17 @@
+import time
+import uuid
+
+
+def new_trace(ingested_at: float = None) -> dict:
+    """Trace carried by a signal from ingest through brain to signals.decoded."""
+    return {'id': uuid.uuid4().hex, 'stages': {'ingest': ingested_at or time.time()}}
+
+
+def mark(signal: dict, stage: str, at: float = None) -> float:
+    """Record when `signal` reached `stage`; returns seconds since ingest (0 if untraced)."""
+    trace = signal.get('trace')
+    if trace is None:
+        return 0.0
+    at = at or time.time()
+    trace['stages'][stage] = at
+    return at - trace['stages'].get('ingest', at)
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Per-process VADER analyzer, created on first use inside each worker
+_analyzer = None
+
+
+def score_texts(texts: list) -> list:
+    """Compound VADER sentiment for a batch of texts (runs in a worker process)."""
+    global _analyzer
+    if _analyzer is None:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+    return [_analyzer.polarity_scores(text)['compound'] for text in texts]
+
+
+def snscrape_search(keyword: str, since_id, since, limit: int) -> list:
+    """Fetch tweets newer than `since_id`/`since` for a keyword, newest first."""
+    import snscrape.modules.twitter as sntwitter
+    tweets = []
+    for tweet in sntwitter.TwitterSearchScraper(keyword).get_items():
+        if len(tweets) >= limit or tweet.date < since:
+            break
+        if since_id is not None and tweet.id <= since_id:
+            break
+        text = getattr(tweet, 'rawContent', None) or tweet.content
+        tweets.append({'id': tweet.id, 'date': tweet.date, 'text': text})
+    return tweets
+
+
+class KeywordStats:
+    """Cursor and rolling sentiment aggregates for one keyword."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.last_id = None
+        self.last_date = None
+        self.count = 0
+        self.total = 0.0
+        self.ewma = None
+
+    def update(self, tweets: list, scores: list):
+        # Apply oldest first so the EWMA follows tweet order
+        for tweet, score in sorted(zip(tweets, scores), key=lambda pair: pair[0]['id']):
+            self.count += 1
+            self.total += score
+            self.ewma = score if self.ewma is None else self.alpha * score + (1 - self.alpha) * self.ewma
+            self.last_id = tweet['id']
+            self.last_date = tweet['date']
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class TwitterSentimentPipeline:
+    """Incremental keyword sentiment: concurrent scraping, batched scoring, rolling aggregates.
+
+    Each keyword keeps a cursor (last tweet id and time), so a poll only fetches
+    tweets newer than the previous one. `scraper(keyword, since_id, since,
+    limit)` is blocking and runs on a thread per keyword; scoring runs in
+    `score_executor` (a process pool by default) in batches of `batch_size`.
+    """
+
+    def __init__(self, keywords, scraper=snscrape_search, score_executor=None, max_tweets=100,
+                 batch_size=64, ewma_alpha=0.3):
+        self.keywords = [k.strip() for k in keywords if k.strip()]
+        self.scraper = scraper
+        self.max_tweets = max_tweets
+        self.batch_size = batch_size
+        self.stats = {k: KeywordStats(ewma_alpha) for k in self.keywords}
+        self._scrape_executor = ThreadPoolExecutor(max_workers=max(len(self.keywords), 1),
+                                                   thread_name_prefix='twitter-scrape')
+        self._score_executor = score_executor or ProcessPoolExecutor(max_workers=2)
+
+    def close(self):
+        self._scrape_executor.shutdown(wait=False)
+        self._score_executor.shutdown(wait=False)
+
+    async def poll(self, since) -> list:
+        """Scrape all keywords concurrently and return one metric per keyword."""
+        results = await asyncio.gather(*[self._poll_keyword(k, since) for k in self.keywords],
+                                       return_exceptions=True)
+        metrics = []
+        for keyword, result in zip(self.keywords, results):
+            if isinstance(result, Exception):
+                logging.error(f"Twitter poll failed for {keyword}: {result}")
+                continue
+            metrics.append(result)
+        return metrics
+
+    async def _poll_keyword(self, keyword: str, since) -> dict:
+        loop = asyncio.get_running_loop()
+        stats = self.stats[keyword]
+        if stats.last_date is not None and stats.last_date > since:
+            since = stats.last_date
+        tweets = await loop.run_in_executor(self._scrape_executor, self.scraper, keyword, stats.last_id,
+                                            since, self.max_tweets)
+        scores = await self._score([t['text'] for t in tweets])
+        stats.update(tweets, scores)
+        return {
+            'keyword': keyword,
+            'count': len(tweets),
+            'avg_sentiment': sum(scores) / len(scores) if scores else 0.0,
+            'since': since.isoformat(),
+            'total_count': stats.count,
+            'mean_sentiment': stats.mean,
+            'ewma_sentiment': stats.ewma if stats.ewma is not None else 0.0,
+            'last_tweet_id': stats.last_id,
+        }
+
+    async def _score(self, texts: list) -> list:
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*[loop.run_in_executor(self._score_executor, score_texts, batch)
+                                         for batch in batches])
+        return [score for batch in results for score in batch]
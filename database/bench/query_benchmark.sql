@@ -0,0 +1,129 @@
+-- Query benchmark: original heap tables vs. the partitioned + indexed layout.
+--
+-- Loads synthetic new_tokens/new_pools rows spread over :days days into a
+-- scratch `bench` schema twice (heap_* as in init.sql, part_* as after the
+-- migrations) and runs EXPLAIN ANALYZE on the lookups the services issue.
+-- Needs the functions from migrations/001; run against a scratch database:
+--
+--     psql "$DATABASE_URL" -f database/bench/query_benchmark.sql
+--     psql "$DATABASE_URL" -v rows=1000000 -f database/bench/query_benchmark.sql
+\set ON_ERROR_STOP on
+\if :{?rows}
+\else
+\set rows 10000000
+\endif
+\if :{?days}
+\else
+\set days 30
+\endif
+\timing on
+
+DROP SCHEMA IF EXISTS bench CASCADE;
+CREATE SCHEMA bench;
+SET search_path = bench, public;
+
+-- Baseline layout (database/init.sql)
+CREATE TABLE heap_tokens (
+    id SERIAL PRIMARY KEY,
+    token_mint TEXT NOT NULL,
+    raw_data JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE TABLE heap_pools (
+    id SERIAL PRIMARY KEY,
+    pool_data JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- :rows tokens over :days days in arrival order, ~10 rows per mint; a quarter as many pools
+INSERT INTO heap_tokens (token_mint, raw_data, created_at)
+SELECT 'mint' || (i % (:rows / 10)),
+       jsonb_build_object('mint', 'mint' || (i % (:rows / 10)), 'name', 'Token ' || i,
+                          'marketCapSol', round((random() * 100)::numeric, 2), 'signature', md5(i::text)),
+       NOW() - (1 - i::float8 / :rows) * (:days * interval '1 day')
+  FROM generate_series(1, :rows) AS i;
+
+INSERT INTO heap_pools (pool_data, created_at)
+SELECT jsonb_build_object('id', 'pool' || i, 'tokenAddress', 'mint' || (i % (:rows / 10)),
+                          'lpAmount', round((random() * 1000)::numeric, 3)),
+       NOW() - (1 - i::float8 * 4 / :rows) * (:days * interval '1 day')
+  FROM generate_series(1, :rows / 4) AS i;
+
+-- Partitioned layout: same rows, converted and indexed like migrations 001/002
+CREATE TABLE part_tokens AS TABLE heap_tokens;
+CREATE TABLE part_pools AS TABLE heap_pools;
+CREATE SEQUENCE part_tokens_id_seq OWNED BY part_tokens.id;
+CREATE SEQUENCE part_pools_id_seq OWNED BY part_pools.id;
+ALTER TABLE part_tokens ALTER COLUMN id SET DEFAULT nextval('part_tokens_id_seq');
+ALTER TABLE part_pools ALTER COLUMN id SET DEFAULT nextval('part_pools_id_seq');
+SELECT partition_by_created_at('part_tokens'), partition_by_created_at('part_pools');
+CREATE INDEX ON part_tokens (token_mint, created_at DESC);
+CREATE INDEX ON part_pools ((pool_data->>'id'), created_at DESC);
+CREATE INDEX ON part_pools ((pool_data->>'tokenAddress'), created_at DESC);
+CREATE INDEX ON part_tokens USING brin (created_at);
+CREATE INDEX ON part_pools USING brin (created_at);
+VACUUM ANALYZE heap_tokens, heap_pools, part_tokens, part_pools;
+
+\echo '== Trader: latest token row by mint'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT raw_data FROM heap_tokens WHERE token_mint = 'mint4242' ORDER BY created_at DESC LIMIT 1;
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT raw_data FROM part_tokens WHERE token_mint = 'mint4242' ORDER BY created_at DESC LIMIT 1;
+
+\echo '== Trader: latest pool liquidity by token address'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT pool_data->>'lpAmount' FROM heap_pools WHERE pool_data->>'tokenAddress' = 'mint4242'
+ ORDER BY created_at DESC LIMIT 1;
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT pool_data->>'lpAmount' FROM part_pools WHERE pool_data->>'tokenAddress' = 'mint4242'
+ ORDER BY created_at DESC LIMIT 1;
+
+\echo '== Pool by id'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT pool_data FROM heap_pools WHERE pool_data->>'id' = 'pool31337';
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT pool_data FROM part_pools WHERE pool_data->>'id' = 'pool31337';
+
+\echo '== Last hour of tokens'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT count(*) FROM heap_tokens WHERE created_at >= NOW() - interval '1 hour';
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT count(*) FROM part_tokens WHERE created_at >= NOW() - interval '1 hour';
+
+\echo '== Replay range: one day, in time order'
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT raw_data FROM heap_tokens
+ WHERE created_at >= NOW() - interval '3 days' AND created_at < NOW() - interval '2 days' ORDER BY created_at;
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT raw_data FROM part_tokens
+ WHERE created_at >= NOW() - interval '3 days' AND created_at < NOW() - interval '2 days' ORDER BY created_at;
+
+\echo '== Retention: remove everything older than 14 days'
+BEGIN;
+DELETE FROM heap_tokens WHERE created_at < NOW() - interval '14 days';
+ROLLBACK;
+BEGIN;
+DO $$
+DECLARE
+    part text;
+BEGIN
+    FOR part IN
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+         WHERE i.inhparent = 'part_tokens'::regclass AND c.relname ~ '_p[0-9]{8}$'
+           AND to_date(right(c.relname, 8), 'YYYYMMDD') < ((NOW() - interval '14 days') AT TIME ZONE 'UTC')::date
+    LOOP
+        EXECUTE format('DROP TABLE %I', part);
+    END LOOP;
+END;
+$$;
+ROLLBACK;
+
+\echo '== Table sizes'
+SELECT relname, pg_size_pretty(pg_total_relation_size(oid)) AS total
+  FROM pg_class WHERE relname IN ('heap_tokens', 'heap_pools')
+UNION ALL
+SELECT relname, pg_size_pretty(sum(pg_total_relation_size(inhrelid)))
+  FROM pg_inherits JOIN pg_class p ON p.oid = inhparent
+ WHERE relname IN ('part_tokens', 'part_pools') GROUP BY relname;
+
+DROP SCHEMA bench CASCADE;
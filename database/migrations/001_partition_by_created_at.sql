@@ -0,0 +1,70 @@
+-- Range-partition the high-volume tables by day on created_at.
+--
+-- Each table becomes a partitioned parent with daily partitions named
+-- <table>_pYYYYMMDD (UTC days) and a <table>_default partition catching rows
+-- outside the created ranges. Existing rows are copied into the new layout,
+-- so this also upgrades a populated database; each table is locked while it
+-- is rewritten. The primary key becomes (id, created_at) because Postgres
+-- requires the partition key in every unique constraint.
+BEGIN;
+
+CREATE OR REPLACE FUNCTION ensure_daily_partitions(parent regclass, first_day date, last_day date)
+RETURNS integer AS $$
+DECLARE
+    nsp text;
+    rel text;
+    d date;
+    part text;
+    created integer := 0;
+BEGIN
+    SELECT n.nspname, c.relname INTO nsp, rel
+      FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+     WHERE c.oid = parent;
+    FOR d IN SELECT g::date FROM generate_series(first_day, last_day, interval '1 day') g LOOP
+        part := rel || '_p' || to_char(d, 'YYYYMMDD');
+        CONTINUE WHEN to_regclass(format('%I.%I', nsp, part)) IS NOT NULL;
+        BEGIN
+            EXECUTE format('CREATE TABLE %I.%I PARTITION OF %I.%I FOR VALUES FROM (%L) TO (%L)',
+                           nsp, part, nsp, rel,
+                           d::timestamp AT TIME ZONE 'UTC', (d + 1)::timestamp AT TIME ZONE 'UTC');
+            created := created + 1;
+        EXCEPTION WHEN check_violation THEN
+            -- Rows for this day already landed in the default partition; leave them there
+            RAISE WARNING 'Cannot create partition %: % holds rows for %', part, rel || '_default', d;
+        END;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION partition_by_created_at(tbl text, days_ahead integer DEFAULT 7)
+RETURNS void AS $$
+DECLARE
+    legacy text := tbl || '_unpartitioned';
+    first_day date;
+    today date := (NOW() AT TIME ZONE 'UTC')::date;
+BEGIN
+    IF to_regclass(tbl) IS NULL
+       OR EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(tbl)) THEN
+        RETURN;
+    END IF;
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, legacy);
+    EXECUTE format('UPDATE %I SET created_at = NOW() WHERE created_at IS NULL', legacy);
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)', tbl, legacy);
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN created_at SET NOT NULL', tbl);
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', tbl || '_default', tbl);
+    EXECUTE format('SELECT (min(created_at) AT TIME ZONE ''UTC'')::date FROM %I', legacy) INTO first_day;
+    PERFORM ensure_daily_partitions(tbl::regclass, LEAST(COALESCE(first_day, today), today),
+                                    today + days_ahead);
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', tbl, legacy);
+    -- Keep the id sequence (and its current value) when the old table is dropped
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.id', pg_get_serial_sequence(legacy, 'id'), tbl);
+    EXECUTE format('DROP TABLE %I', legacy);
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, created_at)', tbl);
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT partition_by_created_at(t)
+  FROM unnest(ARRAY['new_tokens', 'new_pools', 'social_metrics', 'signals_raw', 'signals_decoded']) AS t;
+
+COMMIT;
@@ -0,0 +1,28 @@
+-- Lookup indexes for the partitioned tables. Indexes created on a partitioned
+-- parent are created on every existing and future partition.
+BEGIN;
+
+-- Trader: latest new_tokens row for a mint
+CREATE INDEX IF NOT EXISTS new_tokens_token_mint_idx ON new_tokens (token_mint, created_at DESC);
+
+-- Raydium pools by pool id and by base token (trader's liquidity lookup)
+CREATE INDEX IF NOT EXISTS new_pools_pool_id_idx ON new_pools ((pool_data->>'id'), created_at DESC);
+CREATE INDEX IF NOT EXISTS new_pools_token_address_idx ON new_pools ((pool_data->>'tokenAddress'), created_at DESC);
+
+-- Sentiment history per keyword
+CREATE INDEX IF NOT EXISTS social_metrics_keyword_idx ON social_metrics ((metrics->>'keyword'), created_at DESC);
+
+-- Raw signals and decisions by mint
+CREATE INDEX IF NOT EXISTS signals_raw_mint_idx ON signals_raw ((signal->'data'->>'mint'), created_at DESC);
+CREATE INDEX IF NOT EXISTS signals_decoded_token_mint_idx
+    ON signals_decoded ((decision->>'token_mint'), created_at DESC);
+
+-- Time-range scans inside a partition. Rows arrive in created_at order, so a
+-- BRIN index is a few pages per partition yet skips almost all blocks.
+CREATE INDEX IF NOT EXISTS new_tokens_created_at_idx ON new_tokens USING brin (created_at);
+CREATE INDEX IF NOT EXISTS new_pools_created_at_idx ON new_pools USING brin (created_at);
+CREATE INDEX IF NOT EXISTS social_metrics_created_at_idx ON social_metrics USING brin (created_at);
+CREATE INDEX IF NOT EXISTS signals_raw_created_at_idx ON signals_raw USING brin (created_at);
+CREATE INDEX IF NOT EXISTS signals_decoded_created_at_idx ON signals_decoded USING brin (created_at);
+
+COMMIT;
@@ -0,0 +1,231 @@
+-- Daily rollups and retention for the partitioned tables.
+--
+-- maintain_partitions() creates the partitions for the coming days and, for
+-- every daily partition older than the retention period, writes its
+-- aggregates into the matching *_daily table and drops it. Expired rows that
+-- landed in a <table>_default partition are rolled up and deleted the same
+-- way. The collector calls it periodically (DB_MAINTENANCE_INTERVAL); it can
+-- also be run by hand:
+--
+--     SELECT * FROM maintain_partitions(days_ahead => 7, retention => '14 days');
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS new_tokens_daily (
+    day DATE PRIMARY KEY,
+    tokens BIGINT NOT NULL,
+    distinct_mints BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS new_pools_daily (
+    day DATE PRIMARY KEY,
+    pools BIGINT NOT NULL,
+    distinct_pools BIGINT NOT NULL,
+    distinct_tokens BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS social_metrics_daily (
+    day DATE NOT NULL,
+    keyword TEXT NOT NULL,
+    samples BIGINT NOT NULL,
+    tweets BIGINT NOT NULL,
+    avg_sentiment DOUBLE PRECISION,
+    PRIMARY KEY (day, keyword)
+);
+
+CREATE TABLE IF NOT EXISTS signals_raw_daily (
+    day DATE NOT NULL,
+    type TEXT NOT NULL,
+    signals BIGINT NOT NULL,
+    distinct_mints BIGINT NOT NULL,
+    PRIMARY KEY (day, type)
+);
+
+-- The trader looks up the newest new_tokens row of a mint (bondingCurve
+-- decides between a Pump.fun and a Jupiter trade) and the newest new_pools
+-- row of a token (lpAmount is checked against MIN_LIQUIDITY_SOL), however old
+-- that row is. Before raw rows expire, the newest one per mint is kept here;
+-- these tables are never dropped and the *_lookup views below read both.
+CREATE TABLE IF NOT EXISTS new_tokens_latest (
+    token_mint TEXT PRIMARY KEY,
+    raw_data JSONB,
+    created_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS new_pools_latest (
+    token_address TEXT PRIMARY KEY,
+    pool_data JSONB,
+    created_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE OR REPLACE VIEW new_tokens_lookup AS
+    SELECT token_mint, raw_data, created_at FROM new_tokens
+    UNION ALL
+    SELECT token_mint, raw_data, created_at FROM new_tokens_latest;
+
+CREATE OR REPLACE VIEW new_pools_lookup AS
+    SELECT pool_data->>'tokenAddress' AS token_address, pool_data, created_at FROM new_pools
+    UNION ALL
+    SELECT token_address, pool_data, created_at FROM new_pools_latest;
+
+CREATE TABLE IF NOT EXISTS signals_decoded_daily (
+    day DATE NOT NULL,
+    action TEXT NOT NULL,
+    decisions BIGINT NOT NULL,
+    distinct_mints BIGINT NOT NULL,
+    PRIMARY KEY (day, action)
+);
+
+-- Keep the newest new_tokens/new_pools row per mint among the rows of `part`
+-- created on day `d` (see new_tokens_latest); other tables have nothing to keep.
+CREATE OR REPLACE FUNCTION keep_latest(parent text, part text, d date)
+RETURNS void AS $$
+BEGIN
+    IF parent = 'new_tokens' THEN
+        EXECUTE format($q$
+            INSERT INTO new_tokens_latest (token_mint, raw_data, created_at)
+            SELECT DISTINCT ON (token_mint) token_mint, raw_data, created_at FROM %I
+             WHERE created_at >= $1 AND created_at < $2
+             ORDER BY token_mint, created_at DESC
+            ON CONFLICT (token_mint) DO UPDATE
+                SET raw_data = EXCLUDED.raw_data, created_at = EXCLUDED.created_at
+                WHERE new_tokens_latest.created_at <= EXCLUDED.created_at
+        $q$, part) USING d::timestamp AT TIME ZONE 'UTC', (d + 1)::timestamp AT TIME ZONE 'UTC';
+    ELSIF parent = 'new_pools' THEN
+        EXECUTE format($q$
+            INSERT INTO new_pools_latest (token_address, pool_data, created_at)
+            SELECT DISTINCT ON (pool_data->>'tokenAddress') pool_data->>'tokenAddress', pool_data, created_at
+              FROM %I
+             WHERE created_at >= $1 AND created_at < $2 AND pool_data->>'tokenAddress' IS NOT NULL
+             ORDER BY pool_data->>'tokenAddress', created_at DESC
+            ON CONFLICT (token_address) DO UPDATE
+                SET pool_data = EXCLUDED.pool_data, created_at = EXCLUDED.created_at
+                WHERE new_pools_latest.created_at <= EXCLUDED.created_at
+        $q$, part) USING d::timestamp AT TIME ZONE 'UTC', (d + 1)::timestamp AT TIME ZONE 'UTC';
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Aggregate the rows of `part` created on day `d` into the rollup table of
+-- `parent`. A daily partition holds exactly one day, so by default re-running
+-- replaces that day's row(s). With `accumulate` the counts are added to an
+-- existing row instead: rows rolled up from the default partition may belong
+-- to a day that was already rolled up, and the distinct counts of such a day
+-- become an upper bound.
+DROP FUNCTION IF EXISTS rollup_partition(text, text, date);
+CREATE OR REPLACE FUNCTION rollup_partition(parent text, part text, d date, accumulate boolean DEFAULT false)
+RETURNS void AS $$
+DECLARE
+    rows_of_day text := format('(SELECT * FROM %I WHERE created_at >= %L AND created_at < %L) day_rows', part,
+                               d::timestamp AT TIME ZONE 'UTC', (d + 1)::timestamp AT TIME ZONE 'UTC');
+BEGIN
+    IF parent = 'new_tokens' THEN
+        EXECUTE format($q$
+            INSERT INTO new_tokens_daily AS t (day, tokens, distinct_mints)
+            SELECT $1, count(*), count(DISTINCT token_mint) FROM %s
+            ON CONFLICT (day) DO UPDATE
+                SET tokens = EXCLUDED.tokens + CASE WHEN $2 THEN t.tokens ELSE 0 END,
+                    distinct_mints = EXCLUDED.distinct_mints + CASE WHEN $2 THEN t.distinct_mints ELSE 0 END
+        $q$, rows_of_day) USING d, accumulate;
+    ELSIF parent = 'new_pools' THEN
+        EXECUTE format($q$
+            INSERT INTO new_pools_daily AS t (day, pools, distinct_pools, distinct_tokens)
+            SELECT $1, count(*), count(DISTINCT pool_data->>'id'), count(DISTINCT pool_data->>'tokenAddress') FROM %s
+            ON CONFLICT (day) DO UPDATE
+                SET pools = EXCLUDED.pools + CASE WHEN $2 THEN t.pools ELSE 0 END,
+                    distinct_pools = EXCLUDED.distinct_pools + CASE WHEN $2 THEN t.distinct_pools ELSE 0 END,
+                    distinct_tokens = EXCLUDED.distinct_tokens + CASE WHEN $2 THEN t.distinct_tokens ELSE 0 END
+        $q$, rows_of_day) USING d, accumulate;
+    ELSIF parent = 'social_metrics' THEN
+        EXECUTE format($q$
+            INSERT INTO social_metrics_daily AS t (day, keyword, samples, tweets, avg_sentiment)
+            SELECT $1, metrics->>'keyword', count(*), sum((metrics->>'count')::bigint),
+                   sum((metrics->>'count')::bigint * (metrics->>'avg_sentiment')::float8)
+                       / NULLIF(sum((metrics->>'count')::bigint), 0)
+              FROM %s WHERE metrics->>'keyword' IS NOT NULL
+             GROUP BY metrics->>'keyword'
+            ON CONFLICT (day, keyword) DO UPDATE
+                SET samples = EXCLUDED.samples + CASE WHEN $2 THEN t.samples ELSE 0 END,
+                    tweets = EXCLUDED.tweets + CASE WHEN $2 THEN t.tweets ELSE 0 END,
+                    avg_sentiment = CASE WHEN $2
+                        THEN (COALESCE(EXCLUDED.avg_sentiment * EXCLUDED.tweets, 0)
+                              + COALESCE(t.avg_sentiment * t.tweets, 0))
+                             / NULLIF(COALESCE(EXCLUDED.tweets, 0) + COALESCE(t.tweets, 0), 0)
+                        ELSE EXCLUDED.avg_sentiment END
+        $q$, rows_of_day) USING d, accumulate;
+    ELSIF parent = 'signals_raw' THEN
+        EXECUTE format($q$
+            INSERT INTO signals_raw_daily AS t (day, type, signals, distinct_mints)
+            SELECT $1, COALESCE(signal->>'type', ''), count(*), count(DISTINCT signal->'data'->>'mint') FROM %s
+             GROUP BY 2
+            ON CONFLICT (day, type) DO UPDATE
+                SET signals = EXCLUDED.signals + CASE WHEN $2 THEN t.signals ELSE 0 END,
+                    distinct_mints = EXCLUDED.distinct_mints + CASE WHEN $2 THEN t.distinct_mints ELSE 0 END
+        $q$, rows_of_day) USING d, accumulate;
+    ELSIF parent = 'signals_decoded' THEN
+        EXECUTE format($q$
+            INSERT INTO signals_decoded_daily AS t (day, action, decisions, distinct_mints)
+            SELECT $1, COALESCE(decision->>'action', ''), count(*), count(DISTINCT NULLIF(decision->>'token_mint', ''))
+              FROM %s
+             GROUP BY 2
+            ON CONFLICT (day, action) DO UPDATE
+                SET decisions = EXCLUDED.decisions + CASE WHEN $2 THEN t.decisions ELSE 0 END,
+                    distinct_mints = EXCLUDED.distinct_mints + CASE WHEN $2 THEN t.distinct_mints ELSE 0 END
+        $q$, rows_of_day) USING d, accumulate;
+    ELSE
+        RAISE EXCEPTION 'No rollup defined for %', parent;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_partitions(days_ahead integer DEFAULT 7, retention interval DEFAULT '14 days')
+RETURNS TABLE (partitions_created integer, partitions_dropped integer) AS $$
+DECLARE
+    tables text[] := ARRAY['new_tokens', 'new_pools', 'social_metrics', 'signals_raw', 'signals_decoded'];
+    -- Partitions whose whole day is before this date have expired
+    today date := (NOW() AT TIME ZONE 'UTC')::date;
+    cutoff date := ((NOW() - retention) AT TIME ZONE 'UTC')::date;
+    parent text;
+    part text;
+    d date;
+BEGIN
+    partitions_created := 0;
+    partitions_dropped := 0;
+    FOREACH parent IN ARRAY tables LOOP
+        partitions_created := partitions_created
+            + ensure_daily_partitions(parent::regclass, today, today + days_ahead);
+    END LOOP;
+    FOR parent, part IN
+        SELECT p.relname, c.relname
+          FROM pg_inherits i
+          JOIN pg_class c ON c.oid = i.inhrelid
+          JOIN pg_class p ON p.oid = i.inhparent
+         WHERE p.oid = ANY (SELECT to_regclass(t) FROM unnest(tables) t)
+           AND c.relname ~ '_p[0-9]{8}$'
+         ORDER BY c.relname
+    LOOP
+        d := to_date(right(part, 8), 'YYYYMMDD');
+        CONTINUE WHEN d >= cutoff;
+        PERFORM keep_latest(parent, part, d);
+        PERFORM rollup_partition(parent, part, d);
+        EXECUTE format('DROP TABLE %I', part);
+        partitions_dropped := partitions_dropped + 1;
+    END LOOP;
+    -- Rows outside the daily partitions (e.g. written before their day's
+    -- partition existed) sit in the default partition; expire those per day
+    FOREACH parent IN ARRAY tables LOOP
+        part := parent || '_default';
+        CONTINUE WHEN to_regclass(part) IS NULL;
+        FOR d IN EXECUTE format(
+            'SELECT DISTINCT (created_at AT TIME ZONE ''UTC'')::date FROM %I WHERE created_at < $1 ORDER BY 1', part)
+            USING cutoff::timestamp AT TIME ZONE 'UTC'
+        LOOP
+            PERFORM keep_latest(parent, part, d);
+            PERFORM rollup_partition(parent, part, d, accumulate => true);
+        END LOOP;
+        EXECUTE format('DELETE FROM %I WHERE created_at < $1', part) USING cutoff::timestamp AT TIME ZONE 'UTC';
+    END LOOP;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -0,0 +1,21 @@
+-- Shared state and membership for brain replicas (brain/cluster.py).
+BEGIN;
+
+-- State all replicas follow (config, running); changes are announced with
+-- NOTIFY brain_shared
+CREATE TABLE IF NOT EXISTS brain_shared (
+    key TEXT PRIMARY KEY,
+    value JSONB NOT NULL,
+    updated_by TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- One row per replica, refreshed by its heartbeat
+CREATE TABLE IF NOT EXISTS brain_replicas (
+    replica_id TEXT PRIMARY KEY,
+    is_leader BOOLEAN NOT NULL DEFAULT FALSE,
+    status JSONB,
+    heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMIT;
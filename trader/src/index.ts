@@ -65,10 +65,10 @@ const MIN_LIQUIDITY_SOL = parseFloat(process.env.MIN_LIQUIDITY_SOL || '0.1');
         channel.ack(msg);
         return;
       }
-      // Check minimum liquidity
+      // Check minimum liquidity (new_pools_lookup also covers rows past DB_RETENTION_DAYS)
       try {
         const liqRes = await pool.query(
-          `SELECT pool_data->>'lpAmount' as liq FROM new_pools WHERE pool_data->>'tokenAddress' = $1 ORDER BY created_at DESC LIMIT 1`,
+          `SELECT pool_data->>'lpAmount' as liq FROM new_pools_lookup WHERE token_address = $1 ORDER BY created_at DESC LIMIT 1`,
           [decision.token_mint]
         );
         const liq = liqRes.rowCount ? parseFloat(liqRes.rows[0].liq) : 0;
@@ -87,7 +87,7 @@ const MIN_LIQUIDITY_SOL = parseFloat(process.env.MIN_LIQUIDITY_SOL || '0.1');
         try {
           // Determine if token is still on bonding curve
           const res = await pool.query(
-            'SELECT raw_data FROM new_tokens WHERE token_mint = $1 ORDER BY created_at DESC LIMIT 1',
+            'SELECT raw_data FROM new_tokens_lookup WHERE token_mint = $1 ORDER BY created_at DESC LIMIT 1',
             [decision.token_mint]
           );
           const row = res.rows[0];
@@ -133,7 +133,7 @@ const MIN_LIQUIDITY_SOL = parseFloat(process.env.MIN_LIQUIDITY_SOL || '0.1');
         try {
           // Determine if token is still on bonding curve
           const res = await pool.query(
-            'SELECT raw_data FROM new_tokens WHERE token_mint = $1 ORDER BY created_at DESC LIMIT 1',
+            'SELECT raw_data FROM new_tokens_lookup WHERE token_mint = $1 ORDER BY created_at DESC LIMIT 1',
             [decision.token_mint]
           );
           const row = res.rows[0];